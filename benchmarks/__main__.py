@@ -0,0 +1,100 @@
+"""
+Runs the benchmark suite of benchmarks/suite.py, saves the results as a JSON
+baseline and compares against one.
+
+    python -m benchmarks --save baseline.json
+    python -m benchmarks --baseline baseline.json --threshold 0.1
+
+Exits with status 1 when a result is worse than its baseline by more than
+`threshold` (a fraction). Baselines only mean something on the machine they
+were saved on.
+"""
+import argparse
+import json
+import platform
+import sys
+from typing import Dict, List
+
+from benchmarks.suite import BENCHMARKS
+
+BASELINE_VERSION = 1
+
+
+def run(names: List[str], scale: float = 1.0, repeat: int = 5, report=print) -> Dict[str, dict]:
+    results = {}
+    for name in names:
+        bench = BENCHMARKS[name]
+        value = bench.run(scale, repeat)
+        results[name] = {"value": value, "unit": bench.unit, "higher_is_better": bench.higher_is_better}
+        report(f"{name:<24} {value:>14,.1f} {bench.unit}")
+    return results
+
+
+def save_baseline(path, results):
+    data = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path} is not a benchmark baseline")
+    return data["results"]
+
+
+def change(result, base):
+    """Relative change, positive when `result` is better than `base`."""
+    difference = (result["value"] - base["value"]) / base["value"]
+    return difference if result["higher_is_better"] else -difference
+
+
+def regressions(results, baseline, threshold):
+    return [name for name, result in results.items()
+            if name in baseline and change(result, baseline[name]) < -threshold]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmarks and compare them with a baseline.")
+    parser.add_argument("-k", "--select", nargs="+", default=[],
+                        help="only the benchmarks whose name contains one of these")
+    parser.add_argument("--save", help="write the results as a baseline")
+    parser.add_argument("--baseline", help="compare against this baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative regression")
+    parser.add_argument("--scale", type=float, default=1.0, help="amount of work per benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes, the best one counts")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.select or any(part in name for part in args.select)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+
+    results = run(names, args.scale, args.repeat)
+    if args.save:
+        save_baseline(args.save, results)
+    if not baseline:
+        return 0
+
+    print(f"\n{'benchmark':<24} {'baseline':>14} {'now':>14} {'change':>8}")
+    for name, result in results.items():
+        if name in baseline:
+            print(f"{name:<24} {baseline[name]['value']:>14,.1f} {result['value']:>14,.1f} "
+                  f"{change(result, baseline[name]):>+8.1%}")
+    failed = regressions(results, baseline, args.threshold)
+    if failed:
+        print(f"\nRegressed by more than {args.threshold:.0%}: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Games/sec of the lockstep `BatchGame` against one `GameRunner` per game, Max players.
+
+    python -m benchmarks.batch_game --games 10000 1000000
+"""
+import argparse
+import logging
+import time
+
+from logic import GameRunner
+from safari.batch import BatchGame, BatchMax
+from safari.players.strategies import Max
+from safari.stacks.shuffle import init
+from safari.stacks.transitions import get_table
+
+
+def bench_game_runner(n_games):
+    strategies = {i: Max for i in range(4)}
+    start = time.perf_counter()
+    for _ in range(n_games):
+        GameRunner(init(strategies=strategies), log_level=logging.WARNING).run()
+    return n_games / (time.perf_counter() - start)
+
+
+def bench_batch(n_games, seed=0):
+    start = time.perf_counter()
+    BatchGame(n_games, {i: BatchMax() for i in range(4)}, seed=seed).deal().run()
+    return n_games / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--runner-games", type=int, default=2000,
+                        help="GameRunner is timed on this many games, its rate does not depend on the batch size")
+    args = parser.parse_args(argv)
+
+    get_table()
+    runner = bench_game_runner(args.runner_games)
+    print(f"GameRunner:           {runner:>12,.0f} games/s")
+    for n_games in args.games:
+        batch = bench_batch(n_games)
+        print(f"BatchGame({n_games:>9,}): {batch:>12,.0f} games/s ({batch / runner:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
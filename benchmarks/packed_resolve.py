@@ -0,0 +1,75 @@
+"""
+Throughput of `Queue.resolve` on the object model against `packed.resolve`
+and the precomputed transition table.
+
+    python -m benchmarks.packed_resolve --cases 20000
+"""
+import argparse
+import random
+import time
+
+from safari.cards.base import ANIMALS
+from safari.stacks import packed
+from safari.stacks.transitions import get_table
+
+ALL_CARDS = [packed.encode(value, player) for value in ANIMALS for player in range(4)]
+
+
+def make_cases(n_cases, seed=0):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(n_cases):
+        cards = rng.sample(ALL_CARDS, rng.randint(1, 5))
+        cases.append((tuple(cards[:-1]), cards[-1]))
+    return cases
+
+
+def bench_objects(cases, repeat=5):
+    objects = [(packed.to_queue(queue), packed.unpack_card(card)) for queue, card in cases]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for queue, card in objects:
+            queue.resolve(card)
+        best = min(best, time.perf_counter() - start)
+    return len(cases) / best
+
+
+def bench_packed(cases, repeat=5):
+    resolve = packed.resolve
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for queue, card in cases:
+            resolve(queue, card)
+        best = min(best, time.perf_counter() - start)
+    return len(cases) / best
+
+
+def bench_table(cases, repeat=5):
+    resolve = get_table().resolve
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for queue, card in cases:
+            resolve(queue, card)
+        best = min(best, time.perf_counter() - start)
+    return len(cases) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    cases = make_cases(args.cases)
+    objects = bench_objects(cases)
+    packed_rate = bench_packed(cases)
+    table_rate = bench_table(cases)
+    print(f"Queue.resolve:  {objects:>12,.0f} resolves/s")
+    print(f"packed.resolve: {packed_rate:>12,.0f} resolves/s ({packed_rate / objects:.1f}x)")
+    print(f"table lookup:   {table_rate:>12,.0f} resolves/s ({table_rate / objects:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
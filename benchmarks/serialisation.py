@@ -0,0 +1,120 @@
+"""
+Throughput of GameState serialisation: the former `asdict`-based JSON path
+against the codec's JSON, lean JSON and binary encodings and `load_many`.
+
+    python -m benchmarks.serialisation --games 50
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict
+
+from logic import GameRunner
+from safari import codec
+from safari.cards.base import ANIMALS
+from safari.game_state import STRATEGY_MAP, GameState
+from safari.players.strategies import Max
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import ANIMAL_MAPPING, init
+
+
+def legacy_to_json(state):
+    """`GameState.to_json` as it was before the codec."""
+    def serialize_card(card):
+        return {"animal": card.value, "player": card.player}
+
+    data = asdict(state)
+    for key in ('cards_in_bar', 'cards_in_thrash', 'queue', 'old_queue'):
+        data[key] = [serialize_card(card) for card in getattr(state, key)]
+    data['table'] = {
+        str(player): {
+            'hand': [serialize_card(card) for card in info['hand']],
+            'deck': [serialize_card(card) for card in info['deck']],
+            'thrown': [serialize_card(card) for card in info['thrown']],
+            'strategy': info['strategy'].__class__.__name__,
+            'finished': info['finished'],
+        }
+        for player, info in data['table'].items()
+    }
+    return json.dumps(data)
+
+
+def legacy_from_json(json_str):
+    """`GameState.from_json` as it was before the codec."""
+    data = json.loads(json_str)
+
+    def deserialize_card(card_data):
+        return ANIMAL_MAPPING[ANIMALS(card_data['animal'])](card_data['player'])
+
+    for key in ('cards_in_bar', 'cards_in_thrash'):
+        data[key] = [deserialize_card(card) for card in data[key]]
+    for key in ('queue', 'old_queue'):
+        data[key] = Queue([deserialize_card(card) for card in data[key]])
+    data['table'] = {
+        int(player): {
+            'hand': [deserialize_card(card) for card in info['hand']],
+            'deck': [deserialize_card(card) for card in info['deck']],
+            'thrown': [deserialize_card(card) for card in info['thrown']],
+            'strategy': STRATEGY_MAP[info['strategy']](),
+            'finished': info['finished'],
+        }
+        for player, info in data['table'].items()
+    }
+    return GameState(**data)
+
+
+def make_states(n_games):
+    states = []
+    for _ in range(n_games):
+        runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING)
+        while not runner.game_state.finished:
+            runner.play_turn()
+            state = GameState.from_json(runner.game_state.to_json())
+            # The legacy encoder cannot serialise queue evaluations.
+            state.last_queue_evaluation = None
+            states.append(state)
+    return states
+
+
+def rate(function, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    states = make_states(args.games)
+    encoded = {
+        "legacy json": (legacy_to_json, legacy_from_json),
+        "json": (codec.to_json, codec.from_json),
+        "lean json": (codec.to_lean_json, codec.from_lean_json),
+        "binary": (codec.to_bytes, codec.from_bytes),
+    }
+    print(f"{len(states)} states")
+    for name, (encode, decode) in encoded.items():
+        data = [encode(state) for state in states]
+        size = sum(len(d) for d in data) / len(data)
+        print(f"{name:>12}: encode {rate(encode, states):>9,.0f}/s  decode {rate(decode, data):>9,.0f}/s  "
+              f"{size:>6.0f} bytes/state")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "states.bin")
+        GameState.dump_many(states, path)
+        start = time.perf_counter()
+        loaded = GameState.load_many(path)
+        print(f"load_many: {len(loaded) / (time.perf_counter() - start):,.0f} states/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Seeded workloads of the benchmark runner (`python -m benchmarks`).
+
+Every benchmark builds the same inputs on every run and returns one number:
+a rate (higher is better) or a size (lower is better). `scale` multiplies the
+amount of work, rates are the best of `repeat` timed passes.
+"""
+import copy
+import logging
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+from logic import GameRunner
+from safari import codec
+from safari.bots import BotProcess, play_batched
+from safari.cards.base import ANIMALS
+from safari.players.strategies import Max
+from safari.stacks.queue import BAR_QUEUE_LENGTH, Queue
+from safari.stacks.shuffle import ANIMAL_MAPPING, game_rng, init
+
+SEED = 0
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[float, int], float]
+    unit: str
+    higher_is_better: bool = True
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name, unit, higher_is_better=True):
+    def register(run):
+        BENCHMARKS[name] = Benchmark(name, run, unit, higher_is_better)
+        return run
+    return register
+
+
+def best_rate(function, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def _play(args):
+    queue, card = args
+    action = card.action
+    if hasattr(card, 'resolve_action'):
+        action = card.resolve_action(queue) or action
+    return action(queue)
+
+
+def action_cases(animal, n_cases, seed=SEED):
+    """Queues of 0-4 cards of the other players, all sizes equally often, with `animal` of player 0 played."""
+    rng = random.Random(f"{seed}:{animal.name}")
+    others = [card_class(player) for card_class in ANIMAL_MAPPING.values() for player in (1, 2, 3)]
+    card = ANIMAL_MAPPING[animal](0)
+    return [(Queue(rng.sample(others, i % BAR_QUEUE_LENGTH)), card) for i in range(n_cases)]
+
+
+def _action_benchmark(animal):
+    def run(scale, repeat):
+        return best_rate(_play, action_cases(animal, max(int(2000 * scale), 1)), repeat)
+    benchmark(f"action.{animal.name.lower()}", "actions/s")(run)
+
+
+for _animal in sorted(ANIMALS, key=int):
+    _action_benchmark(_animal)
+
+
+def seeded_runner(index, history_length=None):
+    table = init({player: Max for player in range(4)}, rng=game_rng(SEED, index))
+    return GameRunner(table, log_level=logging.WARNING, history_length=history_length)
+
+
+@benchmark("game.max_vs_max", "games/s")
+def game_throughput(scale, repeat):
+    n_games = max(int(200 * scale), 1)
+    best = float("inf")
+    for _ in range(repeat):
+        runners = [seeded_runner(index) for index in range(n_games)]
+        start = time.perf_counter()
+        for runner in runners:
+            runner.run()
+        best = min(best, time.perf_counter() - start)
+    return n_games / best
+
+
+def seeded_states(n_games):
+    states = []
+    for index in range(n_games):
+        runner = seeded_runner(index)
+        while not runner.game_state.finished:
+            runner.play_turn()
+            states.append(codec.from_json(codec.to_json(runner.game_state)))
+    return states
+
+
+@benchmark("codec.to_json", "states/s")
+def to_json_throughput(scale, repeat):
+    return best_rate(codec.to_json, seeded_states(max(int(20 * scale), 1)), repeat)
+
+
+@benchmark("codec.from_json", "states/s")
+def from_json_throughput(scale, repeat):
+    data = [codec.to_json(state) for state in seeded_states(max(int(20 * scale), 1))]
+    return best_rate(codec.from_json, data, repeat)
+
+
+@benchmark("state.clone", "states/s")
+def clone_throughput(scale, repeat):
+    return best_rate(lambda state: state.clone(), seeded_states(max(int(20 * scale), 1)), repeat)
+
+
+@benchmark("state.deepcopy", "states/s")
+def deepcopy_throughput(scale, repeat):
+    return best_rate(copy.deepcopy, seeded_states(max(int(20 * scale), 1)), repeat)
+
+
+@benchmark("state.pickle", "states/s")
+def pickle_throughput(scale, repeat):
+    """Round trips through pickle, what sending a state to a worker process costs."""
+    return best_rate(lambda state: pickle.loads(pickle.dumps(state)), seeded_states(max(int(20 * scale), 1)), repeat)
+
+
+@benchmark("memory.game_log", "KiB", higher_is_better=False)
+def game_log_memory(scale, repeat):
+    """Largest traced peak of `GameRunner.run` over the games, the game log included."""
+    peak = 0
+    for index in range(max(int(20 * scale), 1)):
+        runner = seeded_runner(index)
+        tracemalloc.start()
+        try:
+            log = runner.run()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        del log
+    return peak / 1024
+
+
+def _bot_benchmark(batch_size):
+    def run(scale, repeat):
+        """Decisions per second of a Max bot process in seat 0, the round trips and (de)coding included."""
+        best = 0.0
+        for _ in range(repeat):
+            bot = BotProcess([sys.executable, "-m", "safari.bots", "serve", "--strategy", "Max"])
+            try:
+                # Starts the bot outside of the timing.
+                bot.decide([])
+                bot.stats.seconds = bot.stats.decisions = 0
+                play_batched({0: bot, 1: Max, 2: Max, 3: Max}, max(int(64 * scale), 1), batch_size, SEED)
+            finally:
+                bot.close()
+            best = max(best, bot.stats.decisions_per_second)
+        return best
+    benchmark(f"bots.batch_{batch_size}", "decisions/s")(run)
+
+
+for _batch_size in (1, 8, 64):
+    _bot_benchmark(_batch_size)
@@ -0,0 +1,87 @@
+"""
+Per-turn bookkeeping of `GameState`: the former dict-of-lists table (deck.pop(0),
+list.remove with `Card.__eq__`, scanning every player and the whole bar) against
+the column-wise `Table` and the running scores of `ScorePile`.
+
+    python -m benchmarks.zones --games 200
+"""
+import argparse
+import time
+
+from safari.game_state import GameState
+from safari.players.strategies import Max
+from safari.stacks.shuffle import init
+
+
+class LegacyState:
+    """The bookkeeping methods of `GameState` as they were before `Table`."""
+
+    def __init__(self, table):
+        self.table = table
+        self.cards_in_bar = []
+        self.results = {}
+
+    def remove_card_from_hand(self, player, card):
+        hand = self.table[player]['hand']
+        hand.remove(card)
+
+    def draw_card(self, player):
+        deck = self.table[player]['deck']
+        hand = self.table[player]['hand']
+        if deck:
+            hand.append(deck.pop(0))
+
+    def mark_player_finished(self, player):
+        self.table[player]['finished'] = True
+
+    def is_game_finished(self):
+        return all(self.table[p]['finished'] for p in self.table)
+
+    def update_results(self):
+        self.results = {}
+        for winner in self.cards_in_bar:
+            self.results[winner.player] = self.results.get(winner.player, 0) + winner.point_value
+
+
+def turns(states):
+    """The bookkeeping `GameRunner` does every turn, with the scores also read every turn."""
+    for state in states:
+        for turn in range(40):
+            player = turn % 4
+            hand = state.table[player]['hand']
+            card = hand[turn % len(hand)]
+            state.remove_card_from_hand(player, card)
+            state.draw_card(player)
+            if not state.table[player]['hand']:
+                state.mark_player_finished(player)
+            state.cards_in_bar.append(card)
+            state.is_game_finished()
+            state.update_results()
+
+
+def as_dicts(table):
+    return {player: {key: (list(value) if isinstance(value, list) else value) for key, value in zone.items()}
+            for player, zone in table.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    tables = [init({i: Max for i in range(4)}) for _ in range(args.games)]
+    legacy = [LegacyState(as_dicts(table)) for table in tables]
+    states = [GameState(players=list(range(4)), n_players=4, table=as_dicts(table)) for table in tables]
+
+    start = time.perf_counter()
+    turns(legacy)
+    legacy_rate = 40 * args.games / (time.perf_counter() - start)
+    start = time.perf_counter()
+    turns(states)
+    rate = 40 * args.games / (time.perf_counter() - start)
+    print(f"dict of lists: {legacy_rate:>12,.0f} turns/s")
+    print(f"Table:         {rate:>12,.0f} turns/s ({rate / legacy_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import random
 import pyxel
 from safari.frontend.draw_handler import DrawingHandler
-from safari.frontend.constants import SCREEN_WIDTH, SCREEN_HEIGHT, ASSET_W_BIG, ASSET_H_BIG
+from safari.frontend.constants import SCREEN_WIDTH, SCREEN_HEIGHT
 from safari.frontend.frontend import TableCard
-from safari.frontend import constants as cst
+from safari.frontend.layout import BAR_PILE_POS, HAND_Y, QUEUE_X, QUEUE_Y, THRASH_PILE_POS, card_at, row_x
 from safari.frontend.ui_state import UIStateEnum, UIState
 from safari.stacks.shuffle import init, ANIMAL_MAPPING
 from safari.players.strategies import Max, Player
@@ -22,8 +22,6 @@ PLAYER_START_POSITIONS = {
 
 # New constants for animation
 ANIMATION_SPEED = 2
-BAR_PILE_POS = (10, 10)
-THRASH_PILE_POS = (SCREEN_WIDTH - 10 - ASSET_W_BIG, 10)
 
 
 class App:
@@ -34,8 +32,8 @@ class App:
         pyxel.load("assets.pyxres")
         self.ui_state = UIState()
         self.drawing_handler = DrawingHandler()
-        self.bar_pile_count = 0
-        self.thrash_pile_count = 0
+        # Chameleon and parrot targets of the card being played, used when its animation ends.
+        self.pending_targets = (None, None)
         logger.info("Application initialized, starting game loop")
         pyxel.run(self.update, self.draw)
 
@@ -98,11 +96,11 @@ class App:
         self.ui_state.update_table_cards(new_queue)
 
     def on_card_to_bar(self, card, owner=None):
-        self.bar_pile_count += 1
+        self.ui_state.bar_pile_count += 1
         self.ui_state.animating_cards.remove(card)
 
     def on_card_to_thrash(self, card, owner=None):
-        self.thrash_pile_count += 1
+        self.ui_state.thrash_pile_count += 1
         self.ui_state.animating_cards.remove(card)
 
     def update(self):
@@ -148,32 +146,42 @@ class App:
             elif 120 <= y <= 140:
                 self.ui_state.change_state(UIStateEnum.MENU)
 
-    def handle_chameleon_click(self, x, y):
-        start_x = (SCREEN_WIDTH - (5 * cst.ASSET_W_BIG + 4 * 4)) // 2
-        y_pos = 60
+    def clicked_table_card(self, x, y):
+        """Queue position of the table card at (x, y), None when there is none."""
+        return card_at(QUEUE_X[:len(self.ui_state.table_cards)], QUEUE_Y, x, y)
 
-        for i, card in enumerate(self.ui_state.table_cards):
-            card_x = start_x + i * (cst.ASSET_W_BIG + 4)
-            if card_x <= x <= card_x + cst.ASSET_W_BIG and y_pos <= y <= y_pos + cst.ASSET_H_BIG:
-                self.perform_chameleon_action(card)
-                self.ui_state.change_state(UIStateEnum.GAME)
+    def handle_chameleon_click(self, x, y):
+        target = self.clicked_table_card(x, y)
+        if target is None:
+            self.ui_state.clear_choices()
+            self.ui_state.change_state(UIStateEnum.GAME)
+            return
+        copied = self.ui_state.table_cards[target].card_value
+        if copied == ANIMALS.CHAMELEON:
+            return
+        self.ui_state.chameleon_target = target
+        if copied == ANIMALS.PARROT:
+            # The copied parrot throws out an animal too, pick it next.
+            self.ui_state.set_parrot(self.ui_state.chameleon)
+            self.ui_state.change_state(UIStateEnum.PARROT)
+            return
+        self.play_with_targets(self.ui_state.chameleon, target)
 
-                return
+    def handle_parrot_click(self, x, y):
+        target = self.clicked_table_card(x, y)
+        if target is None:
+            self.ui_state.clear_choices()
+            self.ui_state.change_state(UIStateEnum.GAME)
+            return
+        self.play_with_targets(self.ui_state.parrot, self.ui_state.chameleon_target, target)
 
+    def play_with_targets(self, card, chameleon_target=None, parrot_target=None):
+        logger.info(f"Playing {card.card_value} with chameleon target {chameleon_target}, parrot target {parrot_target}")
+        self.pending_targets = (chameleon_target, parrot_target)
+        self.play_card(card, card.x, card.y)
+        self.ui_state.clear_choices()
         self.ui_state.change_state(UIStateEnum.GAME)
 
-    def handle_parrot_click(self, x, y):
-        # Implement parrot click logic here
-        pass
-
-    def perform_chameleon_action(self, card):
-        print(f"Chameleon action performed on card {card.card_value}")
-        chameleon = self.ui_state.chameleon
-        chameleon.action = ANIMAL_MAPPING[card.card_value].action
-        self.play_card(self.ui_state.chameleon, self.ui_state.chameleon.x, self.ui_state.chameleon.y)
-        self.ui_state.clear_chameleon()
-        self.update_game_state()
-
     def update_game(self):
         if self.game_runner.game_state.finished:
             self.ui_state.change_state(UIStateEnum.END)
@@ -188,30 +196,31 @@ class App:
                 logger.debug("Waiting for player move")
 
     def execute_ai_move(self):
-        card = self.game_runner.get_played_card()
+        card, *targets = self.game_runner.get_played_move()
         if card is None:
             self.game_runner.game_state.mark_player_finished(self.game_runner.game_state.current_player)
         else:
+            self.pending_targets = tuple(targets)
             self.ui_state.start_animation()
             self.animate_card_move(card.value, card.player)
 
     def handle_player_move(self):
         if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
             x, y = pyxel.mouse_x, pyxel.mouse_y
-            hand_start_x = (SCREEN_WIDTH - (
-                    len(self.ui_state.hand_cards) * cst.ASSET_W_BIG + (len(self.ui_state.hand_cards) - 1) * 4)) // 2
-            hand_y = SCREEN_HEIGHT - cst.ASSET_H_BIG - 5
-
-            for i, card in enumerate(self.ui_state.hand_cards):
-                card_x = hand_start_x + i * (cst.ASSET_W_BIG + 4)
-                if card_x <= x <= card_x + cst.ASSET_W_BIG and hand_y <= y <= hand_y + cst.ASSET_H_BIG:
-                    print(f"Player clicked on card {card.card_value} at ({card_x}, {hand_y})")
-                    if card.card_value == ANIMALS.CHAMELEON:
-                        self.ui_state.change_state(UIStateEnum.CHAMELEON)
-                        self.ui_state.set_chameleon(card)
-                    else:
-                        self.play_card(card, card_x, hand_y)
-                    break
+            hand_xs = row_x(len(self.ui_state.hand_cards))
+            i = card_at(hand_xs, HAND_Y, x, y)
+            if i is not None:
+                card, card_x = self.ui_state.hand_cards[i], hand_xs[i]
+                print(f"Player clicked on card {card.card_value} at ({card_x}, {HAND_Y})")
+                copyable = [other for other in self.ui_state.table_cards if other.card_value != ANIMALS.CHAMELEON]
+                if card.card_value == ANIMALS.CHAMELEON and copyable:
+                    self.ui_state.change_state(UIStateEnum.CHAMELEON)
+                    self.ui_state.set_chameleon(card)
+                elif card.card_value == ANIMALS.PARROT and self.ui_state.table_cards:
+                    self.ui_state.change_state(UIStateEnum.PARROT)
+                    self.ui_state.set_parrot(card)
+                else:
+                    self.play_card(card, card_x, HAND_Y)
     def animate_queue_changes(self, old_queue, new_queue):
         old_cards = {(card.value, card.player): card for card in old_queue}
         new_cards = {(card.value, card.player): card for card in new_queue}
@@ -230,14 +239,12 @@ class App:
                 self.ui_state.add_animating_card(table_card)
 
         # Animate moved cards
-        queue_start_x = (SCREEN_WIDTH - (5 * cst.ASSET_W_BIG + 4 * 4)) // 2
-        queue_y = 60
         for i, card in enumerate(new_queue):
             if card in moved_cards:
                 table_card = self.find_table_card(card)
                 if table_card:
-                    new_x = queue_start_x + i * (cst.ASSET_W_BIG + 4)
-                    table_card.start_move(table_card.x, table_card.y, new_x, queue_y, self.on_card_animation_complete)
+                    table_card.start_move(table_card.x, table_card.y, QUEUE_X[i], QUEUE_Y,
+                                          self.on_card_animation_complete)
                     self.ui_state.add_animating_card(table_card)
 
         self.ui_state.update_table_cards([self.find_table_card(card) for card in new_queue if self.find_table_card(card)])
@@ -259,7 +266,9 @@ class App:
         print(f"Card {card.card_value} animation complete")
         if owner is None:
             owner = self.player_index
-        self.game_runner.update_game_state(ANIMAL_MAPPING[card.card_value](owner))
+        chameleon_target, parrot_target = self.pending_targets
+        self.pending_targets = (None, None)
+        self.game_runner.update_game_state(ANIMAL_MAPPING[card.card_value](owner), chameleon_target, parrot_target)
         self.update_game_state()
         self.ui_state.stop_animation()
         self.ui_state.remove_animating_card(card)
@@ -272,8 +281,7 @@ class App:
         self.ui_state.add_animating_card(card)
 
     def get_table_target_position(self):
-        start_x = (SCREEN_WIDTH - (5 * cst.ASSET_W_BIG + 4 * 4)) // 2
-        return start_x + len(self.ui_state.table_cards) * (cst.ASSET_W_BIG + 4), 60
+        return QUEUE_X[len(self.ui_state.table_cards)], QUEUE_Y
 
     def update_animations(self):
         for card in self.ui_state.animating_cards:
@@ -285,15 +293,6 @@ class App:
     def draw(self):
         self.drawing_handler.draw(self.ui_state)
 
-        # Draw bar and thrash piles
-        pyxel.rect(BAR_PILE_POS[0], BAR_PILE_POS[1], ASSET_W_BIG, ASSET_H_BIG, pyxel.COLOR_RED)
-        pyxel.text(BAR_PILE_POS[0] + 2, BAR_PILE_POS[1] + 2, str(self.bar_pile_count), pyxel.COLOR_WHITE)
-
-        pyxel.rect(THRASH_PILE_POS[0], THRASH_PILE_POS[1], ASSET_W_BIG, ASSET_H_BIG, pyxel.COLOR_LIGHT_BLUE)
-        pyxel.text(THRASH_PILE_POS[0] + 2, THRASH_PILE_POS[1] + 2, str(self.thrash_pile_count), pyxel.COLOR_WHITE)
-
-
-
 
 # Run the application
 if __name__ == "__main__":
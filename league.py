@@ -0,0 +1,188 @@
+import argparse
+import itertools
+import math
+import multiprocessing
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Type
+
+from safari.game_state import STRATEGY_MAP
+from safari.players.strategies import Player, Strategy
+from safari.search import rewards
+from safari.utils.helpers import create_logger
+from tournament import _init_worker, play_game
+
+logger = create_logger("League")
+
+# Every way to seat two copies of each strategy of a pairing, 0 is the first one.
+SEATINGS = [(0, 1, 0, 1), (1, 0, 1, 0), (0, 0, 1, 1), (1, 1, 0, 0), (0, 1, 1, 0), (1, 0, 0, 1)]
+
+
+def expected_score(elo_difference):
+    return 1 / (1 + 10 ** (-elo_difference / 400))
+
+
+@dataclass
+class EloRatings:
+    """Incremental Elo, updated after every game with the share of the win each side took."""
+    k: float = 16.0
+    initial: float = 1500.0
+    ratings: Dict[str, float] = field(default_factory=dict)
+
+    def __getitem__(self, name):
+        return self.ratings.get(name, self.initial)
+
+    def update(self, a, b, score):
+        change = self.k * (score - expected_score(self[a] - self[b]))
+        self.ratings[a] = self[a] + change
+        self.ratings[b] = self[b] - change
+
+
+@dataclass
+class SPRT:
+    """
+    Sequential probability ratio test of "the first strategy is `elo` points
+    stronger" against "it is `elo` points weaker". A game scores the share of
+    the win taken by the first strategy, shared wins count as fractions.
+    `decision` is +1 or -1 once the log-likelihood ratio leaves the bounds.
+    """
+    elo: float = 30.0
+    alpha: float = 0.05
+    beta: float = 0.05
+    llr: float = 0.0
+
+    def __post_init__(self):
+        p0, p1 = expected_score(-self.elo), expected_score(self.elo)
+        self._win = math.log(p1 / p0)
+        self._loss = math.log((1 - p1) / (1 - p0))
+        self.lower = math.log(self.beta / (1 - self.alpha))
+        self.upper = math.log((1 - self.beta) / self.alpha)
+
+    def add(self, score):
+        self.llr += score * self._win + (1 - score) * self._loss
+
+    @property
+    def decision(self):
+        if self.llr >= self.upper:
+            return 1
+        if self.llr <= self.lower:
+            return -1
+        return 0
+
+
+@dataclass
+class Pairing:
+    first: str
+    second: str
+    games: int = 0
+    score: float = 0.0
+    decision: int = 0
+
+    @property
+    def winner(self) -> Optional[str]:
+        return {1: self.first, -1: self.second}.get(self.decision)
+
+
+@dataclass
+class LeagueResult:
+    ratings: EloRatings = field(default_factory=EloRatings)
+    pairings: List[Pairing] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def n_games(self):
+        return sum(pairing.games for pairing in self.pairings)
+
+    def table(self):
+        lines = [f"{'rank':>4} {'strategy':>12} {'elo':>7} {'decisions won':>14}"]
+        won = {}
+        for pairing in self.pairings:
+            if pairing.winner:
+                won[pairing.winner] = won.get(pairing.winner, 0) + 1
+        names = {name for pairing in self.pairings for name in (pairing.first, pairing.second)}
+        ranking = sorted(names, key=lambda name: self.ratings[name], reverse=True)
+        for rank, name in enumerate(ranking, 1):
+            lines.append(f"{rank:>4} {name:>12} {self.ratings[name]:>7.0f} {won.get(name, 0):>14}")
+        lines.append(f"{'pairing':>25} {'games':>6} {'score':>6} {'result':>12}")
+        for pairing in self.pairings:
+            result = pairing.winner or "undecided"
+            lines.append(f"{pairing.first + ' - ' + pairing.second:>25} {pairing.games:>6} "
+                         f"{pairing.score / max(pairing.games, 1):>6.3f} {result:>12}")
+        lines.append(f"{self.n_games} games in {self.elapsed:.2f}s")
+        return "\n".join(lines)
+
+
+def play_pairing_game(args):
+    """Share of the win taken by the strategy seated as 0 in `seating`."""
+    first, second, seating = args
+    sides = (first, second)
+    results = play_game({seat: sides[side] for seat, side in enumerate(seating)})
+    shares = rewards([results.get(seat, 0) for seat in range(len(seating))])
+    return sum(share for share, side in zip(shares, seating) if side == 0)
+
+
+def _games(first, second, batch, start):
+    return [(first, second, SEATINGS[(start + i) % len(SEATINGS)]) for i in range(batch)]
+
+
+def run_league(strategies: Dict[str, Type[Strategy]], max_games: int = 2000, elo: float = 30.0,
+               confidence: float = 0.95, k: float = 16.0, workers: int = 1) -> LeagueResult:
+    """
+    Play every pairing of `strategies` with rotated seats until its SPRT decides
+    which side is stronger at `confidence`, or `max_games` were played.
+    With several `workers` games are played in batches of `workers`; a pairing
+    still only counts the games up to its decision.
+    """
+    for name, strategy in strategies.items():
+        if issubclass(strategy, Player):
+            raise ValueError(f"{name} is a human player, leagues can only run AI strategies")
+    if not 0.5 < confidence < 1:
+        raise ValueError("confidence must be between 0.5 and 1")
+
+    start = time.perf_counter()
+    result = LeagueResult(ratings=EloRatings(k=k))
+    pool = multiprocessing.Pool(workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        for first, second in itertools.combinations(sorted(strategies), 2):
+            pairing = Pairing(first, second)
+            test = SPRT(elo=elo, alpha=1 - confidence, beta=1 - confidence)
+            while not pairing.decision and pairing.games < max_games:
+                games = _games(strategies[first], strategies[second], min(workers, max_games - pairing.games),
+                               pairing.games)
+                scores = pool.map(play_pairing_game, games) if pool else map(play_pairing_game, games)
+                for score in scores:
+                    pairing.games += 1
+                    pairing.score += score
+                    result.ratings.update(first, second, score)
+                    test.add(score)
+                    pairing.decision = test.decision
+                    if pairing.decision:
+                        break
+            result.pairings.append(pairing)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main(argv: List[str] = None):
+    names = sorted(name for name, strategy in STRATEGY_MAP.items() if not issubclass(strategy, Player))
+    parser = argparse.ArgumentParser(description="Rate strategies against each other with early stopping.")
+    parser.add_argument("-s", "--strategies", nargs="+", default=names, choices=names)
+    parser.add_argument("-n", "--max-games", type=int, default=2000, help="per pairing")
+    parser.add_argument("-c", "--confidence", type=float, default=0.95)
+    parser.add_argument("-e", "--elo", type=float, default=30.0, help="difference the test has to tell apart")
+    parser.add_argument("-k", type=float, default=16.0, help="Elo K factor")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    strategies = {name: STRATEGY_MAP[name] for name in args.strategies}
+    result = run_league(strategies, args.max_games, args.elo, args.confidence, args.k, args.workers)
+    logger.info(f"League results:\n{result.table()}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
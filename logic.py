@@ -1,16 +1,23 @@
+import logging
 import random
-from safari.game_state import GameState
+from safari.events import TurnEvent
+from safari.game_state import GameState, Move
+from safari.history import GameHistory
 from safari.utils.helpers import create_logger
 from safari.stacks.shuffle import init, ANIMAL_MAPPING
 from safari.players.strategies import Max, Player
-
-BAR_QUEUE_LENGTH = 5
+from safari.stacks.queue import BAR_QUEUE_LENGTH
 
 
 class GameRunner:
-    def __init__(self, table):
-        self.logger = create_logger("Safari", level=20)
-        self.game_log = []
+    def __init__(self, table, log_level=20, history_length=None, observers=()):
+        self.logger = create_logger("Safari", level=log_level)
+        self.observers = list(observers)
+        self.started = False
+        self.verbose = self.logger.isEnabledFor(logging.INFO)
+        # Snapshot per turn, sharing everything the turn did not change.
+        # `history_length` keeps only the last turns, for long batch runs.
+        self.game_log = GameHistory(maxlen=history_length)
         self.game_state = GameState(
             players=list(table.keys()),
             n_players=len(table),
@@ -21,20 +28,25 @@ class GameRunner:
         self.logger.info("Starting new game")
         while not self.game_state.finished:
             self.play_turn()
-            self.game_log.append(self.game_state.to_dict())
+            self.game_log.record(self.game_state)
 
         self.log_results()
         return self.game_log
 
     def play_turn(self):
+        if not self.verbose:
+            self.update_game_state(*self.get_played_move())
+            self.check_game_end()
+            return
+
         self.logger.info(f"Turn {self.game_state.turn_number + 1} - Player {self.game_state.current_player}'s turn")
         self.logger.debug(f"Current queue: {[str(card) for card in self.game_state.queue]}")
 
-        card = self.get_played_card()
-        self.logger.info(f"Player {self.game_state.current_player} played: {card}")
+        move = self.get_played_move()
+        self.logger.info(f"Player {self.game_state.current_player} played: {move.card}")
 
         old_queue = self.game_state.queue.copy()
-        self.update_game_state(card)
+        self.update_game_state(*move)
 
         self.log_queue_changes(old_queue, self.game_state.queue)
         self.check_game_end()
@@ -44,7 +56,8 @@ class GameRunner:
         cards = self.game_state.table[player]
         hand = cards["hand"]
 
-        self.logger.debug(f"Player {player}'s hand: {[str(card) for card in hand]}")
+        if self.verbose:
+            self.logger.debug(f"Player {player}'s hand: {[str(card) for card in hand]}")
 
         if not hand:
             self.logger.warning(f"Player {player}'s hand is empty!")
@@ -53,11 +66,28 @@ class GameRunner:
         if isinstance(cards['strategy'], Player):
             return self.get_human_player_card(hand)
         else:
-            return cards["strategy"].strategy(hand)
+            return cards["strategy"].choose(self.game_state, player)
+
+    def get_played_move(self):
+        """The played card with the chameleon and parrot targets the strategy picks for it."""
+        card = self.get_played_card()
+        if card is None:
+            return Move(card)
+        player = self.game_state.current_player
+        return Move(card, *self.game_state.table[player]['strategy'].targets(self.game_state, player, card))
+
+    def update_game_state(self, card, chameleon_target=None, parrot_target=None):
+        if self.verbose:
+            self.logger.debug(f"Updating game state after playing {card}")
+        if not self.started:
+            self.started = True
+            for observer in self.observers:
+                observer.on_game_start(self.game_state)
+        player = self.game_state.current_player
+        turn_number = self.game_state.turn_number
+        n_bar, n_thrash = len(self.game_state.cards_in_bar), len(self.game_state.cards_in_thrash)
 
-    def update_game_state(self, card):
-        self.logger.debug(f"Updating game state after playing {card}")
-        self.game_state.update_queue(card)
+        dropped = self.game_state.update_queue(card, chameleon_target, parrot_target)
         self.evaluate_queue()
         self.game_state.remove_card_from_hand(self.game_state.current_player, card)
         self.game_state.draw_card(self.game_state.current_player)
@@ -66,12 +96,34 @@ class GameRunner:
         self.game_state.increment_turn()
         self.game_state.next_player()
 
+        if self.observers:
+            self.notify_turn(TurnEvent(
+                turn_number=turn_number,
+                player=player,
+                card=card,
+                chameleon_target=chameleon_target,
+                parrot_target=parrot_target,
+                old_queue=list(self.game_state.old_queue),
+                queue=list(self.game_state.queue),
+                to_bar=self.game_state.cards_in_bar[n_bar:],
+                to_thrash=self.game_state.cards_in_thrash[n_thrash:],
+                dropped=dropped,
+            ))
+
+    def notify_turn(self, event):
+        for observer in self.observers:
+            observer.on_turn(event, self.game_state)
+        if self.game_state.finished:
+            for observer in self.observers:
+                observer.on_game_end(self.game_state)
+
     def evaluate_queue(self):
         if len(self.game_state.queue) == BAR_QUEUE_LENGTH:
             to_winners = self.game_state.queue[:2]
             to_losers = [self.game_state.queue[-1]]
 
-            self.log_queue_evaluation(to_winners, to_losers)
+            if self.verbose:
+                self.log_queue_evaluation(to_winners, to_losers)
             self.game_state.queue = self.game_state.queue[2:BAR_QUEUE_LENGTH - 1]
             self.game_state.cards_in_bar.extend(to_winners)
             self.game_state.cards_in_thrash.extend(to_losers)
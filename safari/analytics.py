@@ -0,0 +1,138 @@
+"""
+Streaming card-success statistics.
+
+`CardAnalytics` is a game observer which follows every played card until it
+enters the bar, is dropped to the thrash or is left in the queue at the end of
+the game, and folds the outcome into running statistics (Welford) keyed by
+(turn number, animal, seat, strategy). Nothing but the cards still in the queue
+is kept between turns, and partial results of parallel workers merge exactly.
+"""
+import csv
+from dataclasses import dataclass
+from typing import Dict, NamedTuple
+
+from safari.events import GameObserver
+
+METRICS = ('bar', 'dropped', 'points')
+
+
+class Key(NamedTuple):
+    turn: int
+    animal: int
+    seat: int
+    strategy: str
+
+
+@dataclass
+class RunningStats:
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if not other.n:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self):
+        """Sample variance."""
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+class CardAnalytics(GameObserver):
+    """
+    For each (turn, animal, seat, strategy): how often the card reaches the bar,
+    how often it is dropped and how many points it brings, with their variances.
+    """
+
+    def __init__(self):
+        self.stats: Dict[Key, Dict[str, RunningStats]] = {}
+        self.n_games = 0
+        self._strategies = {}
+        self._in_queue = {}
+
+    def on_game_start(self, game_state):
+        self._strategies = {player: cards['strategy'].__class__.__name__ for player, cards in game_state.table.items()}
+        self._in_queue = {}
+
+    def on_turn(self, event, game_state):
+        card = event.card
+        self._in_queue[id(card)] = (card, Key(event.turn_number, int(card.value), event.player,
+                                              self._strategies[event.player]))
+        for card in event.to_bar:
+            self._finish(card, bar=True)
+        for card in event.to_thrash:
+            self._finish(card, dropped=True)
+
+    def on_game_end(self, game_state):
+        for card, _ in list(self._in_queue.values()):
+            self._finish(card)
+        self.n_games += 1
+
+    def _finish(self, card, bar=False, dropped=False):
+        _, key = self._in_queue.pop(id(card))
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = {metric: RunningStats() for metric in METRICS}
+        stats['bar'].add(bar)
+        stats['dropped'].add(dropped)
+        stats['points'].add(card.point_value if bar else 0)
+
+    def merge(self, other: "CardAnalytics"):
+        self.n_games += other.n_games
+        for key, theirs in other.stats.items():
+            mine = self.stats.setdefault(key, {metric: RunningStats() for metric in METRICS})
+            for metric in METRICS:
+                mine[metric].merge(theirs[metric])
+        return self
+
+    def rows(self):
+        """One row per key: the key, the count, then mean and variance of every metric."""
+        for key in sorted(self.stats):
+            stats = self.stats[key]
+            row = list(key) + [stats['bar'].n]
+            for metric in METRICS:
+                row += [stats[metric].mean, stats[metric].variance]
+            yield row
+
+    @staticmethod
+    def columns():
+        return list(Key._fields) + ['n'] + [f"{metric}_{part}" for metric in METRICS for part in ('mean', 'var')]
+
+    def to_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns())
+            writer.writerows(self.rows())
+
+    def to_numpy(self):
+        """A structured array with the fields of `columns`."""
+        import numpy as np
+
+        strategy_length = max((len(key.strategy) for key in self.stats), default=1)
+        dtype = [('turn', 'i2'), ('animal', 'i1'), ('seat', 'i1'), ('strategy', f'U{strategy_length}'), ('n', 'i8')]
+        dtype += [(column, 'f8') for column in self.columns()[5:]]
+        return np.array([tuple(row) for row in self.rows()], dtype=dtype)
+
+    def best_by_turn(self, metric='points'):
+        """The animal with the highest mean `metric` at every turn, over all seats and strategies."""
+        totals = {}
+        for key, stats in self.stats.items():
+            n, total = totals.get((key.turn, key.animal), (0, 0.0))
+            totals[key.turn, key.animal] = (n + stats[metric].n, total + stats[metric].mean * stats[metric].n)
+        best = {}
+        for (turn, animal), (n, total) in totals.items():
+            if turn not in best or total / n > best[turn][1]:
+                best[turn] = (animal, total / n)
+        return {turn: best[turn] for turn in sorted(best)}
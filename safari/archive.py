@@ -0,0 +1,392 @@
+"""
+Archive of many games as fixed-width columns in memory-mapped files, with
+secondary indexes for querying.
+
+An archive is a directory:
+
+    manifest.json               games, strategy names, layout
+    games.<column>.bin          one row per game: seed, n_players, n_turns,
+                                strategies (id per seat), scores, winner, deal
+    turns.<column>.bin          MAX_TURNS rows per game: player, card,
+                                chameleon_target, parrot_target, dropped,
+                                repeat_dropped, to_bar
+    index.<name>.{keys,offsets,ids}.npy
+
+Cards use the packed encoding of safari.stacks.packed, EMPTY pads rows, seats
+and turns. `dropped` counts the cards the action of the played card threw out
+of the queue, `repeat_dropped` those the repeating animals threw out after it;
+the card bounced off a full queue is in neither. Both are EMPTY for games built
+from first version record files, which do not tell them apart. An index maps every
+value of a column to the sorted ids of its rows: `strategy.<seat>`,
+`winner` and `score.<seat>` index games, `played` indexes turn rows
+(`game * MAX_TURNS + turn`) by animal.
+
+`ArchiveWriter` has the `write(record)` of `GameRecordWriter`, so a
+`GameRecorder` can fill it straight from `GameRunner`:
+
+    with ArchiveWriter("archive/") as writer:
+        GameRunner(table, observers=[GameRecorder(writer, seed)]).run()
+    archive = Archive("archive/")
+    archive.games(played=ANIMALS.SKUNK, dropped=3)
+    archive.games(winner=2, strategies={0: 'Max'})
+    archive.state(game_id)
+"""
+import argparse
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from safari.game_state import STRATEGY_MAP, GameState, Move
+from safari.players.strategies import Max
+from safari.records import GameRecord, read_records
+from safari.stacks.shuffle import CARDS
+from safari.zones import Table
+
+MANIFEST = 'manifest.json'
+ARCHIVE_VERSION = 2
+MAX_PLAYERS = 4
+MAX_TURNS = 40
+DEAL_SIZE = 12
+EMPTY = 255
+NO_SEED = -1
+
+GAME_COLUMNS = {
+    'seed': (np.int64, ()),
+    'n_players': (np.uint8, ()),
+    'n_turns': (np.uint8, ()),
+    'strategies': (np.uint8, (MAX_PLAYERS,)),
+    'scores': (np.int16, (MAX_PLAYERS,)),
+    'winner': (np.int8, ()),
+    'deal': (np.uint8, (MAX_PLAYERS, DEAL_SIZE)),
+}
+TURN_COLUMNS = {
+    'player': (np.uint8, ()),
+    'card': (np.uint8, ()),
+    'chameleon_target': (np.uint8, ()),
+    'parrot_target': (np.uint8, ()),
+    'dropped': (np.uint8, ()),
+    'repeat_dropped': (np.uint8, ()),
+    'to_bar': (np.uint8, ()),
+}
+
+
+def _column_path(directory, table, column):
+    return os.path.join(directory, f"{table}.{column}.bin")
+
+
+def _index_path(directory, name, part):
+    return os.path.join(directory, f"index.{name}.{part}.npy")
+
+
+def _read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != ARCHIVE_VERSION:
+        raise ValueError(f"{directory} is not a game archive")
+    return manifest
+
+
+def _open_columns(directory, table, columns, n_rows, mode='r'):
+    return {column: np.memmap(_column_path(directory, table, column), dtype=dtype, mode=mode,
+                              shape=(n_rows,) + shape) if n_rows else np.zeros((0,) + shape, dtype=dtype)
+            for column, (dtype, shape) in columns.items()}
+
+
+def _truncate_columns(directory, n_games):
+    """Cuts the column files back to `n_games` games, dropping rows flushed after the manifest was last written."""
+    for table, columns, rows in (('games', GAME_COLUMNS, n_games), ('turns', TURN_COLUMNS, n_games * MAX_TURNS)):
+        for column, (dtype, shape) in columns.items():
+            path = _column_path(directory, table, column)
+            size = rows * np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+
+def _replace(path, write):
+    """Writes `path` through `write(file)` into a temporary file, which then replaces it whole."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_index(directory, name, values):
+    """CSR index of `values`: the sorted row ids of every distinct value."""
+    order = np.argsort(values, kind='stable')
+    keys, starts = np.unique(values[order], return_index=True)
+    for part, array in (('keys', keys), ('offsets', np.append(starts, len(values)).astype(np.int64)),
+                        ('ids', order.astype(np.int64))):
+        _replace(_index_path(directory, name, part), lambda f: np.save(f, array))
+
+
+class ArchiveWriter:
+    """
+    Appends games to the archive in `directory`, a new or an existing one.
+    Rows are buffered `buffer_size` games at a time, the indexes and the
+    manifest are rebuilt on `close`. Rows flushed by a writer which was never
+    closed are not in the manifest and are dropped when the archive is opened
+    again.
+    """
+
+    def __init__(self, directory, buffer_size=4096):
+        self.directory = directory
+        self.buffer_size = buffer_size
+        os.makedirs(directory, exist_ok=True)
+        manifest = _read_manifest(directory)
+        self.n_games = manifest['games'] if manifest else 0
+        self.strategies = manifest['strategies'] if manifest else []
+        _truncate_columns(directory, self.n_games)
+        self._games = []
+        self._turns = []
+
+    def _strategy_id(self, name):
+        if name not in self.strategies:
+            if len(self.strategies) == EMPTY:
+                raise ValueError(f"An archive holds at most {EMPTY} strategies")
+            self.strategies.append(name)
+        return self.strategies.index(name)
+
+    def write(self, record: GameRecord):
+        if len(record.deal) > MAX_PLAYERS or len(record.turns) > MAX_TURNS:
+            raise ValueError(f"An archive holds games of up to {MAX_PLAYERS} players and {MAX_TURNS} turns")
+        game = {column: np.full(shape, EMPTY if dtype == np.uint8 else 0, dtype=dtype)
+                for column, (dtype, shape) in GAME_COLUMNS.items()}
+        game['seed'][...] = NO_SEED if record.seed is None else record.seed
+        game['n_players'][...] = len(record.deal)
+        game['n_turns'][...] = len(record.turns)
+        results = record.results()
+        for player, (hand, deck, thrown) in record.deal.items():
+            cards = hand + deck + thrown
+            game['deal'][player, :len(cards)] = cards
+            game['strategies'][player] = self._strategy_id(record.strategies.get(player, ''))
+            game['scores'][player] = results.get(player, 0)
+        scores = [results.get(player, 0) for player in record.deal]
+        best = max(scores)
+        game['winner'][...] = scores.index(best) if scores.count(best) == 1 else -1
+
+        turns = {column: np.full(MAX_TURNS, EMPTY, dtype=dtype) for column, (dtype, _) in TURN_COLUMNS.items()}
+        for i, turn in enumerate(record.turns):
+            turns['player'][i] = turn.player
+            turns['card'][i] = turn.card
+            turns['chameleon_target'][i] = EMPTY if turn.chameleon_target is None else turn.chameleon_target
+            turns['parrot_target'][i] = EMPTY if turn.parrot_target is None else turn.parrot_target
+            turns['to_bar'][i] = len(turn.to_bar)
+            if turn.dropped is not None:
+                turns['dropped'][i] = turn.dropped
+                # A full queue sends two cards to the bar and bounces one.
+                turns['repeat_dropped'][i] = len(turn.to_thrash) - bool(turn.to_bar) - turn.dropped
+
+        self._games.append(game)
+        self._turns.append(turns)
+        if len(self._games) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._games:
+            return
+        for table, rows in (('games', self._games), ('turns', self._turns)):
+            for column in rows[0]:
+                with open(_column_path(self.directory, table, column), 'ab') as f:
+                    f.write(np.stack([row[column] for row in rows]).tobytes())
+        self.n_games += len(self._games)
+        self._games, self._turns = [], []
+
+    def close(self):
+        self.flush()
+        games = _open_columns(self.directory, 'games', GAME_COLUMNS, self.n_games)
+        turns = _open_columns(self.directory, 'turns', TURN_COLUMNS, self.n_games * MAX_TURNS)
+        for seat in range(MAX_PLAYERS):
+            _write_index(self.directory, f'strategy.{seat}', games['strategies'][:, seat])
+            _write_index(self.directory, f'score.{seat}', games['scores'][:, seat])
+        _write_index(self.directory, 'winner', games['winner'])
+        _write_index(self.directory, 'played', turns['card'] >> 2)
+        manifest = {
+            'version': ARCHIVE_VERSION,
+            'games': self.n_games,
+            'strategies': self.strategies,
+            'max_players': MAX_PLAYERS,
+            'max_turns': MAX_TURNS,
+            'columns': {table: {column: [np.dtype(dtype).str, list(shape)] for column, (dtype, shape) in columns.items()}
+                        for table, columns in (('games', GAME_COLUMNS), ('turns', TURN_COLUMNS))},
+        }
+        # The manifest goes last: until it is replaced, readers see the games of the last one.
+        _replace(os.path.join(self.directory, MANIFEST), lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Index:
+    """
+    Row ids by value. Ids from `n_rows` on are left out: indexes written by a
+    writer which died before its manifest can count rows the archive does not have.
+    """
+
+    def __init__(self, directory, name, n_rows):
+        self.keys, self.offsets, self.ids = (np.load(_index_path(directory, name, part), mmap_mode='r')
+                                             for part in ('keys', 'offsets', 'ids'))
+        self.n_rows = n_rows
+
+    def lookup(self, low, high=None):
+        """Sorted ids of the rows with a value from `low` to `high` (inclusive, `low` only by default)."""
+        high = low if high is None else high
+        first = np.searchsorted(self.keys, low, side='left')
+        last = np.searchsorted(self.keys, high, side='right')
+        if last - first == 1:
+            ids = np.asarray(self.ids[self.offsets[first]:self.offsets[first + 1]])
+        else:
+            ids = np.sort(self.ids[self.offsets[first]:self.offsets[last]])
+        if len(self.ids) > self.n_rows:
+            ids = ids[ids < self.n_rows]
+        return ids
+
+
+Range = Union[int, Tuple[Optional[int], Optional[int]]]
+
+
+class Archive:
+    """A read-only, memory-mapped archive. Games are decoded only when asked for."""
+
+    def __init__(self, directory):
+        manifest = _read_manifest(directory)
+        if manifest is None:
+            raise ValueError(f"{directory} is not a game archive")
+        self.directory = directory
+        self.n_games = manifest['games']
+        self.strategies = manifest['strategies']
+        self.columns = _open_columns(directory, 'games', GAME_COLUMNS, self.n_games)
+        self.turns = {column: values.reshape(self.n_games, MAX_TURNS) for column, values in
+                      _open_columns(directory, 'turns', TURN_COLUMNS, self.n_games * MAX_TURNS).items()}
+        self._indexes = {}
+
+    def __len__(self):
+        return self.n_games
+
+    def index(self, name) -> Index:
+        if name not in self._indexes:
+            n_rows = self.n_games * MAX_TURNS if name == 'played' else self.n_games
+            self._indexes[name] = Index(self.directory, name, n_rows)
+        return self._indexes[name]
+
+    def games(self, strategies: Dict[int, str] = None, winner: int = None, scores: Dict[int, Range] = None,
+              played: int = None, dropped: Range = None) -> np.ndarray:
+        """
+        Sorted ids of the games matching every filter given: the strategy name of
+        seats, the winning seat (-1 for a tie), the points of seats (a value or an
+        inclusive (low, high) range, either end None for open), and a turn which
+        played the animal `played` and whose own action dropped `dropped` cards.
+        """
+        selections = []
+        for seat, name in (strategies or {}).items():
+            if name not in self.strategies:
+                return np.zeros(0, dtype=np.int64)
+            selections.append(self.index(f'strategy.{seat}').lookup(self.strategies.index(name)))
+        if winner is not None:
+            selections.append(self.index('winner').lookup(winner))
+        for seat, points in (scores or {}).items():
+            low, high = points if isinstance(points, tuple) else (points, points)
+            selections.append(self.index(f'score.{seat}').lookup(
+                np.iinfo(np.int16).min if low is None else low, np.iinfo(np.int16).max if high is None else high
+            ))
+        if played is not None or dropped is not None:
+            rows = self.index('played').lookup(int(played)) if played is not None else \
+                np.flatnonzero(self.turns['card'].reshape(-1) != EMPTY)
+            if dropped is not None:
+                low, high = dropped if isinstance(dropped, tuple) else (dropped, dropped)
+                counts = self.turns['dropped'].reshape(-1)[rows]
+                rows = rows[(counts >= (low or 0)) & (counts <= (EMPTY - 1 if high is None else high))]
+            selections.append(np.unique(rows // MAX_TURNS))
+        if not selections:
+            return np.arange(self.n_games)
+        result = selections[0]
+        for selection in selections[1:]:
+            result = np.intersect1d(result, selection, assume_unique=True)
+        return result
+
+    def record(self, game_id) -> Tuple[Optional[int], Dict[int, str]]:
+        """Seed of the deal and strategy name per seat of a game."""
+        seed = int(self.columns['seed'][game_id])
+        n_players = int(self.columns['n_players'][game_id])
+        names = {seat: self.strategies[self.columns['strategies'][game_id, seat]] for seat in range(n_players)}
+        return (None if seed == NO_SEED else seed), names
+
+    def state(self, game_id, turn: int = None) -> GameState:
+        """
+        The `GameState` of a game after `turn` turns (at the end by default),
+        dealt again and played through `GameState.apply`. Strategies missing
+        from STRATEGY_MAP sit as Max.
+        """
+        _, names = self.record(game_id)
+        deal = self.columns['deal'][game_id]
+        table = Table()
+        for seat, name in names.items():
+            cards = [CARDS[card] for card in deal[seat] if card != EMPTY]
+            table[seat] = {'hand': cards[:4], 'deck': cards[4:10], 'thrown': cards[10:],
+                           'strategy': STRATEGY_MAP.get(name, Max)(), 'finished': False}
+        state = GameState(players=list(table), n_players=len(table), table=table)
+        n_turns = int(self.columns['n_turns'][game_id])
+        turns = self.turns
+        for i in range(n_turns if turn is None else min(turn, n_turns)):
+            chameleon_target, parrot_target = turns['chameleon_target'][game_id, i], turns['parrot_target'][game_id, i]
+            state.apply(Move(CARDS[turns['card'][game_id, i]],
+                             None if chameleon_target == EMPTY else int(chameleon_target),
+                             None if parrot_target == EMPTY else int(parrot_target)))
+        return state
+
+    def states(self, game_ids: Iterable[int], turn: int = None) -> Iterator[GameState]:
+        for game_id in game_ids:
+            yield self.state(int(game_id), turn)
+
+
+def build(records_path, directory) -> Archive:
+    """Adds the games of a `GameRecordWriter` file to the archive in `directory`."""
+    with ArchiveWriter(directory) as writer:
+        for record in read_records(records_path):
+            writer.write(record)
+    return Archive(directory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query game archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="add the games of a record file")
+    build_parser.add_argument("records")
+    build_parser.add_argument("directory")
+    query_parser = commands.add_parser("query", help="print the ids of matching games")
+    query_parser.add_argument("directory")
+    query_parser.add_argument("--strategy", nargs="+", default=[], metavar="SEAT=NAME")
+    query_parser.add_argument("--winner", type=int)
+    query_parser.add_argument("--played", help="animal name, e.g. SKUNK")
+    query_parser.add_argument("--dropped", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        archive = build(args.records, args.directory)
+        print(f"{len(archive)} games in {args.directory}")
+        return archive
+    from safari.cards.base import ANIMALS
+
+    archive = Archive(args.directory)
+    strategies = {int(seat): name for seat, name in (item.split("=", 1) for item in args.strategy)}
+    played = ANIMALS[args.played.upper()] if args.played else None
+    ids = archive.games(strategies=strategies, winner=args.winner, played=played, dropped=args.dropped)
+    print(f"{len(ids)} of {len(archive)} games")
+    print(" ".join(str(game_id) for game_id in ids))
+    return ids
+
+
+if __name__ == "__main__":
+    main()
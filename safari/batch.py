@@ -0,0 +1,200 @@
+"""
+Lockstep simulator which plays N games at once on NumPy arrays.
+
+Every player has 10 cards and plays one per turn, so all games last exactly
+10 * n_players turns and can advance together: turn t is played by seat
+t % n_players in every game. Cards use the packed encoding of
+safari.stacks.packed (-1 marks an empty slot) and the queue is resolved by a
+vectorised lookup into the precomputed transition table.
+"""
+import numpy as np
+
+from safari.cards.base import ANIMALS
+from safari.stacks.packed import CHAMELEON, PARROT, encode
+from safari.stacks.queue import BAR_QUEUE_LENGTH
+from safari.stacks.shuffle import ANIMAL_MAPPING
+from safari.stacks.transitions import HEADER, INVALID, MAX_QUEUE, N_ANIMALS, QUEUE_OFFSET, RECORD_SIZE, SLOT_OFFSET, \
+    SLOTS_PER_QUEUE, get_table
+
+HAND_SIZE = 4
+DECK_SIZE = 6
+EMPTY = -1
+
+# Indexed by packed card.
+POINTS = np.zeros(64, dtype=np.int16)
+for _value, _card_class in ANIMAL_MAPPING.items():
+    POINTS[encode(_value, 0):encode(_value, 0) + 4] = _card_class.point_value
+
+
+class BatchStrategy:
+    """
+    Picks the moves of one seat in all games in one call.
+    Returns the hand slot to play per game, optionally together with the chameleon
+    and parrot targets per game (None keeps the default choices).
+    """
+
+    def choose(self, game, player):
+        raise NotImplementedError
+
+
+class BatchMax(BatchStrategy):
+    """Vectorised `Max`: play the highest animal in the hand."""
+
+    def choose(self, game, player):
+        return (game.hands[:, player] >> 2).argmax(axis=1)
+
+
+class BatchRandom(BatchStrategy):
+    """A uniformly random card of the hand."""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def choose(self, game, player):
+        weights = self.rng.random((game.n_games, HAND_SIZE)) * (game.hands[:, player] != EMPTY)
+        return weights.argmax(axis=1)
+
+
+class BatchGame:
+    def __init__(self, n_games, strategies, seed=None, table=None):
+        self.n_games = n_games
+        self.n_players = len(strategies)
+        self.strategies = strategies
+        self.turn_number = 0
+        self.rng = np.random.default_rng(seed)
+        self.table = table if table is not None else np.frombuffer(
+            get_table().buffer, dtype=np.uint8, offset=HEADER.size
+        ).reshape(-1, RECORD_SIZE)
+
+        shape = (n_games, self.n_players)
+        self.queue = np.full((n_games, BAR_QUEUE_LENGTH), EMPTY, dtype=np.int8)
+        self.queue_length = np.zeros(n_games, dtype=np.int8)
+        self.hands = np.full(shape + (HAND_SIZE,), EMPTY, dtype=np.int8)
+        self.decks = np.full(shape + (DECK_SIZE,), EMPTY, dtype=np.int8)
+        self.deck_position = np.zeros(shape, dtype=np.int8)
+        self.bar = np.zeros(shape, dtype=np.int8)
+        self.thrash = np.zeros(shape, dtype=np.int8)
+        self.scores = np.zeros(shape, dtype=np.int16)
+        # Bitmask of the animal values each player has played.
+        self.played = np.zeros(shape, dtype=np.int16)
+        self._games = np.arange(n_games)
+
+    def deal(self):
+        animals = np.array(list(ANIMALS), dtype=np.int8)
+        for player in range(self.n_players):
+            cards = (animals << 2 | player)[self.rng.random((self.n_games, len(animals))).argsort(axis=1)]
+            self.hands[:, player] = cards[:, :HAND_SIZE]
+            self.decks[:, player] = cards[:, HAND_SIZE:HAND_SIZE + DECK_SIZE]
+        return self
+
+    @classmethod
+    def from_tables(cls, tables, strategies, table=None):
+        """Start from deals made by `safari.stacks.shuffle.init`, one table per game."""
+        game = cls(len(tables), strategies, table=table)
+        for i, players in enumerate(tables):
+            for player, cards in players.items():
+                game.hands[i, player, :len(cards['hand'])] = [c.value << 2 | c.player for c in cards['hand']]
+                game.decks[i, player, :len(cards['deck'])] = [c.value << 2 | c.player for c in cards['deck']]
+        return game
+
+    @property
+    def n_turns(self):
+        return self.n_players * (HAND_SIZE + DECK_SIZE)
+
+    @property
+    def finished(self):
+        return self.turn_number >= self.n_turns
+
+    @property
+    def current_player(self):
+        return self.turn_number % self.n_players
+
+    def run(self):
+        while not self.finished:
+            self.play_turn()
+        return self.scores
+
+    def play_turn(self):
+        player = self.current_player
+        choice = self.strategies[player].choose(self, player)
+        chameleon_targets = parrot_targets = None
+        if isinstance(choice, tuple):
+            choice, chameleon_targets, parrot_targets = choice
+        played = self.hands[self._games, player, choice]
+        self.played[:, player] |= np.left_shift(1, played.astype(np.int16) >> 2)
+
+        self.update_queue(played, chameleon_targets, parrot_targets)
+        self.evaluate_queue()
+        self.draw_cards(player, choice)
+        self.turn_number += 1
+
+    def transition_index(self, played, chameleon_targets=None, parrot_targets=None):
+        """Vectorised `transitions.slot_index` for every game."""
+        values = self.queue[:, :MAX_QUEUE].astype(np.int64) >> 2
+        filled = np.arange(MAX_QUEUE) < self.queue_length[:, None]
+        index = np.zeros(self.n_games, dtype=np.int64)
+        for position in range(MAX_QUEUE):
+            index = np.where(filled[:, position], index * N_ANIMALS + values[:, position] - 1, index)
+        index = (np.asarray(QUEUE_OFFSET)[self.queue_length] + index) * SLOTS_PER_QUEUE
+
+        played_values = played.astype(np.int64) >> 2
+        slot = np.asarray(SLOT_OFFSET)[played_values]
+        if parrot_targets is None:
+            parrot_targets = np.zeros(self.n_games, dtype=np.int64)
+        elif ((parrot_targets < 0) | (parrot_targets >= MAX_QUEUE)).any():
+            raise ValueError("Parrot target out of range")
+        if chameleon_targets is not None and ((chameleon_targets < 0) | (chameleon_targets >= MAX_QUEUE)).any():
+            raise ValueError("Chameleon target out of range")
+        if chameleon_targets is None:
+            can_copy = filled & (values != CHAMELEON)
+            chameleon_targets = np.where(can_copy.any(axis=1), can_copy.argmax(axis=1), 0)
+        slot += np.where(played_values == CHAMELEON, chameleon_targets * 4 + parrot_targets, 0)
+        slot += np.where(played_values == PARROT, parrot_targets, 0)
+        return index + slot
+
+    def update_queue(self, played, chameleon_targets=None, parrot_targets=None):
+        records = self.table[self.transition_index(played, chameleon_targets, parrot_targets)]
+        if (records[:, 0] == INVALID).any():
+            raise ValueError("Invalid chameleon or parrot target")
+
+        cards = self.queue.copy()
+        cards[self._games, self.queue_length] = played
+        slots = np.arange(BAR_QUEUE_LENGTH)
+
+        new_length = records[:, 0].astype(np.int8)
+        new_queue = np.take_along_axis(cards, records[:, 1:6].astype(np.intp), axis=1)
+        self.queue = np.where(slots < new_length[:, None], new_queue, EMPTY).astype(np.int8)
+        self.queue_length = new_length
+
+        dropped = np.take_along_axis(cards, records[:, 7:12].astype(np.intp), axis=1)
+        dropped_mask = slots < records[:, 6:7]
+        games = np.broadcast_to(self._games[:, None], dropped.shape)
+        np.add.at(self.thrash, (games[dropped_mask], dropped[dropped_mask] & 3), 1)
+
+    def evaluate_queue(self):
+        full = self.queue_length == BAR_QUEUE_LENGTH
+        if not full.any():
+            return
+        games = self._games[full]
+        for position in (0, 1):
+            winners = self.queue[full, position]
+            np.add.at(self.bar, (games, winners & 3), 1)
+            np.add.at(self.scores, (games, winners & 3), POINTS[winners])
+        np.add.at(self.thrash, (games, self.queue[full, BAR_QUEUE_LENGTH - 1] & 3), 1)
+
+        self.queue[full, :2] = self.queue[full, 2:BAR_QUEUE_LENGTH - 1]
+        self.queue[full, 2:] = EMPTY
+        self.queue_length[full] = 2
+
+    def draw_cards(self, player, choice):
+        position = self.deck_position[:, player]
+        can_draw = position < DECK_SIZE
+        drawn = self.decks[self._games, player, np.minimum(position, DECK_SIZE - 1)]
+        self.hands[self._games, player, choice] = np.where(can_draw, drawn, EMPTY)
+        self.deck_position[:, player] += can_draw
+
+    def winners(self):
+        """Winning seat per game, -1 when the best score is shared."""
+        best = self.scores.max(axis=1, keepdims=True)
+        tied = (self.scores == best).sum(axis=1) > 1
+        return np.where(tied, -1, self.scores.argmax(axis=1))
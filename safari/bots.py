@@ -0,0 +1,266 @@
+"""
+Strategies running as separate, long-lived processes ("bots").
+
+The engine talks to a bot over its stdin/stdout with JSON lines. One request
+carries the decisions of many concurrent games, so a bot costs one round trip
+per batch instead of one per move:
+
+    -> {"batch": 7, "requests": [[player, "<base64 codec.to_bytes(state)>"], ...]}
+    <- {"batch": 7, "decisions": [[index, chameleon_target, parrot_target], ...]}
+
+`index` is the position of the played card in the hand, the targets are null
+for the default choices. A bot which does not answer within the timeout, answers
+garbage or dies is restarted (up to `max_restarts` times) and the decisions it
+owed are played by `Max`, as are single illegal decisions.
+
+`python -m safari.bots serve --strategy ISMCTS` serves any strategy of
+STRATEGY_MAP as a bot, `play` runs games with bot seats:
+
+    python -m safari.bots play --bot "python -m safari.bots serve --strategy ISMCTS" \\
+        --seats Bot Max Max Max --games 200 --batch-size 32
+"""
+import argparse
+import base64
+import json
+import os
+import select
+import shlex
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+from safari import codec
+from safari.game_state import STRATEGY_MAP, GameState, Move
+from safari.players.strategies import Max, Strategy, strategy_max
+from safari.stacks.shuffle import game_rng, init
+from safari.utils.helpers import create_logger
+
+logger = create_logger("Bots")
+
+BOT = 'Bot'
+
+
+def encode_request(batch: int, requests) -> bytes:
+    """`requests` are (game state, player) pairs."""
+    encoded = [[player, base64.b64encode(codec.to_bytes(state)).decode()] for state, player in requests]
+    return json.dumps({"batch": batch, "requests": encoded}, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_request(line):
+    data = json.loads(line)
+    return data["batch"], [(codec.from_bytes(base64.b64decode(state))[0], player)
+                           for player, state in data["requests"]]
+
+
+def serve(strategy: Strategy, stdin=None, stdout=None):
+    """The bot side: answer batches from `stdin` until it closes."""
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    for line in stdin:
+        batch, requests = decode_request(line)
+        decisions = []
+        for state, player in requests:
+            hand = state.table[player]['hand']
+            card = strategy.choose(state, player)
+            index = next(i for i, held in enumerate(hand) if held is card)
+            decisions.append([index, *strategy.targets(state, player, card)])
+        stdout.write(json.dumps({"batch": batch, "decisions": decisions}, separators=(",", ":")).encode() + b"\n")
+        stdout.flush()
+
+
+@dataclass
+class BotStats:
+    batches: int = 0
+    decisions: int = 0
+    fallbacks: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    restarts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def decisions_per_second(self):
+        return self.decisions / self.seconds if self.seconds else 0.0
+
+
+class BotProcess:
+    """
+    One bot process, started on the first batch. `decide` returns a decision per
+    request, None for the ones the bot failed to give.
+    """
+
+    def __init__(self, command: Union[str, Sequence[str]], timeout: float = 10.0, max_restarts: int = 3,
+                 name: str = BOT):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        # Named like the strategy classes in tournament tables.
+        self.__name__ = name
+        self.stats = BotStats()
+        self._process: Optional[subprocess.Popen] = None
+        self._buffer = b""
+        self._batch = 0
+        self._starts = 0
+
+    def _start(self):
+        if self._starts > self.max_restarts:
+            return False
+        self.stats.restarts += self._starts > 0
+        self._starts += 1
+        self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._buffer = b""
+        return True
+
+    def _readline(self, deadline):
+        fd = self._process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                raise ConnectionError("The bot closed its output")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+    def decide(self, requests) -> List[Optional[list]]:
+        """`requests` are (game state, player) pairs."""
+        start = time.perf_counter()
+        self.stats.batches += 1
+        self.stats.decisions += len(requests)
+        try:
+            if self._process is None and not self._start():
+                return [None] * len(requests)
+            self._batch += 1
+            self._process.stdin.write(encode_request(self._batch, requests))
+            self._process.stdin.flush()
+            reply = json.loads(self._readline(time.monotonic() + self.timeout))
+            if reply.get("batch") != self._batch or len(reply["decisions"]) != len(requests):
+                raise ValueError("The bot answered another batch")
+            return reply["decisions"]
+        except TimeoutError:
+            self.stats.timeouts += 1
+            logger.warning(f"{self.__name__} did not answer within {self.timeout}s")
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            self.stats.failures += 1
+            logger.warning(f"{self.__name__} failed: {error!r}")
+        finally:
+            self.stats.seconds += time.perf_counter() - start
+        self.close()
+        return [None] * len(requests)
+
+    def close(self):
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+
+def _move(state, decision) -> Optional[Move]:
+    """The move of a bot decision, None when it is not a legal one."""
+    hand = state.table[state.current_player]['hand']
+    try:
+        index, chameleon_target, parrot_target = decision
+        move = Move(hand[index], chameleon_target, parrot_target)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if not 0 <= index < len(hand):
+        return None
+    if (chameleon_target, parrot_target) != (None, None) and move not in state.legal_moves():
+        return None
+    return move
+
+
+def play_batched(seats: Dict[int, Union[type, BotProcess]], n_games: int, batch_size: int = 64,
+                 seed: int = 0) -> List[Dict[int, int]]:
+    """
+    Results of `n_games` games, game i dealt with `game_rng(seed, i)`. Up to
+    `batch_size` games are played side by side, and every turn the decisions
+    of all of them which wait for the same bot go to it as one batch. Seats
+    with a strategy class are played in this process.
+    """
+    # Bot seats are dealt (and fall back) as Max.
+    strategies = {seat: Max if isinstance(strategy, BotProcess) else strategy for seat, strategy in seats.items()}
+    results: List[Optional[Dict[int, int]]] = [None] * n_games
+    active = []
+    started = 0
+    while active or started < n_games:
+        while len(active) < batch_size and started < n_games:
+            table = init(strategies, rng=game_rng(seed, started))
+            active.append((started, GameState(players=list(table), n_players=len(table), table=table)))
+            started += 1
+
+        waiting: Dict[BotProcess, list] = {}
+        for game in active:
+            state = game[1]
+            seat = seats[state.current_player]
+            if isinstance(seat, BotProcess):
+                waiting.setdefault(seat, []).append(state)
+            else:
+                state.apply(state.choose_move())
+        for bot, states in waiting.items():
+            decisions = bot.decide([(state, state.current_player) for state in states])
+            for state, decision in zip(states, decisions):
+                move = _move(state, decision) if decision is not None else None
+                if move is None:
+                    bot.stats.fallbacks += 1
+                    move = Move(strategy_max(state.table[state.current_player]['hand']))
+                state.apply(move)
+
+        for index, state in [game for game in active if game[1].finished]:
+            results[index] = dict(state.results)
+        active = [game for game in active if not game[1].finished]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a strategy as a bot, or play games against bots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("-s", "--strategy", default="Max", choices=sorted(STRATEGY_MAP))
+    play_parser = commands.add_parser("play")
+    play_parser.add_argument("--bot", required=True, help="command starting the bot")
+    play_parser.add_argument("-s", "--seats", nargs="+", default=[BOT, "Max", "Max", "Max"],
+                             choices=sorted(STRATEGY_MAP) + [BOT])
+    play_parser.add_argument("-n", "--games", type=int, default=100)
+    play_parser.add_argument("-b", "--batch-size", type=int, default=64)
+    play_parser.add_argument("--timeout", type=float, default=10.0, help="seconds per batch")
+    play_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(STRATEGY_MAP[args.strategy]())
+        return None
+
+    from tournament import TournamentResult
+
+    bot = BotProcess(args.bot, timeout=args.timeout)
+    seats = {seat: bot if name == BOT else STRATEGY_MAP[name] for seat, name in enumerate(args.seats)}
+    start = time.perf_counter()
+    try:
+        results = play_batched(seats, args.games, args.batch_size, args.seed)
+    finally:
+        bot.close()
+    result = TournamentResult(seed=args.seed)
+    for game_results in results:
+        result.add_game(seats, game_results)
+    result.elapsed = time.perf_counter() - start
+    logger.info(f"Results:\n{result.table()}\n{bot.stats.decisions} bot decisions in {bot.stats.batches} "
+                f"batches ({bot.stats.decisions_per_second:.0f}/s), {bot.stats.fallbacks} fallbacks")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -3,31 +3,78 @@ from enum import Enum
 from safari.cards import NAMES, PLAYERS, SHORT_NAMES
 
 
-class Card:
+class CardType(type):
+    """
+    Interns the cards: `Lion(0)` is always the same object, there is exactly one
+    card per animal and owner. Nothing in a game allocates cards.
+    """
+
+    def __call__(cls, player):
+        card = cls._interned.get(player)
+        if card is None:
+            card = cls._interned[player] = super().__call__(player)
+        return card
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._interned = {}
+
+
+class Card(metaclass=CardType):
+    """
+    An immutable card. `id` is `value << 2 | player`, the packed form of
+    safari/stacks/packed.py, and it is all `==` and `hash` look at.
+    """
+    __slots__ = ('player', 'id', 'name', 'short_name', 'long_name', '_str')
+
     value: int
     point_value: int
     last_action: dict
     repeating_action: bool = False
 
     def __init__(self, player):
-        self.player = player
-        self.name = NAMES[self.__class__.__name__]
-        self.short_name = SHORT_NAMES[self.__class__.__name__] + PLAYERS[self.player]
-        self.long_name = f'{self.name} {self.value} {PLAYERS[self.player]} ' \
-                         f'({self.point_value}pt)' \
-                         f'{" - repeating" if self.repeating_action else ""}'
+        name = NAMES[self.__class__.__name__]
+        set_slot = object.__setattr__
+        set_slot(self, 'player', player)
+        set_slot(self, 'id', self.value << 2 | player)
+        set_slot(self, 'name', name)
+        set_slot(self, 'short_name', SHORT_NAMES[self.__class__.__name__] + PLAYERS[player])
+        set_slot(self, 'long_name', f'{name} {self.value} {PLAYERS[player]} '
+                                    f'({self.point_value}pt)'
+                                    f'{" - repeating" if self.repeating_action else ""}')
+        set_slot(self, '_str', f'{name} ({self.value}) {PLAYERS[player]} ')
 
     def action(self, queue):
         raise NotImplementedError
 
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self!r} is shared by every game, cards cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self!r} is shared by every game, cards cannot be changed")
+
     def __str__(self):
-        return f'{self.name} ({self.value}) {PLAYERS[self.player]} '
+        return self._str
 
     def __repr__(self):
         return f'{self.__class__.__name__}({self.player})'
 
     def __eq__(self, other):
-        return (self.name == other.name) & (self.player == other.player)
+        if isinstance(other, Card):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return self.id
+
+    def __reduce__(self):
+        return self.__class__, (self.player,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
 
 class ANIMALS(int, Enum):
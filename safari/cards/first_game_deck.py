@@ -1,5 +1,9 @@
 from safari.cards.base import ANIMALS, Card
-from safari.stacks.queue import Queue
+from safari.stacks.queue import Queue, animal_mask
+
+# The animals stopping a hippo, and a croc.
+HIPPO_STOPS = animal_mask(ANIMALS.ZEBRA, ANIMALS.LION, ANIMALS.HIPPO)
+CROC_STOPS = HIPPO_STOPS | animal_mask(ANIMALS.CROC)
 
 
 class Monkey(Card):
@@ -9,6 +13,7 @@ class Monkey(Card):
         - hippo & cric goes away
     """
 
+    __slots__ = ()
     value = ANIMALS.MONKEY
     point_value = 3
 
@@ -16,12 +21,13 @@ class Monkey(Card):
         dropped = []
         monkeys = queue.find_indices_of(ANIMALS.MONKEY)
         if monkeys:
-            queue = Queue([self] + [queue.pop(i) for i in reversed(monkeys)] + queue)
+            others = [card for card in queue if card.value != ANIMALS.MONKEY]
+            queue = Queue([self] + [queue[i] for i in reversed(monkeys)] + others)
             dropped += queue.drop_card_values(ANIMALS.HIPPO)
             dropped += queue.drop_card_values(ANIMALS.CROC)
 
         else:
-            queue.append(self)
+            queue = queue + [self]
 
         return queue, dropped
 
@@ -32,6 +38,7 @@ class Lion(Card):
     If there are monkeys in the queue, throw them out.
     """
 
+    __slots__ = ()
     value = ANIMALS.LION
     point_value = 2
 
@@ -41,6 +48,7 @@ class Lion(Card):
         if lions:
             dropped = [self]
         else:
+            queue = queue.copy()
             dropped += queue.drop_card_values(ANIMALS.MONKEY)
             queue = [self] + queue
         return Queue(queue), dropped
@@ -52,6 +60,7 @@ class Hippo(Card):
     Go to the strt of the queue, unless there is Lion, Zebra, or Hippo in front of you.
     """
 
+    __slots__ = ()
     value = ANIMALS.HIPPO
     point_value = 2
     repeating_action = True
@@ -60,25 +69,14 @@ class Hippo(Card):
         dropped = []
         rest = []
         if self in queue:
-            rest = Queue(queue[queue.index(self) + 1 :])
-            queue = Queue(queue[: queue.index(self)])
-
-        stopping_animals = sorted(
-            queue.find_indices_of(ANIMALS.ZEBRA)
-            + queue.find_indices_of(ANIMALS.LION)
-            + queue.find_indices_of(ANIMALS.HIPPO)
-        )
-        if stopping_animals:
-            queue = (
-                queue[: stopping_animals[-1] + 1]
-                + [self]
-                + queue[stopping_animals[-1] + 1 :]
-            )
-        else:
-            queue = [self] + queue
-        queue = queue + rest
+            i = queue.index(self)
+            rest = queue[i + 1:]
+            queue = queue[:i]
 
-        return Queue(queue), dropped
+        stop = queue.after_last_of(HIPPO_STOPS)
+        queue = queue[:stop] + [self] + queue[stop:] + rest
+
+        return queue, dropped
 
 
 class Croc(Card):
@@ -88,6 +86,7 @@ class Croc(Card):
     (Smaller, but not Zebra.)
     """
 
+    __slots__ = ()
     value = ANIMALS.CROC
     point_value = 3
     repeating_action = True
@@ -96,24 +95,15 @@ class Croc(Card):
         dropped = []
         rest = []
         if self in queue:
-            rest = Queue(queue[queue.index(self) + 1 :])
-            queue = Queue(queue[: queue.index(self)])
-
-        stopping_animals = sorted(
-            queue.find_indices_of(ANIMALS.ZEBRA)
-            + queue.find_indices_of(ANIMALS.LION)
-            + queue.find_indices_of(ANIMALS.HIPPO)
-            + queue.find_indices_of(ANIMALS.CROC)
-        )
-        if stopping_animals:
-            dropped += queue[stopping_animals[-1] + 1 :]
-            queue = queue[: stopping_animals[-1] + 1] + [self]
-        else:
-            dropped = queue
-            queue = [self]
+            i = queue.index(self)
+            rest = queue[i + 1:]
+            queue = queue[:i]
 
-        queue = queue + rest
-        return Queue(queue), dropped
+        stop = queue.after_last_of(CROC_STOPS)
+        dropped += queue[stop:]
+        queue = queue[:stop] + [self] + rest
+
+        return queue, dropped
 
 
 class Snake(Card):
@@ -121,12 +111,13 @@ class Snake(Card):
     Sort all cards by their value.
     """
 
+    __slots__ = ()
     value = ANIMALS.SNAKE
     point_value = 2
 
     def action(self, queue: Queue):
         dropped = []
-        queue += [self]
+        queue = queue + [self]
         queue = reversed(sorted(queue, key=lambda x: x.value))
         return Queue(queue), dropped
 
@@ -137,6 +128,7 @@ class Gazelle(Card):
     Jump any animal with lower value in front of you.
     """
 
+    __slots__ = ()
     value = ANIMALS.GAZELLE
     point_value = 3
     repeating_action = True
@@ -145,16 +137,17 @@ class Gazelle(Card):
         dropped = []
         rest = []
         if self in queue:
-            rest = Queue(queue[queue.index(self) + 1 :])
-            queue = Queue(queue[: queue.index(self)])
+            i = queue.index(self)
+            rest = queue[i + 1:]
+            queue = queue[:i]
         if len(queue) == 0:
-            queue += [self]
+            queue = queue + [self]
         else:
             animal_in_front = queue[-1]
             if animal_in_front.value <= self.value:
                 queue = queue[:-1] + [self] + [animal_in_front]
             else:
-                queue += [self]
+                queue = queue + [self]
         queue += rest
 
         return Queue(queue), dropped
@@ -165,6 +158,7 @@ class Zebra(Card):
     Stops action of most animals.
     """
 
+    __slots__ = ()
     value = ANIMALS.ZEBRA
     point_value = 4
 
@@ -180,6 +174,7 @@ class Seal(Card):
     Reverse the queue.
     """
 
+    __slots__ = ()
     value = ANIMALS.SEAL
     point_value = 2
 
@@ -196,27 +191,31 @@ class Chameleon(Card):
     Do one time action of any animal laying in the queue
     """
 
+    __slots__ = ()
     value = ANIMALS.CHAMELEON
     point_value = 3
-    taken_form_of = None
-
-    def __str__(self):
-        desc = super().__str__()
-        desc += "" if self.taken_form_of is None else f" as {self.taken_form_of}"
-        return desc
-
-    def resolve_action(self, queue: Queue):
 
-        classes_in_queue = [
-            i.__class__ for i in queue if not isinstance(i, Chameleon)
-        ]
-        if classes_in_queue:
-            action = lambda x: classes_in_queue[0].action(self, x)
-            self.taken_form_of = classes_in_queue[0].__name__
+    def resolve_action(self, queue: Queue, chameleon_target=None, parrot_target=None):
+        """
+        The action the chameleon takes over, it is not changed by playing it.
+        By default the first animal which is not a chameleon, `chameleon_target`
+        picks the position of another one. Copying a parrot, `parrot_target` is
+        passed on.
+        """
+        if chameleon_target is None:
+            classes_in_queue = [
+                i.__class__ for i in queue if not isinstance(i, Chameleon)
+            ]
+            form = classes_in_queue[0] if classes_in_queue else Zebra
         else:
-            action = lambda x: Zebra.action(self, x)
-
-        self.action = action
+            if not 0 <= chameleon_target < len(queue):
+                raise ValueError(f"Chameleon target {chameleon_target} is not in a queue of {len(queue)}")
+            if isinstance(queue[chameleon_target], Chameleon):
+                raise ValueError("Chameleon cannot copy another chameleon")
+            form = queue[chameleon_target].__class__
+        if issubclass(form, Parrot):
+            return lambda x: Parrot.action(self, x, parrot_target)
+        return lambda x: form.action(self, x)
 
 
 class Kangaroo(Card):
@@ -224,6 +223,7 @@ class Kangaroo(Card):
     Jump two animals
     """
 
+    __slots__ = ()
     value = ANIMALS.KANGAROO
     point_value = 4
 
@@ -242,18 +242,25 @@ class Parrot(Card):
     Parrot itself goes to the last position in the queue.
     """
 
+    __slots__ = ()
     value = ANIMALS.PARROT
     point_value = 4
 
-    def action(self, queue):
+    def action(self, queue, target=None):
+        """`target` is the position of the thrown out animal, the first one by default."""
         dropped = []
+        if target is not None and not 0 <= target < max(len(queue), 1):
+            raise ValueError(f"Parrot target {target} is not in a queue of {len(queue)}")
         if queue:
-            dropped = [queue.pop(0)]
-        queue += [self]
+            target = target or 0
+            dropped = [queue[target]]
+            queue = queue[:target] + queue[target + 1:]
+        queue = queue + [self]
         return queue, dropped
 
-    def resolve_action(self, queue: Queue):
-        ...
+    def resolve_action(self, queue: Queue, chameleon_target=None, parrot_target=None):
+        if parrot_target:
+            return lambda x: self.action(x, parrot_target)
 
 
 class Skunk(Card):
@@ -261,11 +268,13 @@ class Skunk(Card):
     All animals with the two highest values go to the thrash.
     """
 
+    __slots__ = ()
     value = ANIMALS.SKUNK
     point_value = 4
 
     def action(self, queue):
         dropped = []
+        queue = queue.copy()
         card_values = [i.value for i in queue if i.value != ANIMALS.SKUNK]
         unique = sorted(list(set(card_values)))
         if len(unique) <= 2:
@@ -0,0 +1,296 @@
+"""
+Schema-driven serialisation of `GameState`.
+
+Three encodings share one schema:
+
+- `to_json`/`from_json`: today's JSON format, byte for byte, built without
+  `dataclasses.asdict` (which deep-copies every card and strategy).
+- lean JSON: the same fields with cards as packed ints (`value << 2 | player`).
+- binary: length-prefixed byte strings, one byte per card. `dump_many` and
+  `load_many` store many states in one file.
+"""
+import gc
+import json
+import struct
+
+from safari.game_state import STRATEGY_MAP, GameState, QueueEvaluationResult
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import CARDS
+
+MAGIC = b"SBGS\x01"
+LEAN_VERSION = 1
+_STATE_HEADER = struct.Struct("<BBHBB")
+_LENGTH = struct.Struct("<I")
+
+
+def pack(card):
+    return card.value << 2 | card.player
+
+
+def unpack(code):
+    return CARDS[code]
+
+
+def _strategy(name):
+    strategy_class = STRATEGY_MAP.get(name)
+    if not strategy_class:
+        raise ValueError(f"Unknown strategy: {name}")
+    return strategy_class()
+
+
+def _results(results):
+    return {int(player): points for player, points in results.items()}
+
+
+# JSON, today's format
+
+def _card_dict(card):
+    return {"animal": int(card.value), "player": card.player}
+
+
+def _card_from_dict(data):
+    return CARDS[data['animal'] << 2 | data['player']]
+
+
+def _evaluation_dict(evaluation):
+    if evaluation is None:
+        return None
+    return {
+        "to_winners": [_card_dict(card) for card in evaluation.to_winners],
+        "to_losers": [_card_dict(card) for card in evaluation.to_losers],
+        "new_queue": [_card_dict(card) for card in evaluation.new_queue],
+    }
+
+
+def _evaluation_from_dict(data, card):
+    if data is None:
+        return None
+    return QueueEvaluationResult(
+        to_winners=[card(c) for c in data['to_winners']],
+        to_losers=[card(c) for c in data['to_losers']],
+        new_queue=Queue([card(c) for c in data['new_queue']]),
+    )
+
+
+def to_dict(state: GameState, card=_card_dict, evaluation=_evaluation_dict):
+    """JSON-ready dict with the same keys, in the same order, as the dataclass fields."""
+    return {
+        "cards_in_bar": [card(c) for c in state.cards_in_bar],
+        "cards_in_thrash": [card(c) for c in state.cards_in_thrash],
+        "queue": [card(c) for c in state.queue],
+        "old_queue": [card(c) for c in state.old_queue],
+        "players": list(state.players),
+        "current_player": state.current_player,
+        "n_players": state.n_players,
+        "turn_number": state.turn_number,
+        "table": {
+            str(player): {
+                "hand": [card(c) for c in info['hand']],
+                "deck": [card(c) for c in info['deck']],
+                "thrown": [card(c) for c in info['thrown']],
+                "strategy": info['strategy'].__class__.__name__,
+                "finished": info['finished'],
+            }
+            for player, info in state.table.items()
+        },
+        "finished": state.finished,
+        "results": state.results,
+        "last_queue_evaluation": evaluation(state.last_queue_evaluation),
+    }
+
+
+def from_dict(data, card=_card_from_dict):
+    return GameState(
+        cards_in_bar=[card(c) for c in data['cards_in_bar']],
+        cards_in_thrash=[card(c) for c in data['cards_in_thrash']],
+        queue=Queue([card(c) for c in data['queue']]),
+        old_queue=Queue([card(c) for c in data['old_queue']]),
+        players=data['players'],
+        current_player=data['current_player'],
+        n_players=data['n_players'],
+        turn_number=data['turn_number'],
+        table={
+            int(player): {
+                'hand': [card(c) for c in info['hand']],
+                'deck': [card(c) for c in info['deck']],
+                'thrown': [card(c) for c in info['thrown']],
+                'strategy': _strategy(info['strategy']),
+                'finished': info['finished'],
+            }
+            for player, info in data['table'].items()
+        },
+        finished=data['finished'],
+        results=_results(data['results']),
+        last_queue_evaluation=_evaluation_from_dict(data.get('last_queue_evaluation'), card),
+    )
+
+
+def to_json(state: GameState):
+    return json.dumps(to_dict(state))
+
+
+def from_json(json_str):
+    return from_dict(json.loads(json_str))
+
+
+# Lean JSON
+
+def _lean_evaluation(evaluation):
+    if evaluation is None:
+        return None
+    return {
+        "to_winners": [pack(card) for card in evaluation.to_winners],
+        "to_losers": [pack(card) for card in evaluation.to_losers],
+        "new_queue": [pack(card) for card in evaluation.new_queue],
+    }
+
+
+def to_lean_json(state: GameState):
+    data = to_dict(state, card=pack, evaluation=_lean_evaluation)
+    data["version"] = LEAN_VERSION
+    return json.dumps(data, separators=(",", ":"))
+
+
+def from_lean_json(json_str):
+    data = json.loads(json_str)
+    if data.pop("version", None) != LEAN_VERSION:
+        raise ValueError("Not a lean GameState JSON")
+    return from_dict(data, card=unpack)
+
+
+# Binary
+
+def _cards(cards):
+    return bytes([len(cards)]) + bytes([c.value << 2 | c.player for c in cards])
+
+
+def _string(value):
+    data = value.encode()
+    return bytes([len(data)]) + data
+
+
+def to_bytes(state: GameState):
+    evaluation = state.last_queue_evaluation
+    parts = [
+        _STATE_HEADER.pack(state.current_player, state.n_players, state.turn_number,
+                           state.finished | (evaluation is not None) << 1, len(state.table)),
+        _cards(state.cards_in_bar),
+        _cards(state.cards_in_thrash),
+        _cards(state.queue),
+        _cards(state.old_queue),
+        bytes([len(state.players)] + list(state.players)),
+    ]
+    for player, info in state.table.items():
+        parts += [
+            bytes([player, info['finished']]),
+            _string(info['strategy'].__class__.__name__),
+            _cards(info['hand']),
+            _cards(info['deck']),
+            _cards(info['thrown']),
+        ]
+    parts.append(bytes([len(state.results)]))
+    parts += [struct.pack("<BH", player, points) for player, points in state.results.items()]
+    if evaluation is not None:
+        parts += [_cards(evaluation.to_winners), _cards(evaluation.to_losers), _cards(evaluation.new_queue)]
+    return b"".join(parts)
+
+
+def _read_cards(data, offset):
+    n = data[offset]
+    offset += 1
+    return [CARDS[c] for c in data[offset:offset + n]], offset + n
+
+
+def from_bytes(data, offset=0):
+    """Decode one state starting at `offset`, returns the state and the offset after it."""
+    current_player, n_players, turn_number, flags, n_table = _STATE_HEADER.unpack_from(data, offset)
+    offset += _STATE_HEADER.size
+    cards_in_bar, offset = _read_cards(data, offset)
+    cards_in_thrash, offset = _read_cards(data, offset)
+    queue, offset = _read_cards(data, offset)
+    old_queue, offset = _read_cards(data, offset)
+    n = data[offset]
+    players = list(data[offset + 1:offset + 1 + n])
+    offset += 1 + n
+
+    table = {}
+    for _ in range(n_table):
+        player, finished, name_length = data[offset], data[offset + 1], data[offset + 2]
+        offset += 3
+        strategy = _strategy(bytes(data[offset:offset + name_length]).decode())
+        offset += name_length
+        hand, offset = _read_cards(data, offset)
+        deck, offset = _read_cards(data, offset)
+        thrown, offset = _read_cards(data, offset)
+        table[player] = {'hand': hand, 'deck': deck, 'thrown': thrown, 'strategy': strategy,
+                         'finished': bool(finished)}
+
+    results = {}
+    for _ in range(data[offset]):
+        player, points = struct.unpack_from("<BH", data, offset + 1 + 3 * len(results))
+        results[player] = points
+    offset += 1 + 3 * len(results)
+
+    evaluation = None
+    if flags & 2:
+        to_winners, offset = _read_cards(data, offset)
+        to_losers, offset = _read_cards(data, offset)
+        new_queue, offset = _read_cards(data, offset)
+        evaluation = QueueEvaluationResult(to_winners=to_winners, to_losers=to_losers, new_queue=Queue(new_queue))
+
+    state = GameState(
+        cards_in_bar=cards_in_bar,
+        cards_in_thrash=cards_in_thrash,
+        queue=Queue(queue),
+        old_queue=Queue(old_queue),
+        players=players,
+        current_player=current_player,
+        n_players=n_players,
+        turn_number=turn_number,
+        table=table,
+        finished=bool(flags & 1),
+        results=results,
+        last_queue_evaluation=evaluation,
+    )
+    return state, offset
+
+
+def dump_many(states, path):
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        for state in states:
+            data = to_bytes(state)
+            f.write(_LENGTH.pack(len(data)))
+            f.write(data)
+
+
+def load_many(path):
+    """
+    All states of a file written by `dump_many`, or of a file with one
+    `GameState.to_json` document per line.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        return [from_json(line) for line in data.decode().splitlines() if line.strip()]
+
+    states = []
+    view = memoryview(data)
+    offset = len(MAGIC)
+    # Decoding allocates many small objects which all survive, the cyclic
+    # garbage collector would only rescan them over and over.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while offset < len(data):
+            (length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            state, end = from_bytes(view, offset)
+            if end != offset + length:
+                raise ValueError(f"Corrupted state record at byte {offset} of {path}")
+            states.append(state)
+            offset = end
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return states
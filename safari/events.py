@@ -0,0 +1,38 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from safari.cards.base import Card
+
+
+@dataclass
+class TurnEvent:
+    """What one played card changed, as seen by `GameRunner` observers."""
+    turn_number: int
+    player: int
+    card: Card
+    old_queue: List[Card] = field(default_factory=list)
+    queue: List[Card] = field(default_factory=list)
+    to_bar: List[Card] = field(default_factory=list)
+    to_thrash: List[Card] = field(default_factory=list)
+    chameleon_target: Optional[int] = None
+    parrot_target: Optional[int] = None
+    # The cards the action of `card` itself threw out. They come first in
+    # `to_thrash`, followed by those of the repeating animals and the bounced card.
+    dropped: List[Card] = field(default_factory=list)
+
+
+class GameObserver:
+    """
+    Receives the events of a game as they are produced.
+    Observers are passed to `GameRunner(observers=[...])`; the game state they get
+    is live, so anything kept for later has to be copied.
+    """
+
+    def on_game_start(self, game_state):
+        pass
+
+    def on_turn(self, event: TurnEvent, game_state):
+        pass
+
+    def on_game_end(self, game_state):
+        pass
@@ -0,0 +1,118 @@
+"""
+Fixed-size features of game positions for learned policies, computed for a
+whole batch of positions with NumPy.
+
+The row of a position is seen from the player to move ("me"); owners and
+seats are counted from there, seat 0 being me. All features are 0/1 flags or
+small counts stored as uint8:
+
+    queue     5 slots x (12 animals + 4 owners), one-hot, empty slots all zero
+    hand      4 slots x 12 animals, one-hot, in the order of the hand
+    unseen    3 opponents x 12 animals the opponent has not played yet
+    bar       cards in the bar per seat
+    thrash    cards in the thrash per seat
+    turn      turns played so far
+
+The move of a position is the hand slot played, `legal_moves` masks the
+non-empty slots.
+"""
+import numpy as np
+
+from safari.batch import EMPTY, HAND_SIZE
+from safari.stacks.packed import pack_card
+from safari.stacks.queue import BAR_QUEUE_LENGTH
+from safari.stacks.transitions import N_ANIMALS
+
+MAX_PLAYERS = 4
+ALL_ANIMALS = sum(1 << value for value in range(1, N_ANIMALS + 1))
+
+SLOT_FEATURES = N_ANIMALS + MAX_PLAYERS
+QUEUE = slice(0, BAR_QUEUE_LENGTH * SLOT_FEATURES)
+HAND = slice(QUEUE.stop, QUEUE.stop + HAND_SIZE * N_ANIMALS)
+UNSEEN = slice(HAND.stop, HAND.stop + (MAX_PLAYERS - 1) * N_ANIMALS)
+BAR = slice(UNSEEN.stop, UNSEEN.stop + MAX_PLAYERS)
+THRASH = slice(BAR.stop, BAR.stop + MAX_PLAYERS)
+TURN = THRASH.stop
+N_FEATURES = TURN + 1
+LAYOUT = {'queue': QUEUE, 'hand': HAND, 'unseen': UNSEEN, 'bar': BAR, 'thrash': THRASH,
+          'turn': slice(TURN, N_FEATURES)}
+
+
+def encode_arrays(queue, hand, played, bar, thrash, turn_number, player):
+    """
+    Features of n positions given as arrays of packed cards (EMPTY for no card):
+    `queue` (n, 5), the hand of the player to move `hand` (n, 4), the bitmask of
+    the animals every seat has played `played` (n, n_players), the card counts
+    `bar` and `thrash` (n, n_players), `turn_number` and the seat to move
+    `player` (n,) or scalars.
+    """
+    queue = np.asarray(queue, dtype=np.int64)
+    hand = np.asarray(hand, dtype=np.int64)
+    n, n_players = np.shape(bar)
+    if n_players > MAX_PLAYERS:
+        raise ValueError(f"At most {MAX_PLAYERS} players are encoded")
+    player = np.broadcast_to(np.asarray(player, dtype=np.int64), (n,))
+    rows = np.arange(n)
+    features = np.zeros((n, N_FEATURES), dtype=np.uint8)
+
+    filled = queue != EMPTY
+    slot_rows, slots = np.nonzero(filled)
+    cards = queue[filled]
+    base = slots * SLOT_FEATURES
+    features[slot_rows, base + (cards >> 2) - 1] = 1
+    features[slot_rows, base + N_ANIMALS + ((cards & 3) - player[slot_rows]) % n_players] = 1
+
+    filled = hand != EMPTY
+    hand_rows, slots = np.nonzero(filled)
+    features[hand_rows, HAND.start + slots * N_ANIMALS + (hand[filled] >> 2) - 1] = 1
+
+    seats = (player[:, None] + np.arange(n_players)) % n_players
+    unseen = ALL_ANIMALS & ~np.take_along_axis(np.asarray(played, dtype=np.int64), seats[:, 1:], axis=1)
+    bits = (unseen[:, :, None] >> np.arange(1, N_ANIMALS + 1)) & 1
+    features[:, UNSEEN.start:UNSEEN.start + (n_players - 1) * N_ANIMALS] = bits.reshape(n, -1)
+
+    features[:, BAR.start:BAR.start + n_players] = np.take_along_axis(np.asarray(bar), seats, axis=1)
+    features[:, THRASH.start:THRASH.start + n_players] = np.take_along_axis(np.asarray(thrash), seats, axis=1)
+    features[rows, TURN] = turn_number
+    return features
+
+
+def legal_moves(hand):
+    """Playable hand slots of (n, 4) packed hands."""
+    return np.asarray(hand) != EMPTY
+
+
+def encode_game(game, player=None):
+    """Features of every game of a `BatchGame`, seen from `player` (the player to move by default)."""
+    player = game.current_player if player is None else player
+    return encode_arrays(game.queue, game.hands[:, player], game.played, game.bar, game.thrash,
+                         game.turn_number, player)
+
+
+def _packed(cards, size):
+    row = np.full(size, EMPTY, dtype=np.int8)
+    row[:len(cards)] = [pack_card(card) for card in cards]
+    return row
+
+
+def state_arrays(states, players=None):
+    """The arguments of `encode_arrays` for a list of `GameState`s of the same number of players."""
+    players = [state.current_player for state in states] if players is None else players
+    n_players = states[0].n_players
+    shape = (len(states), n_players)
+    queue = np.stack([_packed(state.queue, BAR_QUEUE_LENGTH) for state in states])
+    hand = np.stack([_packed(state.table[player]['hand'], HAND_SIZE) for state, player in zip(states, players)])
+    played, bar, thrash = (np.zeros(shape, dtype=np.int64) for _ in range(3))
+    for i, state in enumerate(states):
+        for cards, counts in ((state.cards_in_bar, bar), (state.cards_in_thrash, thrash), (state.queue, None)):
+            for card in cards:
+                played[i, card.player] |= 1 << card.value
+                if counts is not None:
+                    counts[i, card.player] += 1
+    turn_number = np.array([state.turn_number for state in states])
+    return queue, hand, played, bar, thrash, turn_number, np.asarray(players)
+
+
+def encode_states(states, players=None):
+    """Features of `GameState`s, seen from `players` (the players to move by default)."""
+    return encode_arrays(*state_arrays(states, players))
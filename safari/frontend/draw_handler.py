@@ -1,21 +1,60 @@
 import pyxel
 from safari.frontend import constants as cst
 from safari.frontend.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from safari.frontend.layout import BAR_PILE_POS, HAND_Y, QUEUE_X, QUEUE_Y, THRASH_PILE_POS, card_rect, overlaps, \
+    row_x
 from safari.frontend.ui_state import UIState, UIStateEnum
 from safari.utils.helpers import create_logger
 
 logger = create_logger(__name__)
 N_LOGGING_FRAMES = 60
+# The static board is rendered once into this image bank, which assets.pyxres leaves empty.
+BOARD_BANK = 2
+GAME_STATES = (UIStateEnum.GAME, UIStateEnum.CHAMELEON, UIStateEnum.PARROT)
+
+
 class DrawingHandler:
+    """
+    Draws only what changed: the screen is kept between frames, a frame is
+    redrawn in full when the state, the piles or the cards of the table change,
+    and while cards are animating only the regions they cover are redrawn.
+    """
+
     def __init__(self):
         self.ui_state:UIState = UIState()
+        self.board_rendered = False
+        self.frame_key = None
+        self.animating_rects = []
         logger.debug("DrawingHandler initialized")
 
     def log(self, message):
         if self.ui_state.frame_count % N_LOGGING_FRAMES:
             logger.debug(message)
+
+    def current_frame_key(self):
+        # The cards themselves are kept, not their ids, which could be reused by new cards.
+        ui_state = self.ui_state
+        return (ui_state.current_state, ui_state.bar_pile_count, ui_state.thrash_pile_count,
+                tuple(ui_state.table_cards), tuple(ui_state.hand_cards))
+
     def draw(self, ui_state):
         self.ui_state = ui_state
+        frame_key = self.current_frame_key()
+        animating_cards = self.ui_state.animating_cards
+        if frame_key == self.frame_key and not self.animating_rects and not animating_cards:
+            return
+        if frame_key == self.frame_key and self.ui_state.current_state in GAME_STATES:
+            self.redraw_regions(self.animating_rects)
+        else:
+            self.frame_key = frame_key
+            self.draw_screen()
+
+        for card in animating_cards:
+            card.draw_big()
+        self.animating_rects = [card_rect(card.x, card.y) for card in animating_cards]
+        self.log(f"Drew {len(animating_cards)} animating cards")
+
+    def draw_screen(self):
         pyxel.cls(0)
         draw_handlers = {
             UIStateEnum.MENU: self.draw_menu,
@@ -29,9 +68,30 @@ class DrawingHandler:
         self.log(f"Drawing UI for state: {current_state}")
         draw_handlers.get(current_state, lambda: None)()
 
-        for card in self.ui_state.animating_cards:
-            card.draw_big()
-        self.log(f"Drew {len(self.ui_state.animating_cards)} animating cards")
+    def redraw_regions(self, rects):
+        """Puts the board back under `rects` and redraws the cards and pile counts touching them."""
+        for x, y, w, h in rects:
+            x, y = max(x, 0), max(y, 0)
+            w, h = min(w, SCREEN_WIDTH - x), min(h, SCREEN_HEIGHT - y)
+            if w > 0 and h > 0:
+                pyxel.blt(x, y, BOARD_BANK, x, y, w, h)
+
+        def touched(x, y):
+            return any(overlaps(card_rect(x, y), rect) for rect in rects)
+
+        for (x, y), count in ((BAR_PILE_POS, self.ui_state.bar_pile_count),
+                              (THRASH_PILE_POS, self.ui_state.thrash_pile_count)):
+            if touched(x, y):
+                self.draw_pile_count(x, y, count)
+        for card, x in zip(self.ui_state.hand_cards, row_x(len(self.ui_state.hand_cards))):
+            if touched(x, HAND_Y):
+                card.draw_big(x, HAND_Y)
+        highlight = self.ui_state.current_state != UIStateEnum.GAME
+        for card, x in zip(self.ui_state.table_cards, QUEUE_X):
+            if touched(x, QUEUE_Y):
+                card.draw_big(x, QUEUE_Y)
+                if highlight:
+                    self.highlight_card(x, QUEUE_Y)
 
     def draw_menu(self):
         self.draw_text_centered(35, 30, "Main Menu", pyxel.COLOR_WHITE)
@@ -46,8 +106,9 @@ class DrawingHandler:
     def draw_game(self):
         self.log("Drawing game screen")
         self.draw_background()
+        self.draw_pile_count(*BAR_PILE_POS, self.ui_state.bar_pile_count)
+        self.draw_pile_count(*THRASH_PILE_POS, self.ui_state.thrash_pile_count)
         self.draw_hand_cards()
-        self.draw_table_card_slots()
         self.draw_table_cards()
 
     def draw_game_with_highlight(self):
@@ -62,31 +123,41 @@ class DrawingHandler:
         self.draw_button(30, 90, "Play Again")
         self.draw_button(30, 120, "Menu")
 
+    def render_board(self):
+        """Renders the background, card slots and pile frames into the board image bank."""
+        logger.debug("Rendering the board")
+        board = pyxel.images[BOARD_BANK]
+        board.rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, pyxel.COLOR_DARK_BLUE)
+        for x in QUEUE_X:
+            board.rectb(x, QUEUE_Y, cst.ASSET_W_BIG, cst.ASSET_H_BIG, pyxel.COLOR_WHITE)
+        board.rect(*BAR_PILE_POS, cst.ASSET_W_BIG, cst.ASSET_H_BIG, pyxel.COLOR_RED)
+        board.rect(*THRASH_PILE_POS, cst.ASSET_W_BIG, cst.ASSET_H_BIG, pyxel.COLOR_LIGHT_BLUE)
+        self.board_rendered = True
+
     def draw_background(self):
-        pyxel.rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, pyxel.COLOR_DARK_BLUE)
+        if not self.board_rendered:
+            self.render_board()
+        pyxel.blt(0, 0, BOARD_BANK, 0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
 
-    def draw_hand_cards(self):
-        hand_start_x = (SCREEN_WIDTH - (len(self.ui_state.hand_cards) * cst.ASSET_W_BIG + (len(self.ui_state.hand_cards) - 1) * 4)) // 2
-        hand_y = SCREEN_HEIGHT - cst.ASSET_H_BIG - 5
-        for i, card in enumerate(self.ui_state.hand_cards):
-            card.draw_big(hand_start_x + i * (cst.ASSET_W_BIG + 4), hand_y)
+    @staticmethod
+    def draw_pile_count(x, y, count):
+        pyxel.text(x + 2, y + 2, str(count), pyxel.COLOR_WHITE)
 
-    def draw_table_card_slots(self):
-        self.draw_card_slots((SCREEN_WIDTH - (5 * cst.ASSET_W_BIG + 4 * 4)) // 2, 60, 5)
+    def draw_hand_cards(self):
+        for card, x in zip(self.ui_state.hand_cards, row_x(len(self.ui_state.hand_cards))):
+            card.draw_big(x, HAND_Y)
 
     def draw_table_cards(self):
-        start_x = (SCREEN_WIDTH - (5 * cst.ASSET_W_BIG + 4 * 4)) // 2
-        y = 60
-        for i, card in enumerate(self.ui_state.table_cards):
-            card_x = start_x + i * (cst.ASSET_W_BIG + 4)
-            card.draw_big(card_x, y)
+        for card, x in zip(self.ui_state.table_cards, QUEUE_X):
+            card.draw_big(x, QUEUE_Y)
 
     def highlight_table_cards(self):
-        start_x = (SCREEN_WIDTH - (5 * cst.ASSET_W_BIG + 4 * 4)) // 2
-        y = 60
-        for i in range(len(self.ui_state.table_cards)):
-            card_x = start_x + i * (cst.ASSET_W_BIG + 4)
-            pyxel.rectb(card_x - 1, y - 1, cst.ASSET_W_BIG + 2, cst.ASSET_H_BIG + 2, pyxel.COLOR_YELLOW)
+        for _, x in zip(self.ui_state.table_cards, QUEUE_X):
+            self.highlight_card(x, QUEUE_Y)
+
+    @staticmethod
+    def highlight_card(x, y):
+        pyxel.rectb(x - 1, y - 1, cst.ASSET_W_BIG + 2, cst.ASSET_H_BIG + 2, pyxel.COLOR_YELLOW)
 
     @staticmethod
     def draw_text_centered(x, y, text, color):
@@ -96,9 +167,3 @@ class DrawingHandler:
     def draw_button(x, y, text):
         pyxel.rect(x, y, 60, 20, pyxel.COLOR_RED)
         pyxel.text(x + 10, y + 7, text, pyxel.COLOR_WHITE)
-
-    def draw_card_slots(self, start_x, y, count):
-        self.log(f"Drawing {count} card slots at ({start_x}, {y})")
-        for i in range(count):
-            x = start_x + i * (cst.ASSET_W_BIG + 4)
-            pyxel.rectb(x, y, cst.ASSET_W_BIG, cst.ASSET_H_BIG, pyxel.COLOR_WHITE)
@@ -0,0 +1,46 @@
+"""
+Screen positions of the table. Rows of cards are laid out once per number of
+cards and reused every frame.
+"""
+from functools import lru_cache
+
+from safari.frontend.constants import ASSET_H_BIG, ASSET_W_BIG, SCREEN_HEIGHT, SCREEN_WIDTH
+from safari.stacks.queue import BAR_QUEUE_LENGTH
+
+CARD_GAP = 4
+QUEUE_Y = 60
+HAND_Y = SCREEN_HEIGHT - ASSET_H_BIG - 5
+BAR_PILE_POS = (10, 10)
+THRASH_PILE_POS = (SCREEN_WIDTH - 10 - ASSET_W_BIG, 10)
+
+
+@lru_cache(maxsize=None)
+def row_x(count):
+    """Left edges of `count` big cards centered on the screen."""
+    start_x = (SCREEN_WIDTH - (count * ASSET_W_BIG + (count - 1) * CARD_GAP)) // 2
+    return tuple(start_x + i * (ASSET_W_BIG + CARD_GAP) for i in range(count))
+
+
+QUEUE_X = row_x(BAR_QUEUE_LENGTH)
+
+
+def card_rect(x, y):
+    """Pixels covered by a big card drawn at (x, y), rounded outwards."""
+    x, y = int(x), int(y)
+    return x - 1, y - 1, ASSET_W_BIG + 3, ASSET_H_BIG + 3
+
+
+def overlaps(rect, other):
+    x, y, w, h = rect
+    other_x, other_y, other_w, other_h = other
+    return x < other_x + other_w and other_x < x + w and y < other_y + other_h and other_y < y + h
+
+
+def card_at(xs, y, x_click, y_click):
+    """Index of the big card of the row `xs` at height `y` under the click, None when there is none."""
+    if not y <= y_click <= y + ASSET_H_BIG:
+        return None
+    for i, x in enumerate(xs):
+        if x <= x_click <= x + ASSET_W_BIG:
+            return i
+    return None
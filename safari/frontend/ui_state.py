@@ -23,9 +23,14 @@ class UIState:
     animation_in_progress: bool = False
     last_ai_action_time: float = field(default_factory=time.time)
     chameleon: Optional[TableCard] = None
+    # The card waiting for a parrot target: a parrot, or a chameleon copying one.
+    parrot: Optional[TableCard] = None
+    chameleon_target: Optional[int] = None
     table_cards: List[TableCard] = field(default_factory=list)
     hand_cards: List[TableCard] = field(default_factory=list)
     animating_cards: List[TableCard] = field(default_factory=list)
+    bar_pile_count: int = 0
+    thrash_pile_count: int = 0
     frame_count: int = 0
 
     def __post_init__(self):
@@ -60,6 +65,14 @@ class UIState:
         logger.info("Clearing chameleon card")
         self.chameleon = None
 
+    def set_parrot(self, card: TableCard):
+        logger.info(f"Setting parrot card: {card}")
+        self.parrot = card
+
+    def clear_choices(self):
+        logger.info("Clearing chameleon and parrot choices")
+        self.chameleon = self.parrot = self.chameleon_target = None
+
     def add_animating_card(self, card: TableCard):
         logger.debug(f"Adding animating card: {card}")
         self.animating_cards.append(card)
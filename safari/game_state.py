@@ -1,15 +1,21 @@
-import json
-from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Type, Optional
-from safari.stacks.queue import Queue
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import List, Dict, NamedTuple, Type, Optional
+from safari.stacks.queue import BAR_QUEUE_LENGTH, Queue
 from safari.players.strategies import Player, Max, Strategy  # Import all strategy classes
-from safari.cards.base import Card, ANIMALS
-from safari.stacks.shuffle import ANIMAL_MAPPING
+from safari.players.endgame import Endgame
+from safari.players.ismcts import ISMCTS
+from safari.search import moves_for, targets
+from safari.stacks.shuffle import CARDS
+from safari.cards.base import Card
+from safari.zones import ScorePile, Table
 
 # Create a mapping of strategy names to strategy classes
 STRATEGY_MAP: Dict[str, Type[Strategy]] = {
     'Max': Max,
     'Player': Player,
+    'ISMCTS': ISMCTS,
+    'Endgame': Endgame,
     # Add other strategy classes here
     # 'SomeOtherStrategy': SomeOtherStrategy,
 }
@@ -20,6 +26,30 @@ class QueueEvaluationResult:
     to_losers: List[Card] = field(default_factory=list)
     new_queue: Queue = field(default_factory=Queue)
 
+class Move(NamedTuple):
+    """A card and the choices of playing it, None for the defaults. `search.Move` is the packed form."""
+    card: Card
+    chameleon_target: Optional[int] = None
+    parrot_target: Optional[int] = None
+
+
+class Undo(NamedTuple):
+    """What `GameState.apply` changed, for `GameState.undo`."""
+    player: int
+    card: Card
+    hand_index: int
+    drew: bool
+    was_finished: bool
+    queue: Queue
+    old_queue: Queue
+    n_bar: int
+    n_thrash: int
+    last_queue_evaluation: Optional['QueueEvaluationResult']
+    finished: bool
+    results: Dict[int, int]
+    turn_number: int
+
+
 @dataclass
 class GameState:
     cards_in_bar: List[Card] = field(default_factory=list)
@@ -35,6 +65,27 @@ class GameState:
     results: Dict[int, int] = field(default_factory=dict)
     last_queue_evaluation: Optional[QueueEvaluationResult] = None
 
+    def clone(self) -> 'GameState':
+        """
+        A state to play on without touching this one, much cheaper than a deep copy:
+        cards, strategies, decks and thrown cards are shared, only the lists moves
+        change are copied.
+        """
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.table = self.table.clone()
+        state.cards_in_bar = self.cards_in_bar.copy()
+        state.cards_in_thrash = list(self.cards_in_thrash)
+        state.queue = self.queue.copy()
+        state.old_queue = self.old_queue.copy()
+        state.players = list(self.players)
+        state.results = dict(self.results)
+        return state
+
+    def __reduce__(self):
+        """Pickles cards as their ids (see `CARDS`), a state takes a few hundred bytes instead of a kilobyte."""
+        return _unpack_state, (_pack_state(self),)
+
     def set_queue_evaluation_result(self, to_winners, to_losers, new_queue):
         self.last_queue_evaluation = QueueEvaluationResult(
             to_winners=to_winners,
@@ -43,65 +94,42 @@ class GameState:
         )
 
     def to_json(self):
-        def serialize_card(card):
-            return {
-                "animal": card.value,
-                "player": card.player
-            }
-
-        data = asdict(self)
-        data['cards_in_bar'] = [serialize_card(card) for card in self.cards_in_bar]
-        data['cards_in_thrash'] = [serialize_card(card) for card in self.cards_in_thrash]
-        data['queue'] = [serialize_card(card) for card in self.queue]
-        data['old_queue'] = [serialize_card(card) for card in self.old_queue]
-
-        serialized_table = {}
-        for player, info in data['table'].items():
-            serialized_table[str(player)] = {
-                'hand': [serialize_card(card) for card in info['hand']],
-                'deck': [serialize_card(card) for card in info['deck']],
-                'thrown': [serialize_card(card) for card in info['thrown']],
-                'strategy': info['strategy'].__class__.__name__,
-                'finished': info['finished']
-            }
-        data['table'] = serialized_table
-
-        return json.dumps(data)
+        from safari import codec
+        return codec.to_json(self)
 
     @classmethod
     def from_json(cls, json_str):
-        data = json.loads(json_str)
-
-        def deserialize_card(card_data):
-            return ANIMAL_MAPPING[ANIMALS(card_data['animal'])](card_data['player'])
-
-        data['cards_in_bar'] = [deserialize_card(card) for card in data['cards_in_bar']]
-        data['cards_in_thrash'] = [deserialize_card(card) for card in data['cards_in_thrash']]
-        data['queue'] = Queue([deserialize_card(card) for card in data['queue']])
-        data['old_queue'] = Queue([deserialize_card(card) for card in data['old_queue']])
-
-        deserialized_table = {}
-        for player, info in data['table'].items():
-            strategy_class = STRATEGY_MAP.get(info['strategy'])
-            if not strategy_class:
-                raise ValueError(f"Unknown strategy: {info['strategy']}")
-
-            deserialized_table[int(player)] = {
-                'hand': [deserialize_card(card) for card in info['hand']],
-                'deck': [deserialize_card(card) for card in info['deck']],
-                'thrown': [deserialize_card(card) for card in info['thrown']],
-                'strategy': strategy_class(),
-                'finished': info['finished']
-            }
-        data['table'] = deserialized_table
+        from safari import codec
+        return codec.from_json(json_str)
 
-        return cls(**data)
+    def to_bytes(self):
+        from safari import codec
+        return codec.to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        from safari import codec
+        return codec.from_bytes(data)[0]
 
-    def update_queue(self, card):
+    @staticmethod
+    def dump_many(states, path):
+        from safari import codec
+        codec.dump_many(states, path)
+
+    @staticmethod
+    def load_many(path):
+        """Decode every state of a file written by `dump_many`, or of a JSON-lines file."""
+        from safari import codec
+        return codec.load_many(path)
+
+    def update_queue(self, card, chameleon_target=None, parrot_target=None):
+        """Play `card` on the queue. Returns the cards its own action dropped, not those of the repeating animals."""
         self.old_queue = self.queue.copy()
-        new_queue, dropped = self.queue.resolve(card)
+        new_queue, dropped, repeated = self.queue.resolve_split(card, chameleon_target, parrot_target)
         self.queue = new_queue
         self.cards_in_thrash.extend(dropped)
+        self.cards_in_thrash.extend(repeated)
+        return dropped
 
     def add_winner(self, player):
         self.cards_in_bar.append(player)
@@ -116,29 +144,100 @@ class GameState:
         self.turn_number += 1
 
     def is_game_finished(self):
-        return all(self.table[p]['finished'] for p in self.table)
+        return self.table.all_finished
 
     def update_results(self):
-        self.results = {}
-        for winner in self.cards_in_bar:
-            self.results[winner.player] = self.results.get(winner.player, 0) + winner.point_value
+        self.results = dict(self.cards_in_bar.scores)
 
     def get_player_hand(self, player):
         return self.table[player]['hand']
 
     def remove_card_from_hand(self, player, card):
         hand = self.table[player]['hand']
+        for i, held in enumerate(hand):
+            if held is card:
+                del hand[i]
+                return
         hand.remove(card)
 
     def draw_card(self, player):
-        deck = self.table[player]['deck']
-        hand = self.table[player]['hand']
-        if deck:
-            hand.append(deck.pop(0))
+        self.table.draw(player)
 
     def mark_player_finished(self, player):
         self.table[player]['finished'] = True
 
+    def legal_moves(self, player=None):
+        """Every distinct move of `player` (the current one by default): hand cards x chameleon x parrot targets."""
+        player = self.current_player if player is None else player
+        queue = tuple(card.id for card in self.queue)
+        moves = []
+        for card in self.table[player]['hand']:
+            moves += [Move(card, *targets(queue, move)) for move in moves_for(queue, card.id)]
+        return moves
+
+    def choose_move(self, player=None) -> Optional[Move]:
+        """The move the strategy of `player` (the current one by default) picks, None with an empty hand."""
+        player = self.current_player if player is None else player
+        strategy = self.table[player]['strategy']
+        card = strategy.choose(self, player)
+        if card is None:
+            return None
+        return Move(card, *strategy.targets(self, player, card))
+
+    def apply(self, move: Move) -> Undo:
+        """
+        Play `move` for the current player, the way `GameRunner.update_game_state`
+        does, and return the token `undo` takes it back with. Nothing but the
+        new queue is built: moves are made and taken back in place.
+        """
+        player, card, table = self.current_player, move.card, self.table
+        hand = table.hands[dict.__getitem__(table, player).index]
+        hand_index = next(i for i, held in enumerate(hand) if held is card)
+        undo = Undo(player, card, hand_index, table.deck_size(player) > 0, table[player]['finished'],
+                    self.queue, self.old_queue, len(self.cards_in_bar), len(self.cards_in_thrash),
+                    self.last_queue_evaluation, self.finished, self.results, self.turn_number)
+
+        queue, dropped = self.queue.resolve(card, move.chameleon_target, move.parrot_target)
+        self.old_queue = self.queue
+        self.cards_in_thrash.extend(dropped)
+        if len(queue) == BAR_QUEUE_LENGTH:
+            to_winners, to_losers = queue[:2], [queue[-1]]
+            queue = queue[2:BAR_QUEUE_LENGTH - 1]
+            self.cards_in_bar.extend(to_winners)
+            self.cards_in_thrash.extend(to_losers)
+            self.set_queue_evaluation_result(to_winners, to_losers, queue)
+        else:
+            self.last_queue_evaluation = None
+        self.queue = queue
+
+        del hand[hand_index]
+        table.draw(player)
+        if not hand:
+            table[player]['finished'] = True
+        if table.all_finished:
+            self.finished = True
+            self.update_results()
+        self.turn_number += 1
+        self.current_player = (player + 1) % self.n_players
+        return undo
+
+    def undo(self, undo: Undo):
+        """Take back the move `undo` was returned for. Moves are taken back last first."""
+        table = self.table
+        if undo.drew:
+            table.undraw(undo.player)
+        table.hands[dict.__getitem__(table, undo.player).index].insert(undo.hand_index, undo.card)
+        table[undo.player]['finished'] = undo.was_finished
+        self.cards_in_bar.truncate(undo.n_bar)
+        del self.cards_in_thrash[undo.n_thrash:]
+        self.queue = undo.queue
+        self.old_queue = undo.old_queue
+        self.last_queue_evaluation = undo.last_queue_evaluation
+        self.finished = undo.finished
+        self.results = undo.results
+        self.turn_number = undo.turn_number
+        self.current_player = undo.player
+
     def to_dict(self):
         return {
             'cards_in_bar': self.cards_in_bar,
@@ -156,4 +255,62 @@ class GameState:
 
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+
+def _zone_property(name, zone_class):
+    """
+    Plain dicts and lists are accepted for the table and the bar, on construction
+    or assigned later, and kept as the zones with counters.
+    """
+    attribute = f'_{name}'
+
+    def convert(self, value):
+        self.__dict__[attribute] = value if isinstance(value, zone_class) else zone_class(value)
+
+    # A C getter, the table is read on every move.
+    return property(attrgetter(attribute), convert)
+
+
+# After the dataclass is built, its __init__ assigns through the properties.
+GameState.table = _zone_property('table', Table)
+GameState.cards_in_bar = _zone_property('cards_in_bar', ScorePile)
+
+
+def _ids(cards):
+    return bytes(card.id for card in cards)
+
+
+def _cards(ids):
+    return [CARDS[i] for i in ids]
+
+
+def _pack_state(state):
+    table = state.table
+    zones = tuple(
+        (player, _ids(table.hands[zone.index]), _ids(table.decks[zone.index]), table.cursors[zone.index],
+         _ids(table.thrown[zone.index]), table.strategies[zone.index], table.finished[zone.index])
+        for player, zone in dict.items(table)
+    )
+    evaluation = state.last_queue_evaluation
+    if evaluation is not None:
+        evaluation = _ids(evaluation.to_winners), _ids(evaluation.to_losers), _ids(evaluation.new_queue)
+    return (_ids(state.cards_in_bar), _ids(state.cards_in_thrash), _ids(state.queue), _ids(state.old_queue),
+            tuple(state.players), state.current_player, state.n_players, state.turn_number, zones,
+            state.finished, state.results, evaluation)
+
+
+def _unpack_state(packed):
+    bar, thrash, queue, old_queue, players, current_player, n_players, turn_number, zones, finished, results, \
+        evaluation = packed
+    table = Table({player: {'hand': _cards(hand), 'deck': _cards(deck), 'thrown': _cards(thrown),
+                            'strategy': strategy, 'finished': player_finished}
+                   for player, hand, deck, _, thrown, strategy, player_finished in zones})
+    table.cursors = [zone[3] for zone in zones]
+    if evaluation is not None:
+        evaluation = QueueEvaluationResult(Queue(_cards(evaluation[0])), _cards(evaluation[1]),
+                                           Queue(_cards(evaluation[2])))
+    return GameState(cards_in_bar=ScorePile(_cards(bar)), cards_in_thrash=_cards(thrash), queue=Queue(_cards(queue)),
+                     old_queue=Queue(_cards(old_queue)), players=list(players), current_player=current_player,
+                     n_players=n_players, turn_number=turn_number, table=table, finished=finished,
+                     results=dict(results), last_queue_evaluation=evaluation)
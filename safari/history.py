@@ -0,0 +1,224 @@
+"""
+Immutable per-turn history of a game with structural sharing.
+
+Consecutive snapshots share everything that did not change during the turn:
+the bar and the thrash only ever grow, so every snapshot is a prefix view on one
+append-only pile, and a player zone (hand, deck, finished) is only rebuilt for
+the player whose cards moved. Memory therefore grows with the number of
+changes, not with turns x size of the state.
+"""
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, Tuple
+
+from safari.zones import Table
+
+
+class Pile(Sequence):
+    """The first `length` cards of an append-only list shared by many snapshots."""
+    __slots__ = ('_cards', '_length')
+
+    def __init__(self, cards, length):
+        self._cards = cards
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._cards[:self._length][index])
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Pile index out of range")
+        return self._cards[index]
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self):
+        return f"Pile({list(self)})"
+
+
+class _PileRecorder:
+    def __init__(self):
+        self.cards = []
+
+    def view(self, live):
+        known = len(self.cards)
+        if len(live) < known or (known and live[known - 1] is not self.cards[-1]):
+            # The live list was rewound or replaced, older snapshots keep the old pile.
+            self.cards = list(live)
+        else:
+            self.cards.extend(live[known:])
+        return Pile(self.cards, len(live))
+
+
+@dataclass(frozen=True)
+class PlayerSnapshot:
+    hand: Tuple
+    deck: Tuple
+    thrown: Tuple
+    finished: bool
+    strategy: object
+
+    def to_dict(self):
+        return {
+            'hand': self.hand,
+            'deck': self.deck,
+            'thrown': self.thrown,
+            'strategy': self.strategy,
+            'finished': self.finished,
+        }
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    turn_number: int
+    current_player: int
+    queue: Tuple
+    old_queue: Tuple
+    cards_in_bar: Pile
+    cards_in_thrash: Pile
+    table: Mapping
+    players: Tuple
+    n_players: int
+    finished: bool
+    results: Mapping
+
+    def to_dict(self):
+        """Same keys as `GameState.to_dict`, with immutable containers."""
+        return {
+            'cards_in_bar': self.cards_in_bar,
+            'cards_in_thrash': self.cards_in_thrash,
+            'queue': self.queue,
+            'old_queue': self.old_queue,
+            'players': self.players,
+            'current_player': self.current_player,
+            'n_players': self.n_players,
+            'turn_number': self.turn_number,
+            'table': {player: zone.to_dict() for player, zone in self.table.items()},
+            'finished': self.finished,
+            'results': dict(self.results),
+        }
+
+
+def _zones(table):
+    """player, (hand, deck, thrown, strategy, finished) for every zone of the table."""
+    if isinstance(table, Table):
+        # Straight from the columns, without going through the `PlayerZone` views.
+        for player, zone in table.items():
+            i = zone.index
+            deck = table.decks[i]
+            yield player, (table.hands[i], deck[table.cursors[i]:] if table.cursors[i] else deck,
+                           table.thrown[i], table.strategies[i], table.finished[i])
+    else:
+        for player, cards in table.items():
+            yield player, (cards['hand'], cards['deck'], cards['thrown'], cards['strategy'], cards['finished'])
+
+
+def _same(items, shared):
+    return len(items) == len(shared) and all(a is b for a, b in zip(items, shared))
+
+
+class GameHistory(Sequence):
+    """
+    Snapshots of a game, one per recorded turn, with O(1) access to any of them.
+    With `maxlen` the history is a ring buffer which only keeps the last `maxlen`
+    snapshots; older ones raise IndexError.
+    """
+
+    def __init__(self, maxlen: Optional[int] = None):
+        if maxlen is not None and maxlen < 1:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = maxlen
+        self._snapshots = []
+        self._n_recorded = 0
+        self._last = None
+        self._bar = _PileRecorder()
+        self._thrash = _PileRecorder()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("History index out of range")
+        if self.maxlen is None or self._n_recorded <= self.maxlen:
+            return self._snapshots[index]
+        oldest = self._n_recorded % self.maxlen
+        return self._snapshots[(oldest + index) % self.maxlen]
+
+    def to_dicts(self):
+        """
+        The history as the list of state dicts `GameRunner.run` used to return,
+        one `Snapshot.to_dict` per turn with the bar and the thrash as lists.
+        """
+        dicts = []
+        for snapshot in self:
+            state = snapshot.to_dict()
+            state['cards_in_bar'] = list(state['cards_in_bar'])
+            state['cards_in_thrash'] = list(state['cards_in_thrash'])
+            dicts.append(state)
+        return dicts
+
+    @property
+    def first_turn(self):
+        """Number of recorded turns which fell out of the ring buffer."""
+        return self._n_recorded - len(self)
+
+    def record(self, game_state):
+        last = self._last
+        table = {}
+        for player, (hand, deck, thrown, strategy, finished) in _zones(game_state.table):
+            previous = last.table.get(player) if last else None
+            if (previous is not None and previous.finished == finished
+                    and previous.strategy is strategy and _same(hand, previous.hand)
+                    and _same(deck, previous.deck) and _same(thrown, previous.thrown)):
+                table[player] = previous
+            else:
+                table[player] = PlayerSnapshot(
+                    hand=tuple(hand), deck=tuple(deck), thrown=tuple(thrown),
+                    finished=finished, strategy=strategy,
+                )
+
+        queue = tuple(game_state.queue)
+        old_queue = tuple(game_state.old_queue)
+        if last is not None:
+            # The old queue of this turn is usually the queue of the previous one.
+            old_queue = last.queue if _same(old_queue, last.queue) else old_queue
+            results = last.results if last.results == game_state.results else None
+            players = last.players if list(last.players) == list(game_state.players) else None
+        else:
+            results = players = None
+        if results is None:
+            results = MappingProxyType(dict(game_state.results))
+        if players is None:
+            players = tuple(game_state.players)
+
+        snapshot = Snapshot(
+            turn_number=game_state.turn_number,
+            current_player=game_state.current_player,
+            queue=queue,
+            old_queue=old_queue,
+            cards_in_bar=self._bar.view(game_state.cards_in_bar),
+            cards_in_thrash=self._thrash.view(game_state.cards_in_thrash),
+            table=MappingProxyType(table),
+            players=players,
+            n_players=game_state.n_players,
+            finished=game_state.finished,
+            results=results,
+        )
+        if self.maxlen is None or len(self._snapshots) < self.maxlen:
+            self._snapshots.append(snapshot)
+        else:
+            self._snapshots[self._n_recorded % self.maxlen] = snapshot
+        self._n_recorded += 1
+        self._last = snapshot
+        return snapshot
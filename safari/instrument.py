@@ -0,0 +1,238 @@
+"""
+Opt-in instrumentation of the rules engine and the game loop.
+
+Inside `instrumented()` the animal actions, the repeating-action pass of
+`Queue.resolve` and the phases of `GameRunner` are wrapped with timers. The
+wrappers are removed on exit, so the engine runs untouched code, with no
+flag checks, when instrumentation is off.
+
+    with instrumented() as counters:
+        run_tournament(strategies, 100, workers=1)
+    print(counters.report())
+
+`profile_run` also runs the code under cProfile and tracemalloc and writes the
+profile as collapsed stacks ("a;b;c microseconds" lines, the input of
+flamegraph.pl and speedscope).
+"""
+import cProfile
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import ANIMAL_MAPPING
+
+# GameRunner method -> phase its own time counts to. Phases nest: time spent in a
+# strategy called from the engine is strategy time only. Only the logging methods
+# count as logging, the single logger calls inline in the loop stay engine time.
+PHASES = {
+    'play_turn': 'engine',
+    'update_game_state': 'engine',
+    'get_played_move': 'strategy',
+    'get_played_card': 'strategy',
+    'log_queue_changes': 'logging',
+    'log_queue_evaluation': 'logging',
+    'log_results': 'logging',
+}
+
+
+@dataclass
+class Timing:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class Counters:
+    """Calls and time per animal action (inclusive), the repeating pass and exclusive time per phase."""
+    actions: Dict[str, Timing] = field(default_factory=dict)
+    repeating: Timing = field(default_factory=Timing)
+    phases: Dict[str, float] = field(default_factory=lambda: {'strategy': 0.0, 'engine': 0.0, 'logging': 0.0})
+
+    def report(self):
+        lines = [f"{'action':>12} {'calls':>9} {'total ms':>10} {'us/call':>8}"]
+        for name, timing in sorted(self.actions.items(), key=lambda item: -item[1].seconds):
+            lines.append(f"{name:>12} {timing.calls:>9} {1e3 * timing.seconds:>10.1f} "
+                         f"{1e6 * timing.seconds / timing.calls:>8.2f}")
+        lines.append(f"{'repeating':>12} {self.repeating.calls:>9} {1e3 * self.repeating.seconds:>10.1f}")
+        total = sum(self.phases.values()) or 1.0
+        for phase, seconds in self.phases.items():
+            lines.append(f"{phase:>12} {1e3 * seconds:>10.1f} ms {100 * seconds / total:>5.1f}%")
+        return "\n".join(lines)
+
+
+class _PhaseClock:
+    """Charges the time between two events to the phase on top of the stack."""
+
+    def __init__(self, phases):
+        self.phases = phases
+        self.stack = []
+        self.mark = 0.0
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            self.phases[self.stack[-1]] += now - self.mark
+        self.stack.append(phase)
+        self.mark = now
+
+    def leave(self):
+        now = time.perf_counter()
+        self.phases[self.stack.pop()] += now - self.mark
+        self.mark = now
+
+
+def _timed_action(function, actions):
+    def action(card, queue, *target):
+        start = time.perf_counter()
+        try:
+            return function(card, queue, *target)
+        finally:
+            # The card, not the function: a chameleon copying a zebra counts as a chameleon.
+            timing = actions.get(card.__class__.__name__)
+            if timing is None:
+                timing = actions[card.__class__.__name__] = Timing()
+            timing.calls += 1
+            timing.seconds += time.perf_counter() - start
+    return action
+
+
+def _timed_pass(function, timing):
+    def repeat_actions(queue, added_card, all_dropped):
+        start = time.perf_counter()
+        try:
+            return function(queue, added_card, all_dropped)
+        finally:
+            timing.calls += 1
+            timing.seconds += time.perf_counter() - start
+    return repeat_actions
+
+
+def _in_phase(function, phase, clock):
+    def method(*args, **kwargs):
+        clock.enter(phase)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            clock.leave()
+    return method
+
+
+_active = []
+
+
+@contextmanager
+def instrumented():
+    """Counters of everything the engine and the game loop do inside the block."""
+    from logic import GameRunner
+
+    if _active:
+        raise RuntimeError("Instrumentation is already on")
+    counters = Counters()
+    clock = _PhaseClock(counters.phases)
+    patches = [(card_class, 'action', _timed_action(card_class.action, counters.actions))
+               for card_class in ANIMAL_MAPPING.values() if 'action' in vars(card_class)]
+    patches.append((Queue, 'repeat_actions', _timed_pass(Queue.repeat_actions, counters.repeating)))
+    patches += [(GameRunner, name, _in_phase(getattr(GameRunner, name), phase, clock))
+                for name, phase in PHASES.items()]
+
+    originals = [(owner, name, vars(owner)[name]) for owner, name, _ in patches]
+    _active.append(counters)
+    # Card.__setattr__ only guards the cards, their classes can be patched.
+    for owner, name, wrapper in patches:
+        setattr(owner, name, wrapper)
+    try:
+        yield counters
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+        _active.pop()
+
+
+def _frame_name(function):
+    filename, line, name = function
+    if filename == '~':
+        return name.strip('<>').replace(' ', '_')
+    return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats, min_seconds: float = 1e-6) -> Dict[str, float]:
+    """
+    Own time of every function spread over its callers, in proportion to the
+    time each caller spent in it. cProfile only keeps caller -> callee edges,
+    so deeper stacks are estimates; recursion ends a stack.
+    """
+    stacks = Counter()
+    table = stats.stats
+
+    def walk(function, stack, seconds, seen):
+        callers = table[function][4] if function in table else {}
+        total = sum(edge[3] for caller, edge in callers.items() if caller not in seen)
+        if total <= 0:
+            stacks[";".join(_frame_name(f) for f in reversed(stack))] += seconds
+            return
+        for caller, edge in callers.items():
+            share = seconds * edge[3] / total
+            if caller not in seen and share >= min_seconds:
+                walk(caller, stack + [caller], share, seen | {caller})
+
+    for function, (_, _, own, _, _) in table.items():
+        if own >= min_seconds:
+            walk(function, [function], own, {function})
+    return dict(stacks)
+
+
+def write_collapsed(path, stacks: Dict[str, float]):
+    with open(path, 'w') as f:
+        for stack, seconds in sorted(stacks.items()):
+            microseconds = round(seconds * 1e6)
+            if microseconds:
+                f.write(f"{stack} {microseconds}\n")
+
+
+@dataclass
+class ProfileReport:
+    counters: Counters
+    stats: pstats.Stats
+    peak_memory: int
+    top_allocations: List[str]
+
+    def __str__(self):
+        lines = [self.counters.report(), f"peak traced memory: {self.peak_memory / 1024:.1f} KiB"]
+        lines += ["top allocations:"] + [f"  {line}" for line in self.top_allocations]
+        return "\n".join(lines)
+
+
+def profile_run(function, collapsed_path=None, memory=True, n_allocations=10):
+    """
+    `function()` instrumented and under cProfile, and under tracemalloc with
+    `memory`. Returns its result and a `ProfileReport`; writes the collapsed
+    stacks to `collapsed_path`.
+    """
+    profiler = cProfile.Profile()
+    if memory:
+        tracemalloc.start()
+    try:
+        with instrumented() as counters:
+            profiler.enable()
+            try:
+                result = function()
+            finally:
+                profiler.disable()
+        peak, snapshot = 0, None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    stats = pstats.Stats(profiler)
+    if collapsed_path:
+        write_collapsed(collapsed_path, collapsed_stacks(stats))
+    top = [str(stat) for stat in snapshot.statistics('lineno')[:n_allocations]] if snapshot else []
+    return result, ProfileReport(counters, stats, peak, top)
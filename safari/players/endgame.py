@@ -0,0 +1,224 @@
+"""
+Exact endgame play.
+
+Once every deck is empty the game is short: at most four cards per hand. The
+only hidden cards left are the two each opponent had thrown away at the deal,
+so an opponent's hand is one of a few combinations of their unseen cards.
+`Endgame` solves every such world with `EndgameSolver` (max-n, each player
+maximising their own share of the win) and plays the move with the best
+expected share over the worlds.
+"""
+import itertools
+import random
+import time
+from dataclasses import dataclass, replace
+
+from safari.cards.base import ANIMALS
+from safari.players.strategies import Max, Strategy
+from safari.search import SearchState, chosen_targets, rewards, visible_cards
+from safari.stacks import packed
+from safari.stacks.packed import pack_card
+
+
+class NodeBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class SolverStats:
+    nodes: int = 0
+    tt_probes: int = 0
+    tt_hits: int = 0
+    elapsed: float = 0.0
+    solved: int = 0
+    fallbacks: int = 0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def __str__(self):
+        return (f"{self.nodes} nodes, {self.nodes_per_second:.0f} nodes/s, "
+                f"TT hit rate {self.tt_hit_rate:.1%}, {self.solved} solved, {self.fallbacks} fallbacks")
+
+
+def _key(state):
+    # Hands are kept sorted (see `Endgame.worlds`) and `apply` keeps them so once
+    # the decks are empty, which makes the key canonical without sorting.
+    return state.queue, state.hands, state.scores, state.current_player
+
+
+class EndgameSolver:
+    """
+    Max-n search over `SearchState` with a transposition table.
+    Utilities are win shares, which sum to one, so a node can stop as soon as its
+    player secures the whole win (immediate pruning) or takes more than the
+    player above it left over (shallow pruning). Moves are tried in the order of
+    the points they bring to the mover, the best move of a transposition first.
+    """
+
+    def __init__(self, max_entries=1_000_000):
+        self.max_entries = max_entries
+        self.table = {}
+        self.stats = SolverStats()
+        self._budget = None
+
+    def evaluate(self, state: SearchState, node_budget=None):
+        """Exact win shares after each legal move of the current player."""
+        self._budget = None if node_budget is None else self.stats.nodes + node_budget
+        if len(self.table) > self.max_entries:
+            self.table.clear()
+        start = time.perf_counter()
+        try:
+            values, children = {}, {}
+            for move in state.legal_moves():
+                child = state.apply(move)
+                if child not in children:
+                    children[child] = self._search(child, None, None)[0]
+                values[move] = children[child]
+            return values
+        finally:
+            self.stats.elapsed += time.perf_counter() - start
+
+    def _children(self, state, first):
+        player = state.current_player
+        children = {}
+        for move in state.legal_moves():
+            child = state.apply(move)
+            # Different chameleon or parrot choices often lead to the same state.
+            children.setdefault(child, (child, move))
+        children = list(children.values())
+
+        def order(item):
+            # Points won by the mover minus points won by the others.
+            child, move = item
+            if move == first:
+                return float('inf')
+            return 2 * child.scores[player] - sum(child.scores)
+
+        children.sort(key=order, reverse=True)
+        return children
+
+    def _search(self, state, parent, bound):
+        """
+        Win shares of `state` and the best move. `bound` is the best share the
+        `parent` player already has elsewhere; values which cannot beat it are
+        only bounds and are not stored.
+        """
+        stats = self.stats
+        stats.nodes += 1
+        if self._budget is not None and stats.nodes > self._budget:
+            raise NodeBudgetExceeded
+        if state.finished:
+            return tuple(rewards(state.scores)), None
+
+        key = _key(state)
+        stats.tt_probes += 1
+        entry = self.table.get(key)
+        if entry is not None and entry[0] is not None:
+            stats.tt_hits += 1
+            return entry
+
+        player = state.current_player
+        best, best_move = None, None
+        for child, move in self._children(state, entry[1] if entry else None):
+            value, _ = self._search(child, player, None if best is None else best[player])
+            if best is None or value[player] > best[player]:
+                best, best_move = value, move
+            if best[player] >= 1:
+                break
+            if bound is not None and parent != player and best[player] > 1 - bound:
+                # The parent player gets less than `bound` here, it will not come this way.
+                self.table[key] = (None, best_move)
+                return best, best_move
+        self.table[key] = (best, best_move)
+        return best, best_move
+
+
+class Endgame(Strategy):
+    """
+    Perfect play once the decks are empty, at most `max_cards` are left in the
+    hands and the position can be solved within `node_budget` nodes; `fallback`
+    before that. `stats` reports the search.
+    """
+
+    def __init__(self, node_budget=150_000, max_worlds=12, max_cards=12, fallback=None, seed=None):
+        self.node_budget = node_budget
+        self.max_worlds = max_worlds
+        self.max_cards = max_cards
+        self.fallback = fallback or Max()
+        self.solver = EndgameSolver()
+        self.rng = random.Random(seed)
+        self.last_move = None
+        # Cards left in the hands when the budget last ran out, no retry before fewer are left.
+        self._too_big = max_cards + 1
+
+    def __str__(self):
+        return 'endgame'
+
+    @property
+    def stats(self):
+        return self.solver.stats
+
+    def strategy(self, cards):
+        return self.fallback.strategy(cards)
+
+    def choose(self, game_state, player):
+        self.last_move = None
+        hand = game_state.table[player]['hand']
+        if not hand:
+            return None
+        cards_left = sum(len(cards['hand']) for cards in game_state.table.values())
+        if any(cards['deck'] for cards in game_state.table.values()) or cards_left >= self._too_big:
+            return self.fallback.choose(game_state, player)
+
+        worlds = self.worlds(game_state, player)
+        budget = self.node_budget
+        shares = {}
+        try:
+            for state in worlds:
+                start = self.solver.stats.nodes
+                for move, value in self.solver.evaluate(state, budget).items():
+                    shares[move] = shares.get(move, 0.0) + value[player]
+                budget -= self.solver.stats.nodes - start
+        except NodeBudgetExceeded:
+            self.solver.stats.fallbacks += 1
+            self._too_big = cards_left
+            return self.fallback.choose(game_state, player)
+
+        self.solver.stats.solved += 1
+        self.last_move = max(shares, key=shares.get)
+        return next(card for card in hand if pack_card(card) == self.last_move.card)
+
+    def targets(self, game_state, player, card):
+        return chosen_targets(game_state, self.last_move, card)
+
+    def worlds(self, game_state, observer):
+        """
+        Full-information states the game can be in for `observer`: every
+        combination of the opponents' unseen cards as their hands, or a random
+        sample of `max_worlds` of them when there are more.
+        """
+        visible = set(visible_cards(game_state))
+        options = []
+        for player in range(game_state.n_players):
+            hand = game_state.table[player]['hand']
+            if player == observer:
+                options.append([tuple(sorted(pack_card(card) for card in hand))])
+                continue
+            unseen = [card for card in (packed.encode(value, player) for value in ANIMALS) if card not in visible]
+            options.append(list(itertools.combinations(sorted(unseen), len(hand))))
+
+        base = SearchState.from_game_state(game_state)
+        n_worlds = 1
+        for hands in options:
+            n_worlds *= len(hands)
+        if n_worlds <= self.max_worlds:
+            deals = itertools.product(*options)
+        else:
+            deals = (tuple(self.rng.choice(hands) for hands in options) for _ in range(self.max_worlds))
+        return [replace(base, hands=hands) for hands in deals]
@@ -0,0 +1,150 @@
+"""
+Information-set Monte Carlo tree search (single observer ISMCTS).
+
+Every iteration samples the hidden cards of the opponents (see
+`safari.search.determinize`), walks down the tree choosing among the moves which
+are legal in that sample, expands one move and finishes the game with a random
+rollout. A node's availability counts how often its move was legal when its
+parent was visited, which keeps moves that are rarely possible from being
+under-explored. The subtree of the position reached is kept for the next turn.
+
+An iteration, the sample and the rollout included, takes about 0.3ms on the first
+turn of a 4 player game (~3k iterations a second), bounded by `rollout`.
+"""
+import math
+import random
+import time
+from typing import Optional
+
+from safari.players.strategies import Max, Strategy
+from safari.search import Move, chosen_targets, determinize, moves_for, rewards, rollout, visible_cards
+from safari.stacks.packed import pack_card, to_packed
+
+
+class Node:
+    __slots__ = ('move', 'player', 'children', 'visits', 'reward', 'available')
+
+    def __init__(self, move=None, player=None):
+        self.move = move
+        # The player who made `move`, rewards are counted from their point of view.
+        self.player = player
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.available = 0
+
+    def select(self, moves, exploration):
+        best, best_score = None, -1.0
+        for move in moves:
+            child = self.children[move]
+            child.available += 1
+            score = child.reward / child.visits + exploration * math.sqrt(math.log(child.available) / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+class ISMCTS(Strategy):
+    """
+    Searches `iterations` playouts per move, or for `time_limit` seconds when given.
+    The full chosen move, with the chameleon and parrot choices, is kept in `last_move`.
+    """
+
+    def __init__(self, iterations=300, time_limit: Optional[float] = None, exploration=0.7, seed=None):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.last_move: Optional[Move] = None
+        self.last_iterations = 0
+        self._root = None
+        self._visible = None
+        self._turn = None
+
+    def __str__(self):
+        return 'ismcts'
+
+    def strategy(self, cards):
+        raise NotImplementedError("ISMCTS needs the game state, use choose")
+
+    def choose(self, game_state, player):
+        hand = game_state.table[player]['hand']
+        if not hand:
+            return None
+        root = self._reuse(game_state, player)
+        deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        iterations = 0
+        while (time.perf_counter() < deadline) if deadline else iterations < self.iterations:
+            self._iterate(root, determinize(game_state, player, self.rng))
+            iterations += 1
+
+        # A reused tree also holds moves of cards which were only drawn in some samples.
+        queue = to_packed(game_state.queue)
+        moves = [move for card in hand for move in moves_for(queue, pack_card(card))]
+        # Too few iterations can leave every move of the hand unexpanded, each further one expands one.
+        for _ in range(len(moves)):
+            if any(move in root.children for move in moves):
+                break
+            self._iterate(root, determinize(game_state, player, self.rng))
+            iterations += 1
+        legal = [move for move in moves if move in root.children]
+        if not legal:
+            self.last_move, self.last_iterations, self._root = None, iterations, None
+            return Max().choose(game_state, player)
+        move = max(legal, key=lambda move: root.children[move].visits)
+        self.last_move, self.last_iterations = move, iterations
+        self._root = root.children[move]
+        self._visible = set(visible_cards(game_state)) | {move.card}
+        self._turn = game_state.turn_number
+        return next(card for card in hand if pack_card(card) == move.card)
+
+    def targets(self, game_state, player, card):
+        return chosen_targets(game_state, self.last_move, card)
+
+    def _iterate(self, root, state):
+        node = root
+        path = [node]
+        while not state.finished:
+            moves = state.legal_moves()
+            untried = [move for move in moves if move not in node.children]
+            if untried:
+                move = untried[int(self.rng.random() * len(untried))]
+                child = node.children[move] = Node(move, state.current_player)
+                child.available = 1
+                path.append(child)
+                state = state.apply(move)
+                break
+            node = node.select(moves, self.exploration)
+            path.append(node)
+            state = state.apply(node.move)
+
+        scores = rollout(state, self.rng)
+        shares = rewards(scores)
+        for node in path:
+            node.visits += 1
+            if node.player is not None:
+                node.reward += shares[node.player]
+
+    def _reuse(self, game_state, player):
+        """
+        The subtree below the last chosen move, followed through the cards the
+        opponents played since. Falls back to a new tree when their moves are
+        ambiguous (a chameleon or parrot choice the game does not show).
+        """
+        root, self._root = self._root, None
+        if root is None or game_state.turn_number != self._turn + game_state.n_players:
+            return Node()
+        played = [card for card in visible_cards(game_state) if card not in self._visible]
+        by_player = {card & 3: card for card in played}
+        if len(by_player) != len(played):
+            return Node()
+        opponent = (player + 1) % game_state.n_players
+        while opponent != player:
+            card = by_player.pop(opponent, None)
+            if card is not None:
+                children = [child for move, child in root.children.items() if move.card == card]
+                if len(children) != 1:
+                    return Node()
+                root = children[0]
+            opponent = (opponent + 1) % game_state.n_players
+        return Node() if by_player else root
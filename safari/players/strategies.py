@@ -16,6 +16,12 @@ def strategy_min(cards):
 class Strategy:
     def strategy(cards):
         raise NotImplementedError
+    def choose(self, game_state, player):
+        """Card to play from the hand of `player`. Strategies which look beyond the hand override this."""
+        return self.strategy(game_state.table[player]['hand'])
+    def targets(self, game_state, player, card):
+        """Chameleon and parrot targets (queue positions) for playing `card`, None keeps the default choice."""
+        return None, None
     def chameleon():
         return None
     def parrot():
@@ -0,0 +1,252 @@
+"""
+Append-only binary format for recording many games, with a background writer.
+
+A file is a magic header followed by blocks:
+
+    u32 payload length | u32 raw length | u8 codec | payload
+
+`codec` is 0 for raw bytes and 1 for zlib. A block holds whole game records, so a
+reader only ever decompresses one block at a time. A game record is a header
+(seed, strategy per seat, the deal) followed by one delta per turn: the played
+card, the chameleon/parrot choice, how many of the thrown out cards the played
+card's own action dropped, the queue after the turn and the cards which went to
+the bar and to the thrash. Cards use the packed encoding of
+safari.stacks.packed, one byte each. Files of the first version, without the
+dropped count, are still read.
+"""
+import queue
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from safari.events import GameObserver
+from safari.stacks.packed import pack_card, unpack_card
+
+MAGIC = b"SBGR\x02"
+MAGIC_V1 = b"SBGR\x01"
+BLOCK_HEADER = struct.Struct("<IIB")
+RAW, ZLIB = 0, 1
+NO_CHOICE = 255
+NO_SEED = -1
+_GAME_HEADER = struct.Struct("<qBH")
+_TURN_HEADER = struct.Struct("<BBBBB")
+_TURN_HEADER_V1 = struct.Struct("<BBBB")
+
+
+@dataclass
+class TurnDelta:
+    player: int
+    card: int
+    chameleon_target: Optional[int] = None
+    parrot_target: Optional[int] = None
+    queue: Tuple[int, ...] = ()
+    to_bar: Tuple[int, ...] = ()
+    to_thrash: Tuple[int, ...] = ()
+    # How many of the first cards of `to_thrash` the action of `card` dropped,
+    # the rest went there in the repeating pass or bounced off a full queue.
+    # None in files of the first version.
+    dropped: Optional[int] = None
+
+
+@dataclass
+class GameRecord:
+    seed: Optional[int] = None
+    strategies: Dict[int, str] = field(default_factory=dict)
+    # player -> (hand, deck, thrown) as packed cards
+    deal: Dict[int, Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]] = field(default_factory=dict)
+    turns: List[TurnDelta] = field(default_factory=list)
+
+    def results(self):
+        """Points per player, same as `GameState.results` at the end of the game."""
+        results = {}
+        for turn in self.turns:
+            for card in turn.to_bar:
+                results[card & 3] = results.get(card & 3, 0) + unpack_card(card).point_value
+        return results
+
+
+def _cards(cards):
+    return bytes([len(cards)]) + bytes(cards)
+
+
+def _choice(value):
+    return NO_CHOICE if value is None else value
+
+
+def encode_record(record: GameRecord) -> bytes:
+    parts = [_GAME_HEADER.pack(NO_SEED if record.seed is None else record.seed, len(record.deal), len(record.turns))]
+    for player, (hand, deck, thrown) in record.deal.items():
+        name = record.strategies.get(player, "").encode()
+        parts += [bytes([player, len(name)]), name, _cards(hand), _cards(deck), _cards(thrown)]
+    for turn in record.turns:
+        parts.append(_TURN_HEADER.pack(
+            turn.player, turn.card, _choice(turn.chameleon_target), _choice(turn.parrot_target), _choice(turn.dropped)
+        ))
+        parts += [_cards(turn.queue), _cards(turn.to_bar), _cards(turn.to_thrash)]
+    return b"".join(parts)
+
+
+def _read_cards(data, offset):
+    n = data[offset]
+    return tuple(data[offset + 1:offset + 1 + n]), offset + 1 + n
+
+
+def decode_record(data, offset=0, version=2) -> Tuple[GameRecord, int]:
+    seed, n_players, n_turns = _GAME_HEADER.unpack_from(data, offset)
+    offset += _GAME_HEADER.size
+    record = GameRecord(seed=None if seed == NO_SEED else seed)
+    for _ in range(n_players):
+        player, name_length = data[offset], data[offset + 1]
+        offset += 2
+        record.strategies[player] = bytes(data[offset:offset + name_length]).decode()
+        offset += name_length
+        hand, offset = _read_cards(data, offset)
+        deck, offset = _read_cards(data, offset)
+        thrown, offset = _read_cards(data, offset)
+        record.deal[player] = (hand, deck, thrown)
+    for _ in range(n_turns):
+        if version == 1:
+            player, card, chameleon_target, parrot_target = _TURN_HEADER_V1.unpack_from(data, offset)
+            dropped = NO_CHOICE
+            offset += _TURN_HEADER_V1.size
+        else:
+            player, card, chameleon_target, parrot_target, dropped = _TURN_HEADER.unpack_from(data, offset)
+            offset += _TURN_HEADER.size
+        new_queue, offset = _read_cards(data, offset)
+        to_bar, offset = _read_cards(data, offset)
+        to_thrash, offset = _read_cards(data, offset)
+        record.turns.append(TurnDelta(
+            player=player,
+            card=card,
+            chameleon_target=None if chameleon_target == NO_CHOICE else chameleon_target,
+            parrot_target=None if parrot_target == NO_CHOICE else parrot_target,
+            queue=new_queue,
+            to_bar=to_bar,
+            to_thrash=to_thrash,
+            dropped=None if dropped == NO_CHOICE else dropped,
+        ))
+    return record, offset
+
+
+class GameRecordWriter:
+    """
+    Appends game records to `path` from a background thread.
+    `write` only encodes the record and puts it on a bounded queue, so the
+    simulation does not wait for the disk unless the writer falls more than
+    `max_pending` records behind. Use as a context manager or call `close`.
+    """
+
+    def __init__(self, path, compress=True, block_size=1 << 16, max_pending=1024):
+        self.path = path
+        self.compress = compress
+        self.block_size = block_size
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    self._file.close()
+                    raise ValueError(f"{path} is not a game record file of this version, records cannot be appended")
+        self._thread = threading.Thread(target=self._run, name="GameRecordWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, record: GameRecord):
+        if self._error is not None:
+            raise self._error
+        self._pending.put(encode_record(record))
+
+    def close(self):
+        self._pending.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        block = []
+        size = 0
+        while True:
+            data = self._pending.get()
+            if data is not None:
+                block.append(data)
+                size += len(data)
+            if block and (data is None or size >= self.block_size):
+                try:
+                    self._write_block(b"".join(block))
+                except Exception as e:
+                    self._error = e
+                block, size = [], 0
+            if data is None:
+                return
+
+    def _write_block(self, raw):
+        payload, codec = (zlib.compress(raw), ZLIB) if self.compress else (raw, RAW)
+        self._file.write(BLOCK_HEADER.pack(len(payload), len(raw), codec))
+        self._file.write(payload)
+        self._file.flush()
+
+
+def read_records(path) -> Iterator[GameRecord]:
+    """Stream the records of a file, one block in memory at a time."""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"{path} is not a game record file")
+        version = 1 if magic == MAGIC_V1 else 2
+        while True:
+            header = f.read(BLOCK_HEADER.size)
+            if not header:
+                return
+            payload_length, raw_length, codec = BLOCK_HEADER.unpack(header)
+            payload = f.read(payload_length)
+            if len(payload) != payload_length:
+                raise ValueError(f"{path} ends with a truncated block")
+            raw = zlib.decompress(payload) if codec == ZLIB else payload
+            offset = 0
+            while offset < raw_length:
+                record, offset = decode_record(raw, offset, version)
+                yield record
+
+
+class GameRecorder(GameObserver):
+    """Observer which turns the events of `GameRunner` into records for a writer."""
+
+    def __init__(self, writer: GameRecordWriter, seed=None):
+        self.writer = writer
+        self.seed = seed
+        self.record = None
+
+    def on_game_start(self, game_state):
+        self.record = GameRecord(seed=self.seed)
+        for player, cards in game_state.table.items():
+            self.record.strategies[player] = cards['strategy'].__class__.__name__
+            self.record.deal[player] = tuple(
+                tuple(pack_card(card) for card in cards[zone]) for zone in ('hand', 'deck', 'thrown')
+            )
+
+    def on_turn(self, event, game_state):
+        self.record.turns.append(TurnDelta(
+            player=event.player,
+            card=pack_card(event.card),
+            chameleon_target=event.chameleon_target,
+            parrot_target=event.parrot_target,
+            queue=tuple(pack_card(card) for card in event.queue),
+            to_bar=tuple(pack_card(card) for card in event.to_bar),
+            to_thrash=tuple(pack_card(card) for card in event.to_thrash),
+            dropped=len(event.dropped),
+        ))
+
+    def on_game_end(self, game_state):
+        self.writer.write(self.record)
+        self.record = None
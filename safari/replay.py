@@ -0,0 +1,129 @@
+"""
+Decision-only game replays.
+
+A game is fully determined by the seed of its deal (see
+`safari.stacks.shuffle.game_seed`) and the decisions of the players, so a replay
+stores just that:
+
+    i64 seed | u8 players | u8 turns | one byte per turn
+
+A turn byte holds the index of the played card in the hand (bits 0-1), the
+chameleon target + 1 (bits 2-4, 0 for the default) and the parrot target + 1
+(bits 5-7, 0 for the default). A 4 player game takes 50 bytes. `rebuild` plays
+the decisions again through `GameRunner` up to any turn.
+"""
+import logging
+import random
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, NamedTuple, Optional, Type
+
+from safari.events import GameObserver
+from safari.players.strategies import Max, Strategy
+from safari.stacks.shuffle import init
+
+MAGIC = b"SBRP\x01"
+_HEADER = struct.Struct("<qBB")
+
+
+class Decision(NamedTuple):
+    index: int
+    chameleon_target: Optional[int] = None
+    parrot_target: Optional[int] = None
+
+
+@dataclass
+class Replay:
+    seed: int
+    n_players: int = 4
+    decisions: List[Decision] = field(default_factory=list)
+
+
+def _target(value):
+    return 0 if value is None else value + 1
+
+
+def _choice(bits):
+    return None if bits == 0 else bits - 1
+
+
+def encode_replay(replay: Replay) -> bytes:
+    turns = bytes(
+        decision.index | _target(decision.chameleon_target) << 2 | _target(decision.parrot_target) << 5
+        for decision in replay.decisions
+    )
+    return _HEADER.pack(replay.seed, replay.n_players, len(turns)) + turns
+
+
+def decode_replay(data, offset=0):
+    """The replay starting at `offset` and the offset after it."""
+    seed, n_players, n_turns = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+    decisions = [
+        Decision(byte & 3, _choice(byte >> 2 & 7), _choice(byte >> 5))
+        for byte in data[offset:offset + n_turns]
+    ]
+    return Replay(seed, n_players, decisions), offset + n_turns
+
+
+def write_replays(path, replays: Iterable[Replay]):
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        for replay in replays:
+            f.write(encode_replay(replay))
+
+
+def read_replays(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a replay file")
+    offset = len(MAGIC)
+    while offset < len(data):
+        replay, offset = decode_replay(data, offset)
+        yield replay
+
+
+def rebuild(replay: Replay, turn: Optional[int] = None, strategies: Dict[int, Type[Strategy]] = None):
+    """
+    A `GameRunner` in the state after the first `turn` decisions (the whole game by default).
+    `strategies` only matter to carry on playing from there, seats default to Max.
+    """
+    from logic import GameRunner
+
+    strategies = strategies or {}
+    table = init({player: strategies.get(player, Max) for player in range(replay.n_players)},
+                 rng=random.Random(replay.seed))
+    runner = GameRunner(table, log_level=logging.WARNING)
+    for decision in replay.decisions[:turn]:
+        hand = runner.game_state.table[runner.game_state.current_player]['hand']
+        runner.update_game_state(hand[decision.index], decision.chameleon_target, decision.parrot_target)
+    return runner
+
+
+class ReplayRecorder(GameObserver):
+    """
+    Observer which keeps the replay of every game it sees.
+    Set `seed` to the seed of the deal before each game.
+    """
+
+    def __init__(self, seed: int = None):
+        self.seed = seed
+        self.replays: List[Replay] = []
+        self._replay = None
+        self._hands = {}
+
+    def on_game_start(self, game_state):
+        if self.seed is None:
+            raise ValueError("ReplayRecorder needs the seed of the deal")
+        self._replay = Replay(self.seed, game_state.n_players)
+        self._hands = {player: list(cards['hand']) for player, cards in game_state.table.items()}
+
+    def on_turn(self, event, game_state):
+        hand = self._hands[event.player]
+        self._replay.decisions.append(Decision(hand.index(event.card), event.chameleon_target, event.parrot_target))
+        self._hands[event.player] = list(game_state.table[event.player]['hand'])
+
+    def on_game_end(self, game_state):
+        self.replays.append(self._replay)
+        self._replay = None
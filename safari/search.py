@@ -0,0 +1,225 @@
+"""
+Compact, immutable game state for search strategies.
+
+`SearchState` holds the game with packed cards (see safari.stacks.packed) in
+tuples, so copying it is free and `apply` builds the next state from a handful
+of small tuples. `rollout` plays a game to the end on plain lists, which is the
+hot path of Monte Carlo search.
+"""
+import random
+from dataclasses import dataclass, replace
+from typing import NamedTuple, Optional, Tuple
+
+from safari.cards.base import ANIMALS
+from safari.stacks import packed
+from safari.stacks.packed import CHAMELEON, PARROT, pack_card
+from safari.stacks.queue import BAR_QUEUE_LENGTH
+from safari.stacks.shuffle import ANIMAL_MAPPING
+
+# Indexed by packed card.
+POINTS = [0] * 64
+for _value, _card_class in ANIMAL_MAPPING.items():
+    for _player in range(4):
+        POINTS[packed.encode(_value, _player)] = _card_class.point_value
+
+
+class Move(NamedTuple):
+    card: int
+    chameleon_target: Optional[int] = None
+    parrot_target: int = 0
+
+
+def moves_for(queue, card):
+    """Every distinct way of playing `card` on `queue`, chameleon and parrot choices included."""
+    value = card >> 2
+    if value == PARROT:
+        return [Move(card, None, target) for target in range(max(len(queue), 1))]
+    if value != CHAMELEON:
+        return [Move(card)]
+    moves = []
+    for target, other in enumerate(queue):
+        if other >> 2 == PARROT:
+            moves += [Move(card, target, parrot_target) for parrot_target in range(len(queue))]
+        elif other >> 2 != CHAMELEON:
+            moves.append(Move(card, target))
+    return moves or [Move(card)]
+
+
+def targets(queue, move):
+    """
+    The chameleon and parrot targets of a move for `Queue.resolve`. Packed moves
+    always carry a parrot target, it is None unless a parrot is played or copied.
+    """
+    target = move.chameleon_target
+    copies_parrot = move.card >> 2 == PARROT or target is not None and queue[target] >> 2 == PARROT
+    return target, move.parrot_target if copies_parrot else None
+
+
+def chosen_targets(game_state, move: Optional[Move], card):
+    """`targets` of the packed `move` a search chose, when it plays `card` on the queue of `game_state`."""
+    if move is None or move.card != pack_card(card):
+        return None, None
+    return targets(packed.to_packed(game_state.queue), move)
+
+
+def play(queue, move):
+    """Resolve a move and evaluate a full queue. Returns (queue, dropped, cards to the bar)."""
+    queue, dropped = packed.resolve(queue, move.card, move.chameleon_target, move.parrot_target)
+    if len(queue) == BAR_QUEUE_LENGTH:
+        return queue[2:BAR_QUEUE_LENGTH - 1], dropped + queue[BAR_QUEUE_LENGTH - 1:], queue[:2]
+    return queue, dropped, ()
+
+
+@dataclass(frozen=True)
+class SearchState:
+    queue: Tuple[int, ...]
+    hands: Tuple[Tuple[int, ...], ...]
+    # In drawing order, the next card drawn is deck[0].
+    decks: Tuple[Tuple[int, ...], ...]
+    scores: Tuple[int, ...]
+    current_player: int
+    turn_number: int = 0
+
+    @classmethod
+    def from_game_state(cls, game_state):
+        """Full-information copy of a `GameState` whose players are seats 0..n-1."""
+        players = range(game_state.n_players)
+        scores = [0] * game_state.n_players
+        for card in game_state.cards_in_bar:
+            scores[card.player] += card.point_value
+        return cls(
+            queue=packed.to_packed(game_state.queue),
+            hands=tuple(tuple(pack_card(c) for c in game_state.table[p]['hand']) for p in players),
+            decks=tuple(tuple(pack_card(c) for c in game_state.table[p]['deck']) for p in players),
+            scores=tuple(scores),
+            current_player=game_state.current_player,
+            turn_number=game_state.turn_number,
+        )
+
+    @property
+    def n_players(self):
+        return len(self.hands)
+
+    @property
+    def finished(self):
+        return not any(self.hands)
+
+    def legal_moves(self):
+        return [move for card in self.hands[self.current_player] for move in moves_for(self.queue, card)]
+
+    def apply(self, move):
+        player = self.current_player
+        queue, _, to_bar = play(self.queue, move)
+        scores = self.scores
+        if to_bar:
+            scores = list(scores)
+            for card in to_bar:
+                scores[card & 3] += POINTS[card]
+            scores = tuple(scores)
+
+        hand = list(self.hands[player])
+        hand.remove(move.card)
+        deck = self.decks[player]
+        decks = self.decks
+        if deck:
+            hand.append(deck[0])
+            decks = decks[:player] + (deck[1:],) + decks[player + 1:]
+        hands = self.hands[:player] + (tuple(hand),) + self.hands[player + 1:]
+
+        next_player = (player + 1) % len(hands)
+        for _ in range(len(hands)):
+            if hands[next_player]:
+                break
+            next_player = (next_player + 1) % len(hands)
+        return SearchState(queue, hands, decks, scores, next_player, self.turn_number + 1)
+
+
+def visible_cards(game_state):
+    return [pack_card(card) for zone in (game_state.queue, game_state.cards_in_bar, game_state.cards_in_thrash)
+            for card in zone]
+
+
+def determinize(game_state, observer, rng: random.Random):
+    """
+    A full-information state consistent with what `observer` has seen.
+    Every player owns one card of each animal; the cards of a player which are not
+    visible yet are dealt at random into the hands and decks of the sizes they have,
+    except for the observer's own hand and thrown cards, which are known.
+    """
+    visible = set(visible_cards(game_state))
+    hands, decks = [], []
+    for player in range(game_state.n_players):
+        zones = game_state.table[player]
+        known = [pack_card(c) for c in zones['hand']] if player == observer else []
+        thrown = [pack_card(c) for c in zones['thrown']] if player == observer else []
+        unseen = [card for card in (packed.encode(value, player) for value in ANIMALS)
+                  if card not in visible and card not in known and card not in thrown]
+        rng.shuffle(unseen)
+        if player != observer:
+            known, unseen = unseen[:len(zones['hand'])], unseen[len(zones['hand']):]
+        hands.append(tuple(known))
+        decks.append(tuple(unseen[:len(zones['deck'])]))
+    return replace(SearchState.from_game_state(game_state), hands=tuple(hands), decks=tuple(decks))
+
+
+# (animals in the queue, animal played) -> positions in `queue + (card,)` of the
+# new queue, for the default choices. The outcome of a play does not depend on
+# who owns the cards, so one entry serves every player.
+_DEFAULT_TRANSITIONS = {}
+
+
+def _default_play(queue, card):
+    key = (tuple(c >> 2 for c in queue), card >> 2)
+    positions = _DEFAULT_TRANSITIONS.get(key)
+    if positions is None:
+        new_queue, _ = packed.resolve(queue, card)
+        # Every packed card appears once in a game, so positions are unambiguous.
+        cards = queue + (card,)
+        positions = _DEFAULT_TRANSITIONS[key] = tuple(cards.index(c) for c in new_queue)
+        return new_queue
+    cards = queue + (card,)
+    return tuple([cards[i] for i in positions])
+
+
+def rollout(state: SearchState, rng: random.Random):
+    """
+    Play random moves (default chameleon and parrot choices) to the end and return the scores.
+
+    About 7k rollouts a second from the first turn of a 4 player game, a few times short of
+    tens of thousands: plays already come from the value transition table, what is left is
+    the Python loop itself, about 3us a play. Bulk random games are faster in `BatchGame`.
+    """
+    queue = state.queue
+    hands = [list(hand) for hand in state.hands]
+    decks = [list(reversed(deck)) for deck in state.decks]
+    scores = list(state.scores)
+    n_players = len(hands)
+    player = state.current_player
+    resolve = _default_play
+    cards_left = sum(len(hand) for hand in hands)
+    while cards_left:
+        hand = hands[player]
+        if hand:
+            i = int(rng.random() * len(hand))
+            queue = resolve(queue, hand[i])
+            if len(queue) == BAR_QUEUE_LENGTH:
+                scores[queue[0] & 3] += POINTS[queue[0]]
+                scores[queue[1] & 3] += POINTS[queue[1]]
+                queue = queue[2:BAR_QUEUE_LENGTH - 1]
+            deck = decks[player]
+            if deck:
+                hand[i] = deck.pop()
+            else:
+                hand[i] = hand[-1]
+                hand.pop()
+                cards_left -= 1
+        player = (player + 1) % n_players
+    return scores
+
+
+def rewards(scores):
+    """1 for the single winner, shared equally between tied winners."""
+    best = max(scores)
+    winners = [score == best for score in scores]
+    share = 1 / sum(winners)
+    return [share if won else 0.0 for won in winners]
@@ -0,0 +1,167 @@
+"""
+Self-play datasets for training learned policies.
+
+Seeded `BatchGame`s are played in worker processes, and every position goes
+straight into memory-mapped .npy shards, one set of arrays per shard:
+
+    shard-00000.features.npy   (positions, N_FEATURES) uint8, see safari/features.py
+    shard-00000.legal.npy      (positions, 4) bool, playable hand slots
+    shard-00000.moves.npy      (positions,) int8, hand slot played
+    shard-00000.outcomes.npy   (positions, 4) int16, final points per seat, seat 0 being the player to move
+
+Rows are turn-major: row `turn * games + game`. `manifest.json` lists the
+shards and the feature layout, `open_shards` maps them back without copies.
+
+    python -m safari.selfplay data/ --games 100000 --seats Max Random Max Random
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from safari import features
+from safari.batch import HAND_SIZE, BatchGame, BatchMax, BatchRandom, BatchStrategy
+from safari.stacks.transitions import get_table
+from safari.utils.helpers import create_logger
+
+logger = create_logger("Selfplay")
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+ARRAYS = {
+    'features': (np.uint8, (features.N_FEATURES,)),
+    'legal': (np.bool_, (HAND_SIZE,)),
+    'moves': (np.int8, ()),
+    'outcomes': (np.int16, (features.MAX_PLAYERS,)),
+}
+BATCH_STRATEGIES = {'Max': BatchMax, 'Random': BatchRandom}
+
+
+def batch_strategy(name, seed) -> BatchStrategy:
+    strategy_class = BATCH_STRATEGIES[name]
+    return strategy_class(seed) if strategy_class is BatchRandom else strategy_class()
+
+
+class _Recorder(BatchStrategy):
+    """Keeps the hand slots the wrapped strategy chose last."""
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.slots = None
+
+    def choose(self, game, player):
+        choice = self.strategy.choose(game, player)
+        self.slots = choice[0] if isinstance(choice, tuple) else choice
+        return choice
+
+
+def shard_name(index):
+    return f"shard-{index:05d}"
+
+
+def write_shard(directory, index, seats: Sequence[str], n_games, seed) -> Dict:
+    """Plays shard `index` of the dataset of `seed` and writes its arrays."""
+    recorders = {seat: _Recorder(batch_strategy(name, [seed, index, seat])) for seat, name in enumerate(seats)}
+    game = BatchGame(n_games, recorders, seed=[seed, index]).deal()
+    n_positions = game.n_turns * n_games
+    name = shard_name(index)
+    arrays = {key: open_memmap(os.path.join(directory, f"{name}.{key}.npy"), mode='w+', dtype=dtype,
+                               shape=(n_positions,) + shape)
+              for key, (dtype, shape) in ARRAYS.items()}
+
+    movers = np.empty(game.n_turns, dtype=np.int64)
+    while not game.finished:
+        turn, player = game.turn_number, game.current_player
+        rows = slice(turn * n_games, (turn + 1) * n_games)
+        arrays['features'][rows] = features.encode_game(game)
+        arrays['legal'][rows] = features.legal_moves(game.hands[:, player])
+        movers[turn] = player
+        game.play_turn()
+        arrays['moves'][rows] = recorders[player].slots
+
+    n_players = game.n_players
+    outcomes = arrays['outcomes'].reshape(game.n_turns, n_games, features.MAX_PLAYERS)
+    for turn, player in enumerate(movers):
+        outcomes[turn, :, :n_players] = np.roll(game.scores, -player, axis=1)
+    for array in arrays.values():
+        array.flush()
+    return {'name': name, 'games': n_games, 'positions': n_positions}
+
+
+def _write_shard(args):
+    return write_shard(*args)
+
+
+def generate(directory, n_games: int, seats: Sequence[str] = ('Max',) * 4, games_per_shard: int = 4096,
+             workers: int = None, seed: int = None) -> Dict:
+    """
+    Plays `n_games` self-play games into shards of `games_per_shard` games in
+    `directory` and writes the manifest, which is returned. Shard i is dealt
+    and played from `seed` and i only, so the data does not depend on `workers`.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    os.makedirs(directory, exist_ok=True)
+    sizes = [min(games_per_shard, n_games - first) for first in range(0, n_games, games_per_shard)]
+    tasks = [(directory, index, list(seats), size, seed) for index, size in enumerate(sizes)]
+
+    # Built here once rather than by every worker on a fresh checkout.
+    get_table()
+    start = time.perf_counter()
+    if workers == 1:
+        shards = [_write_shard(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            shards = list(pool.imap(_write_shard, tasks))
+    elapsed = time.perf_counter() - start
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'seed': seed,
+        'seats': list(seats),
+        'n_features': features.N_FEATURES,
+        'layout': {name: [part.start, part.stop] for name, part in features.LAYOUT.items()},
+        'arrays': {key: np.dtype(dtype).str for key, (dtype, _) in ARRAYS.items()},
+        'games': sum(shard['games'] for shard in shards),
+        'positions': sum(shard['positions'] for shard in shards),
+        'shards': shards,
+    }
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"{manifest['positions']} positions of {manifest['games']} games in {elapsed:.1f}s "
+                f"({60 * manifest['positions'] / elapsed / 1e6:.1f}M positions/minute)")
+    return manifest
+
+
+def open_shards(directory) -> List[Dict[str, np.ndarray]]:
+    """The arrays of every shard of a dataset, memory-mapped read-only."""
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"{directory} is not a self-play dataset")
+    return [{key: np.load(os.path.join(directory, f"{shard['name']}.{key}.npy"), mmap_mode='r') for key in ARRAYS}
+            for shard in manifest['shards']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a self-play dataset of game positions.")
+    parser.add_argument("directory")
+    parser.add_argument("-n", "--games", type=int, default=10000)
+    parser.add_argument("-s", "--seats", nargs="+", default=["Max"] * 4, choices=sorted(BATCH_STRATEGIES),
+                        help="one batch strategy per seat")
+    parser.add_argument("--games-per-shard", type=int, default=4096)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    return generate(args.directory, args.games, args.seats, args.games_per_shard, args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
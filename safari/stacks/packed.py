@@ -0,0 +1,182 @@
+"""
+Compact engine for the bar queue, meant for simulations.
+
+A card is a small int `value << 2 | player` (4..51 for four players) and the queue
+is a tuple of such ints, front of the queue first.
+Every animal action of safari/cards/first_game_deck.py is reimplemented here on
+that form and `resolve` gives exactly the same result as `Queue.resolve`.
+"""
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import CARDS
+
+# Plain ints, comparing against the ANIMALS enum members is noticeably slower.
+SKUNK, PARROT, KANGAROO, MONKEY, CHAMELEON, SEAL, ZEBRA, GAZELLE, SNAKE, CROC, HIPPO, LION = range(1, 13)
+# Lookup tables indexed by card, cheaper than shifting in a Python-level key function.
+VALUE = [card >> 2 for card in range(64)]
+IS_REPEATING = [card >> 2 in (HIPPO, CROC, GAZELLE) for card in range(64)]
+IS_HIPPO_STOP = [card >> 2 in (ZEBRA, LION, HIPPO) for card in range(64)]
+IS_CROC_STOP = [card >> 2 in (ZEBRA, LION, HIPPO, CROC) for card in range(64)]
+
+
+def encode(value, player):
+    return value << 2 | player
+
+
+def value_of(card):
+    return card >> 2
+
+
+def player_of(card):
+    return card & 3
+
+
+def pack_card(card):
+    return card.value << 2 | card.player
+
+
+def unpack_card(card):
+    return CARDS[card]
+
+
+def to_packed(queue):
+    return tuple(card.value << 2 | card.player for card in queue)
+
+
+def to_queue(packed):
+    return Queue([unpack_card(card) for card in packed])
+
+
+def _split(queue, card):
+    if card in queue:
+        i = queue.index(card)
+        return queue[:i], queue[i + 1:]
+    return queue, ()
+
+
+def _after_last(queue, is_stop):
+    i = len(queue)
+    while i and not is_stop[queue[i - 1]]:
+        i -= 1
+    return i
+
+
+def _drop_value(queue, value):
+    kept = [c for c in queue if c >> 2 != value]
+    dropped = [c for c in reversed(queue) if c >> 2 == value]
+    return kept, dropped
+
+
+def monkey(queue, card):
+    monkeys = [c for c in queue if c >> 2 == MONKEY]
+    if not monkeys:
+        return queue + (card,), ()
+    queue = [card] + monkeys[::-1] + [c for c in queue if c >> 2 != MONKEY]
+    queue, dropped = _drop_value(queue, HIPPO)
+    queue, crocs = _drop_value(queue, CROC)
+    return tuple(queue), tuple(dropped + crocs)
+
+
+def lion(queue, card):
+    for c in queue:
+        if c >> 2 == LION:
+            return queue, (card,)
+    queue, dropped = _drop_value(queue, MONKEY)
+    return (card,) + tuple(queue), tuple(dropped)
+
+
+def hippo(queue, card):
+    front, rest = _split(queue, card)
+    stop = _after_last(front, IS_HIPPO_STOP)
+    return front[:stop] + (card,) + front[stop:] + rest, ()
+
+
+def croc(queue, card):
+    front, rest = _split(queue, card)
+    stop = _after_last(front, IS_CROC_STOP)
+    return front[:stop] + (card,) + rest, front[stop:]
+
+
+def snake(queue, card):
+    return tuple(reversed(sorted(queue + (card,), key=VALUE.__getitem__))), ()
+
+
+def gazelle(queue, card):
+    front, rest = _split(queue, card)
+    if front and front[-1] >> 2 <= card >> 2:
+        return front[:-1] + (card, front[-1]) + rest, ()
+    return front + (card,) + rest, ()
+
+
+def zebra(queue, card):
+    return queue + (card,), ()
+
+
+def seal(queue, card):
+    return (card,) + queue[::-1], ()
+
+
+def chameleon(queue, card):
+    return ACTIONS[chameleon_form(queue)](queue, card)
+
+
+def chameleon_form(queue, target=None):
+    """
+    Animal whose action the chameleon copies. By default the first animal in the
+    queue which is not a chameleon, with nothing to copy it behaves like a zebra.
+    """
+    if target is None:
+        for c in queue:
+            if c >> 2 != CHAMELEON:
+                return c >> 2
+        return ZEBRA
+    if queue[target] >> 2 == CHAMELEON:
+        raise ValueError("Chameleon cannot copy another chameleon")
+    return queue[target] >> 2
+
+
+def kangaroo(queue, card):
+    if len(queue) < 2:
+        return (card,) + queue, ()
+    return queue[:-2] + (card,) + queue[-2:], ()
+
+
+def parrot(queue, card, target=0):
+    if queue:
+        return queue[:target] + queue[target + 1:] + (card,), (queue[target],)
+    return (card,), ()
+
+
+def skunk(queue, card):
+    unique = sorted({VALUE[c] for c in queue} - {SKUNK})[-2:]
+    if not unique:
+        return queue + (card,), ()
+    dropped = tuple(c for value in unique for c in reversed(queue) if VALUE[c] == value)
+    return tuple(c for c in queue if VALUE[c] not in unique) + (card,), dropped
+
+
+ACTIONS = [
+    None, skunk, parrot, kangaroo, monkey, chameleon, seal, zebra, gazelle, snake, croc, hippo, lion,
+]
+
+
+def resolve(queue, card, chameleon_target=None, parrot_target=0):
+    """
+    Same as `Queue.resolve`: play `card` on `queue`, then let every repeating
+    animal already in the line act once, front to back.
+    `chameleon_target` is the index of the animal a chameleon copies and
+    `parrot_target` the index of the animal a parrot (or a chameleon copying
+    a parrot) throws out; the defaults are the choices of the object model.
+    Returns the new queue and the dropped cards, both as tuples.
+    """
+    action = card >> 2
+    if action == CHAMELEON:
+        action = chameleon_form(queue, chameleon_target)
+    if action == PARROT:
+        new_queue, dropped = parrot(queue, card, parrot_target)
+    else:
+        new_queue, dropped = ACTIONS[action](queue, card)
+    for other in new_queue:
+        if IS_REPEATING[other] and other != card:
+            new_queue, more = ACTIONS[other >> 2](new_queue, other)
+            dropped += more
+    return new_queue, dropped
@@ -1,9 +1,55 @@
-from safari.cards.base import Card
+from safari.cards.base import ANIMALS, Card
+
+BAR_QUEUE_LENGTH = 5
+# The animals with a repeating action, as a mask of their values.
+REPEATING = 1 << ANIMALS.HIPPO | 1 << ANIMALS.CROC | 1 << ANIMALS.GAZELLE
+
+
+def animal_mask(*values):
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
 
 
 class Queue(list):
-    def __init__(self, *args):
-        super().__init__(*args)
+    """
+    The line of animals, front first.
+
+    Besides the cards the queue indexes the card ids (`value << 2 | player`) by
+    position and `animals`, a bitmask of the animal values present, so presence
+    and position queries compare small ints instead of calling `Card.__eq__`.
+    The index is built on the first query: most queues the actions build in
+    between are never asked anything. Appending, inserting, popping and
+    reversing keep a built index up to date, anything else drops it.
+    """
+    _ids = None
+    _animals = None
+
+    def _index(self):
+        ids = self._ids = [card.id for card in self]
+        return ids
+
+    @property
+    def ids(self):
+        ids = self._ids
+        return self._index() if ids is None else ids
+
+    @property
+    def animals(self):
+        animals = self._animals
+        if animals is None:
+            animals = 0
+            for card_id in self.ids:
+                animals |= 1 << (card_id >> 2)
+            self._animals = animals
+        return animals
+
+    def _drop_index(self):
+        self._ids = self._animals = None
+
+    def __reduce__(self):
+        return Queue, (list(self),)
 
     def __getitem__(self, key):
         result = super().__getitem__(key)
@@ -16,40 +62,146 @@ class Queue(list):
             super().__setitem__(key, list(value))
         else:
             super().__setitem__(key, value)
+        self._drop_index()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._drop_index()
 
     def __repr__(self):
         return f"Queue({super().__repr__()})"
 
     def __add__(self, other):
-        return Queue(super().__add__(other))
+        return Queue(list.__add__(self, other))
 
     def __radd__(self, other):
-        return Queue(other) + self
+        return Queue(list.__add__(list(other), self))
+
+    def __iadd__(self, other):
+        super().__iadd__(other)
+        self._drop_index()
+        return self
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._drop_index()
+        return self
+
+    def __contains__(self, card):
+        if isinstance(card, Card):
+            return card.id in self.ids
+        return super().__contains__(card)
+
+    def index(self, card, *args):
+        if isinstance(card, Card):
+            return self.ids.index(card.id, *args)
+        return super().index(card, *args)
+
+    def append(self, card):
+        super().append(card)
+        if self._ids is not None:
+            self._ids.append(card.id)
+            if self._animals is not None:
+                self._animals |= 1 << (card.id >> 2)
+
+    def insert(self, index, card):
+        super().insert(index, card)
+        if self._ids is not None:
+            self._ids.insert(index, card.id)
+            if self._animals is not None:
+                self._animals |= 1 << (card.id >> 2)
+
+    def pop(self, index=-1):
+        card = super().pop(index)
+        if self._ids is not None:
+            self._ids.pop(index)
+            # Other cards of the same animal may be left, counted again when asked.
+            self._animals = None
+        return card
+
+    def reverse(self):
+        super().reverse()
+        if self._ids is not None:
+            self._ids.reverse()
+
+    def extend(self, cards):
+        super().extend(cards)
+        self._drop_index()
+
+    def remove(self, card):
+        super().remove(card)
+        self._drop_index()
+
+    def clear(self):
+        super().clear()
+        self._drop_index()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._drop_index()
 
     def copy(self):
         return Queue(self)
 
     @property
     def values(self):
-        return [i.value for i in self]
+        return [card_id >> 2 for card_id in self.ids]
 
     def find_indices_of(self, card):
-        return [i for i, x in enumerate(self.values) if x == card]
+        if not self.animals >> card & 1:
+            return []
+        return [i for i, card_id in enumerate(self._ids) if card_id >> 2 == card]
+
+    def after_last_of(self, mask):
+        """Position just behind the last animal whose value is in `mask`, 0 without one."""
+        if self.animals & mask:
+            ids = self._ids
+            for i in range(len(ids) - 1, -1, -1):
+                if mask >> (ids[i] >> 2) & 1:
+                    return i + 1
+        return 0
 
     def drop_card_values(self, card):
         return [self.pop(i) for i in reversed(self.find_indices_of(card))]
 
-    def resolve(self, added_card: Card):
-        all_dropped = []
+    def resolve(self, added_card: Card, chameleon_target=None, parrot_target=None):
+        """
+        Play `added_card`, then let every repeating animal already in the line act once.
+        `chameleon_target` is the position of the animal a chameleon copies and
+        `parrot_target` the one a parrot (or a chameleon copying a parrot) throws
+        out, None for the default choices. The queue itself is left unchanged,
+        returns the new queue and the dropped cards.
+        """
+        queue, dropped = self._action(added_card, chameleon_target, parrot_target)(self)
+        if queue.animals & REPEATING:
+            return queue.repeat_actions(added_card, list(dropped))
+        return queue, list(dropped)
+
+    def resolve_split(self, added_card: Card, chameleon_target=None, parrot_target=None):
+        """
+        Same as `resolve`, with the dropped cards split: returns the new queue,
+        the cards the action of `added_card` dropped and the cards the repeating
+        animals dropped after it.
+        """
+        queue, dropped = self._action(added_card, chameleon_target, parrot_target)(self)
+        repeated = []
+        if queue.animals & REPEATING:
+            queue, repeated = queue.repeat_actions(added_card, repeated)
+        return queue, list(dropped), repeated
+
+    def _action(self, added_card: Card, chameleon_target, parrot_target):
         if hasattr(added_card, 'resolve_action'):
-            added_card.resolve_action(self)
-        queue, dropped = added_card.action(self)
-        all_dropped += dropped
-        for card in queue:
-            if card == added_card:
-                continue
-            if card.repeating_action:
-                queue, dropped = card.action(queue)
-                all_dropped += dropped
+            # Cards are shared, an animal taking over another action returns it.
+            return added_card.resolve_action(self, chameleon_target, parrot_target) or added_card.action
+        return added_card.action
 
-        return queue, all_dropped
\ No newline at end of file
+    def repeat_actions(self, added_card: Card, all_dropped: list):
+        """Every hippo, croc and gazelle but `added_card` acts once, front to back."""
+        queue = self
+        repeating = [card for card, card_id in zip(self, self.ids) if REPEATING >> (card_id >> 2) & 1]
+        for card in repeating:
+            if card is added_card:
+                continue
+            queue, dropped = card.action(queue)
+            all_dropped += dropped
+        return queue, all_dropped
@@ -1,8 +1,11 @@
+import hashlib
 import random
 
 from safari.cards.first_game_deck import Chameleon, Croc, Gazelle, Hippo, Kangaroo, Lion, Monkey, Parrot, Seal, Skunk, Snake, \
     Zebra
+from safari.cards import PLAYERS
 from safari.cards.base import ANIMALS
+from safari.zones import Table
 
 NORMAL_CARDS = [Skunk, Kangaroo, Monkey, Seal, Zebra, Gazelle, Snake, Croc, Hippo, Lion]
 ANIMAL_MAPPING = {
@@ -19,18 +22,39 @@ ANIMAL_MAPPING = {
     ANIMALS.SNAKE: Snake,
     ANIMALS.ZEBRA: Zebra
 }
+# Every card of a game, indexed by its id (`value << 2 | player`).
+CARDS = [None] * 64
+for _value, _card_class in ANIMAL_MAPPING.items():
+    for _player in PLAYERS:
+        CARDS[_value << 2 | _player] = _card_class(_player)
 
 
-def init(strategies: dict):
-    players = {}
+def game_seed(master_seed: int, game_index: int) -> int:
+    """
+    Seed of game `game_index` of a run. Hashing keeps the streams of neighbouring
+    games unrelated, and any worker can derive the seed of any game on its own.
+    """
+    digest = hashlib.blake2b(f"{master_seed}:{game_index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def game_rng(master_seed: int, game_index: int) -> random.Random:
+    return random.Random(game_seed(master_seed, game_index))
+
+
+def init(strategies: dict, rng: random.Random = None):
+    """Deal the cards. Pass `rng` for a reproducible deal, the global `random` is used otherwise."""
+    rng = rng or random
+    players = Table()
     for player, strategy in strategies.items():
         all_cards = NORMAL_CARDS.copy()
         chameleon = strategy.chameleon() or Chameleon
         parrot = strategy.parrot() or Parrot
         all_cards += [chameleon, parrot]
 
+        # Interned, dealing only shuffles the shared cards of the player.
         personal_cards = [card(player) for card in all_cards]
-        random.shuffle(personal_cards)
+        rng.shuffle(personal_cards)
         players[player] = {
             'hand': [personal_cards.pop() for _ in range(4)],
             'deck': [personal_cards.pop() for _ in range(6)],
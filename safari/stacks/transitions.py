@@ -0,0 +1,205 @@
+"""
+Precomputed outcome of every play on a bar queue, memory-mapped from a binary file.
+
+Before a card is played the queue holds at most 4 cards, so the whole of
+`packed.resolve` can be enumerated offline. The outcome never depends on who owns
+the cards, only on the animals and their positions, so owners are dropped
+altogether when building the key. This is the strongest possible relabelling of
+players and keeps the table at a few MB.
+
+Every (queue animals, played animal, chameleon/parrot choice) slot holds one
+fixed-size record:
+
+    byte 0        length of the new queue (INVALID for impossible slots)
+    bytes 1-5     positions of the new queue, front first
+    byte 6        number of dropped cards
+    bytes 7-11    positions of the dropped cards, in drop order
+
+Positions index `queue + (played card,)`, so mapping the record back onto real
+cards is a tuple lookup. Build the file with
+
+    python -m safari.stacks.transitions build
+"""
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+from functools import lru_cache
+from itertools import product
+
+from safari.stacks import packed
+from safari.stacks.packed import CHAMELEON, PARROT
+
+MAGIC = b"SBQT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+RECORD_SIZE = 12
+INVALID = 255
+MAX_QUEUE = 4
+N_ANIMALS = 12
+# Each animal is owned by at most this many players.
+MAX_COPIES = 4
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "transitions.bin")
+
+# A parrot picks one of up to 4 targets, a chameleon one of 4 animals to copy and
+# (when copying a parrot) one of 4 targets for it.
+SLOT_WIDTH = [0] + [16 if value == CHAMELEON else 4 if value == PARROT else 1 for value in range(1, N_ANIMALS + 1)]
+SLOT_OFFSET = [sum(SLOT_WIDTH[:value]) for value in range(N_ANIMALS + 1)]
+SLOTS_PER_QUEUE = sum(SLOT_WIDTH)
+QUEUE_OFFSET = [sum(N_ANIMALS ** n for n in range(length)) for length in range(MAX_QUEUE + 2)]
+N_RECORDS = QUEUE_OFFSET[MAX_QUEUE + 1] * SLOTS_PER_QUEUE
+
+
+def queue_index(values):
+    index = 0
+    for value in values:
+        index = index * N_ANIMALS + value - 1
+    return QUEUE_OFFSET[len(values)] + index
+
+
+def slot_index(values, played, chameleon_target=None, parrot_target=0):
+    if not 0 <= parrot_target < 4 or not (chameleon_target is None or 0 <= chameleon_target < MAX_QUEUE):
+        raise ValueError(f"Targets out of range: chameleon {chameleon_target}, parrot {parrot_target}")
+    slot = SLOT_OFFSET[played]
+    if played == CHAMELEON:
+        if chameleon_target is None:
+            chameleon_target = next((i for i, v in enumerate(values) if v != CHAMELEON), 0)
+        slot += chameleon_target * 4 + parrot_target
+    elif played == PARROT:
+        slot += parrot_target
+    return queue_index(values) * SLOTS_PER_QUEUE + slot
+
+
+def _positions(values, played):
+    """Give every animal an owner so that no card repeats, None if there are not enough owners."""
+    seen = {}
+    cards = []
+    for value in values + (played,):
+        owner = seen.get(value, 0)
+        if owner == MAX_COPIES:
+            return None
+        seen[value] = owner + 1
+        cards.append(packed.encode(value, owner))
+    return cards
+
+
+def _record(cards, chameleon_target, parrot_target):
+    position = {card: i for i, card in enumerate(cards)}
+    new_queue, dropped = packed.resolve(tuple(cards[:-1]), cards[-1], chameleon_target, parrot_target)
+    return bytes(
+        [len(new_queue)] + [position[c] for c in new_queue] + [0] * (5 - len(new_queue))
+        + [len(dropped)] + [position[c] for c in dropped] + [0] * (5 - len(dropped))
+    )
+
+
+def _choices(values, played):
+    """Valid (chameleon target, parrot target) pairs for a play and the slot offset each is stored at."""
+    n = len(values)
+    parrot_targets = range(max(n, 1))
+    if played == PARROT:
+        return [((None, target), target) for target in parrot_targets]
+    if played != CHAMELEON:
+        return [((None, 0), 0)]
+    choices = []
+    targets = [i for i, value in enumerate(values) if value != CHAMELEON]
+    if not targets:
+        # Nothing to copy, the chameleon behaves like a zebra.
+        return [((None, 0), 0)]
+    for target in targets:
+        for parrot_target in (parrot_targets if values[target] == PARROT else [0]):
+            choices.append(((target, parrot_target), target * 4 + parrot_target))
+    return choices
+
+
+def build(path=DEFAULT_PATH):
+    table = bytearray([INVALID]) * (N_RECORDS * RECORD_SIZE)
+    for length in range(MAX_QUEUE + 1):
+        for values in product(range(1, N_ANIMALS + 1), repeat=length):
+            base = queue_index(values) * SLOTS_PER_QUEUE
+            for played in range(1, N_ANIMALS + 1):
+                cards = _positions(values, played)
+                if cards is None:
+                    continue
+                for (chameleon_target, parrot_target), slot in _choices(values, played):
+                    offset = (base + SLOT_OFFSET[played] + slot) * RECORD_SIZE
+                    table[offset:offset + RECORD_SIZE] = _record(cards, chameleon_target, parrot_target)
+
+    # A temporary file of its own, processes building the table at the same time
+    # each replace the file with a complete one.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, N_RECORDS))
+            f.write(table)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+class TransitionTable:
+    def __init__(self, buffer):
+        magic, version, record_size, n_records = HEADER.unpack_from(buffer)
+        if (magic, version, record_size, n_records) != (MAGIC, VERSION, RECORD_SIZE, N_RECORDS):
+            raise ValueError("Transition table was built by a different version, rebuild it")
+        self.buffer = buffer
+        self.records = memoryview(buffer)[HEADER.size:]
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed. Pages are shared
+            # between all processes which map the same file.
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def record(self, values, played, chameleon_target=None, parrot_target=0):
+        offset = slot_index(values, played, chameleon_target, parrot_target) * RECORD_SIZE
+        record = self.records[offset:offset + RECORD_SIZE]
+        if record[0] == INVALID:
+            raise ValueError(f"No transition for {played} played on {values} with "
+                             f"chameleon target {chameleon_target} and parrot target {parrot_target}")
+        return record
+
+    def resolve(self, queue, card, chameleon_target=None, parrot_target=0):
+        """Same as `packed.resolve`, answered by a single lookup."""
+        played = card >> 2
+        if played == CHAMELEON or played == PARROT:
+            record = self.record(tuple(c >> 2 for c in queue), played, chameleon_target, parrot_target)
+        else:
+            # Inlined `slot_index`, there are no choices to validate.
+            index = 0
+            for c in queue:
+                index = index * N_ANIMALS + (c >> 2) - 1
+            offset = ((QUEUE_OFFSET[len(queue)] + index) * SLOTS_PER_QUEUE + SLOT_OFFSET[played]) * RECORD_SIZE
+            record = self.buffer[HEADER.size + offset:HEADER.size + offset + RECORD_SIZE]
+            if record[0] == INVALID:
+                raise ValueError(f"No transition for {played} played on {[c >> 2 for c in queue]}")
+        cards = queue + (card,)
+        return (
+            tuple(cards[i] for i in record[1:1 + record[0]]),
+            tuple(cards[i] for i in record[7:7 + record[6]]),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_table(path=DEFAULT_PATH):
+    """Table of this process, built on first use if the file does not exist yet."""
+    if not os.path.exists(path):
+        build(path)
+    return TransitionTable.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the bar queue transition table.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    path = build(args.output)
+    print(f"Wrote {N_RECORDS} transitions ({os.path.getsize(path) / 2 ** 20:.1f} MB) to {path}")
+
+
+if __name__ == "__main__":
+    main()
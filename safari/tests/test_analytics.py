@@ -0,0 +1,84 @@
+import logging
+import random
+import statistics
+
+import pytest
+
+from logic import GameRunner
+from safari.analytics import CardAnalytics, RunningStats
+from safari.players.strategies import Max
+from safari.stacks.shuffle import init
+from tournament import run_tournament
+
+
+def play(analytics, n_games):
+    for _ in range(n_games):
+        GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING,
+                   observers=[analytics]).run()
+
+
+def test_every_played_card_is_counted():
+    random.seed(0)
+    analytics = CardAnalytics()
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING, observers=[analytics])
+    runner.run()
+    stats = analytics.stats.values()
+    assert sum(s['bar'].n for s in stats) == 40
+    assert round(sum(s['bar'].mean * s['bar'].n for s in stats)) == len(runner.game_state.cards_in_bar)
+    assert round(sum(s['dropped'].mean * s['dropped'].n for s in stats)) == len(runner.game_state.cards_in_thrash)
+    assert round(sum(s['points'].mean * s['points'].n for s in stats)) == sum(runner.game_state.results.values())
+    assert {key.turn for key in analytics.stats} == set(range(40))
+    assert {key.strategy for key in analytics.stats} == {'Max'}
+
+
+def test_running_stats_merge():
+    values = [random.random() for _ in range(101)]
+    left, right, whole = RunningStats(), RunningStats(), RunningStats()
+    for i, value in enumerate(values):
+        (left if i < 40 else right).add(value)
+        whole.add(value)
+    left.merge(right)
+    assert left.n == whole.n == 101
+    assert left.mean == pytest.approx(statistics.mean(values))
+    assert left.variance == pytest.approx(statistics.variance(values))
+    assert whole.variance == pytest.approx(statistics.variance(values))
+
+
+def test_merge_equals_single_run():
+    random.seed(1)
+    whole = CardAnalytics()
+    play(whole, 6)
+    random.seed(1)
+    first, second = CardAnalytics(), CardAnalytics()
+    play(first, 2)
+    play(second, 4)
+    first.merge(second)
+    assert first.n_games == whole.n_games == 6
+    assert first.stats.keys() == whole.stats.keys()
+    for key, stats in whole.stats.items():
+        assert first.stats[key]['points'].mean == pytest.approx(stats['points'].mean)
+        assert first.stats[key]['bar'].variance == pytest.approx(stats['bar'].variance)
+
+
+def test_export(tmp_path):
+    analytics = CardAnalytics()
+    play(analytics, 3)
+    path = tmp_path / "cards.csv"
+    analytics.to_csv(path)
+    lines = path.read_text().splitlines()
+    assert lines[0].split(',') == CardAnalytics.columns()
+    assert len(lines) == len(analytics.stats) + 1
+    best = analytics.best_by_turn()
+    assert sorted(best) == list(range(40))
+
+    np = pytest.importorskip('numpy')
+    array = analytics.to_numpy()
+    assert len(array) == len(analytics.stats)
+    assert array['n'].sum() == 120
+    assert np.all(array['bar_mean'] + array['dropped_mean'] <= 1)
+
+
+def test_tournament_analytics():
+    result = run_tournament({i: Max for i in range(4)}, n_games=4, workers=2, analytics=True)
+    assert result.analytics.n_games == 4
+    assert sum(s['bar'].n for s in result.analytics.stats.values()) == 160
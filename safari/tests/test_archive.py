@@ -0,0 +1,158 @@
+import logging
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from logic import GameRunner
+from safari.archive import Archive, ArchiveWriter, build
+from safari.cards.base import ANIMALS
+from safari.cards.first_game_deck import Croc, Hippo, Lion, Seal, Skunk
+from safari.players.strategies import Max, Strategy
+from safari.records import GameRecorder, GameRecordWriter
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import game_rng, init
+
+SEATS = {0: Max, 1: Max, 2: Max, 3: Max}
+
+
+class Lowest(Strategy):
+    def strategy(self, cards):
+        return min(cards, key=lambda card: card.value)
+
+
+def play(writer, seed, strategies=SEATS, turns=None):
+    observers = [GameRecorder(writer, seed=seed)] if writer else []
+    runner = GameRunner(init(strategies, rng=game_rng(0, seed)), log_level=logging.WARNING, observers=observers)
+    if turns is None:
+        runner.run()
+    else:
+        for _ in range(turns):
+            runner.play_turn()
+    return runner
+
+
+def assert_same_state(state, expected):
+    assert state.queue == expected.queue
+    assert list(state.cards_in_bar) == list(expected.cards_in_bar)
+    assert list(state.cards_in_thrash) == list(expected.cards_in_thrash)
+    assert state.turn_number == expected.turn_number
+    assert state.current_player == expected.current_player
+    for player in expected.table:
+        assert set(state.table[player]['hand']) == set(expected.table[player]['hand'])
+
+
+@pytest.fixture(scope='module')
+def archive(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('archive')
+    with ArchiveWriter(directory, buffer_size=7) as writer:
+        states = [play(writer, seed).game_state for seed in range(30)]
+    return Archive(directory), states
+
+
+def test_columns(archive):
+    archive, states = archive
+    assert len(archive) == 30
+    assert archive.strategies == ['Max']
+    assert archive.columns['seed'].tolist() == list(range(30))
+    for game_id, state in enumerate(states):
+        assert archive.columns['scores'][game_id].tolist() == [state.results.get(seat, 0) for seat in range(4)]
+        assert archive.columns['n_turns'][game_id] == state.turn_number
+
+
+def test_queries_match_a_scan(archive):
+    archive, states = archive
+    scores = archive.columns['scores']
+    for seat in range(4):
+        best = scores.max(axis=1)
+        expected = [i for i in range(30) if scores[i, seat] == best[i] and (scores[i] == best[i]).sum() == 1]
+        assert archive.games(winner=seat).tolist() == expected
+    assert archive.games(scores={2: (10, None)}).tolist() == [i for i in range(30) if scores[i, 2] >= 10]
+    assert archive.games(scores={0: (None, 5), 1: 0}).tolist() == \
+        [i for i in range(30) if scores[i, 0] <= 5 and scores[i, 1] == 0]
+    assert archive.games(strategies={0: 'Max'}).tolist() == list(range(30))
+    assert archive.games(strategies={0: 'ISMCTS'}).tolist() == []
+    assert archive.games().tolist() == list(range(30))
+
+    cards, dropped = archive.turns['card'], archive.turns['dropped']
+    skunk_drops = [i for i in range(30) if ((cards[i] >> 2 == ANIMALS.SKUNK) & (dropped[i] >= 2)).any()]
+    assert archive.games(played=ANIMALS.SKUNK, dropped=(2, None)).tolist() == skunk_drops
+    lions = [i for i in range(30) if (cards[i] >> 2 == ANIMALS.LION).any()]
+    assert archive.games(played=ANIMALS.LION).tolist() == lions
+
+
+def test_decodes_states(archive):
+    archive, states = archive
+    for game_id in (0, 17, 29):
+        assert_same_state(archive.state(game_id), states[game_id])
+    assert archive.state(3).results == states[3].results
+
+    for turn in (0, 13):
+        assert_same_state(archive.state(4, turn=turn), play(None, 4, turns=turn).game_state)
+
+
+def test_append_and_build_from_records(tmp_path):
+    path = tmp_path / 'games.sbgr'
+    with GameRecordWriter(path) as writer:
+        for seed in range(3):
+            play(writer, seed)
+    build(path, tmp_path / 'archive')
+    strategies = {0: Max, 1: Lowest, 2: Max, 3: Max}
+    with ArchiveWriter(tmp_path / 'archive') as writer:
+        lowest = play(writer, 3, strategies=strategies).game_state
+    archive = build(path, tmp_path / 'archive')
+    assert len(archive) == 7
+    assert archive.columns['seed'].tolist() == [0, 1, 2, 3, 0, 1, 2]
+    assert archive.strategies == ['Max', 'Lowest']
+    assert archive.games(strategies={1: 'Lowest'}).tolist() == [3]
+    assert archive.games(strategies={0: 'Max', 1: 'Max'}).tolist() == [0, 1, 2, 4, 5, 6]
+    # Unknown strategies sit as Max, the recorded moves are played all the same.
+    assert_same_state(archive.state(3), lowest)
+
+
+def test_reopening_drops_rows_of_an_unclosed_writer(tmp_path):
+    with ArchiveWriter(tmp_path) as writer:
+        play(writer, 0)
+    crashed = ArchiveWriter(tmp_path, buffer_size=1)
+    play(crashed, 1)
+    assert crashed.n_games == 2
+    with ArchiveWriter(tmp_path) as writer:
+        assert writer.n_games == 1
+        state = play(writer, 2).game_state
+    archive = Archive(tmp_path)
+    assert archive.columns['seed'].tolist() == [0, 2]
+    assert_same_state(archive.state(1), state)
+
+
+def test_indexes_past_the_manifest_are_ignored(tmp_path):
+    with ArchiveWriter(tmp_path) as writer:
+        play(writer, 0)
+    manifest = (tmp_path / 'manifest.json').read_text()
+    with ArchiveWriter(tmp_path) as writer:
+        play(writer, 1)
+    # A writer which died after the indexes, before the manifest.
+    (tmp_path / 'manifest.json').write_text(manifest)
+    archive = Archive(tmp_path)
+    assert archive.games().tolist() == archive.games(strategies={0: 'Max'}).tolist() == [0]
+    for animal in ANIMALS:
+        expected = [0] if (archive.turns['card'][0] >> 2 == animal).any() else []
+        assert archive.games(played=animal).tolist() == expected
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_dropped_counts_only_the_played_card(tmp_path):
+    recorder = GameRecorder(None)
+    runner = GameRunner(init(SEATS, rng=game_rng(0, 0)), log_level=logging.WARNING, observers=[recorder])
+    state = runner.game_state
+    state.queue = Queue([Lion(0), Hippo(1), Seal(2), Croc(3)])
+    state.table[0]['hand'][0] = Skunk(0)
+    # The skunk throws out the lion and the hippo, the croc then eats the seal.
+    runner.update_game_state(Skunk(0))
+    turn = recorder.record.turns[0]
+    assert (turn.dropped, len(turn.to_thrash)) == (2, 3)
+    with ArchiveWriter(tmp_path) as writer:
+        writer.write(recorder.record)
+    archive = Archive(tmp_path)
+    assert archive.turns['repeat_dropped'][0, 0] == 1
+    assert archive.games(played=ANIMALS.SKUNK, dropped=2).tolist() == [0]
+    assert archive.games(played=ANIMALS.SKUNK, dropped=3).tolist() == []
@@ -0,0 +1,50 @@
+import logging
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from logic import GameRunner
+from safari.batch import BatchGame, BatchMax
+from safari.players.strategies import Max
+from safari.stacks.shuffle import init
+
+
+def test_matches_game_runner():
+    random.seed(0)
+    tables = [init(strategies={i: Max for i in range(4)}) for _ in range(50)]
+    game = BatchGame.from_tables(tables, {i: BatchMax() for i in range(4)})
+    scores = game.run()
+
+    for i, table in enumerate(tables):
+        runner = GameRunner(table, log_level=logging.WARNING)
+        runner.run()
+        expected = [runner.game_state.results.get(player, 0) for player in range(4)]
+        assert scores[i].tolist() == expected
+        assert game.bar[i].sum() == len(runner.game_state.cards_in_bar)
+        assert game.thrash[i].sum() == len(runner.game_state.cards_in_thrash)
+
+
+def test_deal_and_run():
+    game = BatchGame(200, {i: BatchMax() for i in range(4)}, seed=1).deal()
+    for player in range(4):
+        cards = np.concatenate([game.hands[:, player], game.decks[:, player]], axis=1)
+        assert (cards & 3 == player).all()
+        assert (np.sort(cards >> 2, axis=1)[:, 1:] != np.sort(cards >> 2, axis=1)[:, :-1]).all()
+    game.run()
+    assert game.finished
+    assert (game.hands == -1).all()
+    # Every card ends in the bar, in the thrash or in the queue.
+    assert ((game.bar.sum(axis=1) + game.thrash.sum(axis=1) + game.queue_length) == 40).all()
+    assert game.winners().shape == (200,)
+
+
+def test_invalid_target():
+    class ParrotFar(BatchMax):
+        def choose(self, game, player):
+            return super().choose(game, player), None, np.full(game.n_games, 7)
+
+    game = BatchGame(3, {i: ParrotFar() for i in range(4)}, seed=0).deal()
+    with pytest.raises(ValueError):
+        game.play_turn()
@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.__main__ import load_baseline, main, regressions, run, save_baseline
+from benchmarks.suite import BENCHMARKS, action_cases
+from safari.cards.base import ANIMALS
+
+
+def result(value, higher_is_better=True):
+    return {"value": value, "unit": "x/s", "higher_is_better": higher_is_better}
+
+
+def test_regressions():
+    baseline = {"rate": result(100), "memory": result(100, False), "gone": result(1)}
+    assert regressions({"rate": result(95), "memory": result(105, False)}, baseline, 0.1) == []
+    assert regressions({"rate": result(85), "memory": result(80, False)}, baseline, 0.1) == ["rate"]
+    assert regressions({"rate": result(200), "memory": result(115, False), "new": result(1)},
+                       baseline, 0.1) == ["memory"]
+
+
+def test_workloads_are_seeded():
+    assert action_cases(ANIMALS.CROC, 50) == action_cases(ANIMALS.CROC, 50)
+    assert action_cases(ANIMALS.CROC, 50) != action_cases(ANIMALS.HIPPO, 50)
+    assert {len(queue) for queue, _ in action_cases(ANIMALS.LION, 50)} == {0, 1, 2, 3, 4}
+    assert len(BENCHMARKS) == len(ANIMALS) + 7 + 3
+
+
+def test_baseline_round_trip(tmp_path):
+    names = ["action.zebra", "memory.game_log"]
+    results = run(names, scale=0.01, repeat=1, report=lambda line: None)
+    assert all(results[name]["value"] > 0 for name in names)
+    path = tmp_path / "baseline.json"
+    save_baseline(path, results)
+    assert load_baseline(path) == results
+
+    slower = dict(results, **{"action.zebra": result(results["action.zebra"]["value"] * 1000)})
+    save_baseline(path, slower)
+    assert main(["-k", "zebra", "--scale", "0.01", "--repeat", "1", "--baseline", str(path)]) == 1
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.json"
+    path.write_text("{}")
+    with pytest.raises(ValueError):
+        load_baseline(path)
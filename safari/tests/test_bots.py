@@ -0,0 +1,93 @@
+import io
+import json
+import sys
+
+from safari.bots import BotProcess, decode_request, encode_request, play_batched, serve
+from safari.game_state import GameState
+from safari.players.strategies import Max, Strategy, strategy_max
+from safari.stacks.shuffle import game_rng, init
+from tournament import play_game
+
+MAX_BOT = [sys.executable, "-m", "safari.bots", "serve", "--strategy", "Max"]
+
+
+class Lowest(Strategy):
+    def strategy(self, cards):
+        return min(cards, key=lambda card: card.value)
+
+
+def local_results(strategies, n_games, seed):
+    return [play_game(strategies, rng=game_rng(seed, game)) for game in range(n_games)]
+
+
+def dealt_states(n_games, seed=0):
+    states = []
+    for game in range(n_games):
+        table = init({seat: Max for seat in range(4)}, rng=game_rng(seed, game))
+        states.append(GameState(players=list(table), n_players=4, table=table))
+    return states
+
+
+def test_serve_answers_a_batch():
+    states = dealt_states(3)
+    requests = [(state, state.current_player) for state in states]
+    stdout = io.BytesIO()
+    serve(Max(), io.BytesIO(encode_request(3, requests) * 2), stdout)
+    replies = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert len(replies) == 2
+    expected = [state.table[0]['hand'].index(strategy_max(state.table[0]['hand'])) for state in states]
+    assert replies[0] == {"batch": 3, "decisions": [[index, None, None] for index in expected]}
+
+
+def test_request_round_trip():
+    state = dealt_states(1)[0]
+    batch, [(decoded, player)] = decode_request(encode_request(5, [(state, 2)]))
+    assert (batch, player) == (5, 2)
+    assert decoded.table[2]['hand'] == state.table[2]['hand']
+
+
+def test_bot_plays_like_the_strategy_in_process():
+    bot = BotProcess(MAX_BOT)
+    try:
+        results = play_batched({0: bot, 1: Max, 2: bot, 3: Max}, 12, batch_size=5, seed=4)
+    finally:
+        bot.close()
+    assert results == local_results({seat: Max for seat in range(4)}, 12, seed=4)
+    assert bot.stats.fallbacks == 0
+    # The games move in lockstep, so every batch holds all the games running: 3 rounds of 5, 5 and 2 games.
+    assert bot.stats.decisions == 12 * 20
+    assert bot.stats.batches == 3 * 20
+
+
+def test_local_seats_only():
+    strategies = {seat: Lowest if seat % 2 else Max for seat in range(4)}
+    assert play_batched(strategies, 3, seed=1) == local_results(strategies, 3, seed=1)
+
+
+def test_timeout_falls_back_to_max():
+    bot = BotProcess([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.2, max_restarts=1)
+    try:
+        results = play_batched({0: bot, 1: Max, 2: Max, 3: Max}, 2, seed=0)
+    finally:
+        bot.close()
+    assert results == local_results({seat: Max for seat in range(4)}, 2, seed=0)
+    assert bot.stats.timeouts == 2 and bot.stats.restarts == 1
+    assert bot.stats.fallbacks == 2 * 10
+
+
+def test_dead_and_illegal_bots_fall_back():
+    dead = BotProcess([sys.executable, "-c", "pass"], max_restarts=0)
+    illegal = BotProcess([sys.executable, "-c",
+                          "import json, sys\n"
+                          "for line in sys.stdin:\n"
+                          "    batch = json.loads(line)\n"
+                          "    print(json.dumps({'batch': batch['batch'],"
+                          " 'decisions': [[9, None, None]] * len(batch['requests'])}), flush=True)"])
+    try:
+        results = play_batched({0: dead, 1: illegal, 2: Max, 3: Max}, 2, seed=0)
+    finally:
+        dead.close()
+        illegal.close()
+    assert results == local_results({seat: Max for seat in range(4)}, 2, seed=0)
+    assert dead.stats.failures == 1 and dead.stats.fallbacks == 20
+    assert illegal.stats.failures == 0 and illegal.stats.fallbacks == 20
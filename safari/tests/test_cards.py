@@ -0,0 +1,72 @@
+import copy
+import pickle
+
+import pytest
+
+from safari.cards.first_game_deck import Chameleon, Hippo, Lion, Monkey, Parrot, Seal, Skunk, Snake
+from safari.players.strategies import Max
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import CARDS, init
+
+
+def test_cards_are_interned():
+    assert Lion(0) is Lion(0)
+    assert Lion(0) is not Lion(1)
+    assert CARDS[Lion(2).id] is Lion(2)
+    assert all(card is None or CARDS[card.id] is card for card in CARDS)
+
+
+def test_deals_share_the_cards():
+    first, second = init({0: Max, 1: Max}), init({0: Max, 1: Max})
+    cards = {id(card) for table in (first, second) for zone in table.values()
+             for key in ('hand', 'deck', 'thrown') for card in zone[key]}
+    assert len(cards) == 24
+
+
+def test_hash_and_equality():
+    assert {Lion(0), Lion(0), Lion(1), Monkey(0)} == {Lion(0), Lion(1), Monkey(0)}
+    assert {Hippo(3): 1}[Hippo(3)] == 1
+    assert Lion(0) != Lion(1) and Lion(0) != Monkey(0)
+    assert Lion(0) != 'Lion'
+    assert Lion(0).id == 12 << 2
+
+
+def test_cards_are_immutable():
+    with pytest.raises(AttributeError):
+        Lion(0).player = 1
+    with pytest.raises(AttributeError):
+        Lion(0).action = None
+    assert not hasattr(Lion(0), '__dict__')
+
+
+def test_copies_are_the_same_card():
+    assert pickle.loads(pickle.dumps(Skunk(1))) is Skunk(1)
+    assert copy.copy(Skunk(1)) is Skunk(1)
+    assert copy.deepcopy([Skunk(1)])[0] is Skunk(1)
+
+
+def test_display_strings():
+    assert str(Lion(0)) == f'Lion 🦁 ({Lion.value}) 🟦 '
+    assert Hippo(1).short_name == '🦛🟩'
+    assert Hippo(1).long_name == f'Hippo 🦛 {Hippo.value} 🟩 (2pt) - repeating'
+    assert repr(Chameleon(2)) == 'Chameleon(2)'
+
+
+def test_playing_a_chameleon_leaves_it_unchanged():
+    action = Chameleon.action
+    queue, _ = Queue([Lion(1)]).resolve(Chameleon(0))
+    assert queue == [Lion(1)] and _ == [Chameleon(0)]
+    assert Chameleon(0).action.__func__ is action
+    queue, _ = Queue([Seal(1), Lion(2)]).resolve(Chameleon(0))
+    assert queue == [Chameleon(0), Lion(2), Seal(1)]
+
+
+@pytest.mark.parametrize('card, chameleon_target, parrot_target', [
+    (Parrot(3), None, -1), (Parrot(3), None, 2), (Chameleon(3), -1, None), (Chameleon(3), 2, None),
+    (Chameleon(3), 0, 5), (Chameleon(3), 0, -2),
+])
+def test_targets_out_of_the_queue(card, chameleon_target, parrot_target):
+    queue = Queue([Parrot(0), Snake(1)])
+    with pytest.raises(ValueError):
+        queue.resolve(card, chameleon_target, parrot_target)
+    assert queue.resolve(Parrot(3), None, 1)[0] == [Parrot(0), Parrot(3)]
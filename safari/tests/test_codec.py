@@ -0,0 +1,111 @@
+import json
+import logging
+
+import pytest
+
+from logic import GameRunner
+from safari import codec
+from safari.cards.first_game_deck import Hippo, Lion, Monkey
+from safari.game_state import GameState
+from safari.players.strategies import Max
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import init
+
+# Written by GameState.to_json before the codec existed.
+LEGACY_JSON = (
+    '{"cards_in_bar": [{"animal": 12, "player": 0}], "cards_in_thrash": [{"animal": 4, "player": 1}], '
+    '"queue": [{"animal": 12, "player": 0}, {"animal": 4, "player": 1}], "old_queue": [{"animal": 11, "player": 2}], '
+    '"players": [0, 1, 2], "current_player": 0, "n_players": 3, "turn_number": 5, "table": {'
+    '"0": {"hand": [{"animal": 12, "player": 0}, {"animal": 4, "player": 0}], "deck": [{"animal": 11, "player": 0}], '
+    '"thrown": [], "strategy": "Max", "finished": false}, '
+    '"1": {"hand": [{"animal": 4, "player": 1}, {"animal": 11, "player": 1}], "deck": [{"animal": 12, "player": 1}], '
+    '"thrown": [], "strategy": "Max", "finished": false}, '
+    '"2": {"hand": [{"animal": 11, "player": 2}, {"animal": 12, "player": 2}], "deck": [{"animal": 4, "player": 2}], '
+    '"thrown": [], "strategy": "Max", "finished": false}}, '
+    '"finished": false, "results": {"0": 4, "2": 3}, "last_queue_evaluation": null}'
+)
+
+
+@pytest.fixture
+def legacy_state():
+    return GameState(
+        cards_in_bar=[Lion(0)],
+        cards_in_thrash=[Monkey(1)],
+        queue=Queue([Lion(0), Monkey(1)]),
+        old_queue=Queue([Hippo(2)]),
+        players=[0, 1, 2],
+        current_player=0,
+        n_players=3,
+        turn_number=5,
+        table={
+            0: {'hand': [Lion(0), Monkey(0)], 'deck': [Hippo(0)], 'thrown': [], 'strategy': Max(), 'finished': False},
+            1: {'hand': [Monkey(1), Hippo(1)], 'deck': [Lion(1)], 'thrown': [], 'strategy': Max(), 'finished': False},
+            2: {'hand': [Hippo(2), Lion(2)], 'deck': [Monkey(2)], 'thrown': [], 'strategy': Max(), 'finished': False},
+        },
+        finished=False,
+        results={0: 4, 2: 3},
+    )
+
+
+@pytest.fixture(scope='module')
+def played_states():
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING)
+    states = []
+    while not runner.game_state.finished:
+        runner.play_turn()
+        states.append(runner.game_state.to_json())
+    return [GameState.from_json(state) for state in states]
+
+
+def test_to_json_matches_legacy_format(legacy_state):
+    assert legacy_state.to_json() == LEGACY_JSON
+
+
+def test_from_legacy_json(legacy_state):
+    state = GameState.from_json(LEGACY_JSON)
+    assert state.results == {0: 4, 2: 3}
+    assert state.to_json() == LEGACY_JSON
+    assert isinstance(state.queue, Queue)
+    assert isinstance(state.table[1]['strategy'], Max)
+
+
+def test_played_states_keep_queue_evaluation(played_states):
+    evaluated = [state for state in played_states if state.last_queue_evaluation is not None]
+    assert evaluated
+    assert all(len(state.last_queue_evaluation.to_winners) == 2 for state in evaluated)
+
+
+@pytest.mark.parametrize('encode,decode', [
+    (codec.to_json, codec.from_json),
+    (codec.to_lean_json, codec.from_lean_json),
+    (codec.to_bytes, lambda data: codec.from_bytes(data)[0]),
+])
+def test_round_trip(played_states, encode, decode):
+    for state in played_states:
+        decoded = decode(encode(state))
+        assert decoded.to_json() == state.to_json()
+        assert decoded.results == state.results
+
+
+def test_binary_is_compact(played_states):
+    state = played_states[10]
+    assert len(state.to_bytes()) * 5 < len(state.to_json())
+    assert GameState.from_bytes(state.to_bytes()).to_json() == state.to_json()
+
+
+def test_load_many(tmp_path, played_states):
+    binary = tmp_path / 'states.bin'
+    GameState.dump_many(played_states, binary)
+    lines = tmp_path / 'states.jsonl'
+    lines.write_text('\n'.join(state.to_json() for state in played_states))
+
+    for path in (binary, lines):
+        loaded = GameState.load_many(path)
+        assert [state.to_json() for state in loaded] == [state.to_json() for state in played_states]
+
+
+def test_unknown_strategy_in_lean_json(legacy_state):
+    data = json.loads(codec.to_lean_json(legacy_state))
+    data['table']['0']['strategy'] = 'UnknownStrategy'
+    with pytest.raises(ValueError, match="Unknown strategy: UnknownStrategy"):
+        codec.from_lean_json(json.dumps(data))
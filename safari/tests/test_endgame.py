@@ -0,0 +1,80 @@
+import logging
+import random
+
+import pytest
+
+from logic import GameRunner
+from safari.players.endgame import Endgame, EndgameSolver, NodeBudgetExceeded
+from safari.players.strategies import Max
+from safari.search import rewards
+from safari.stacks.packed import pack_card
+from safari.stacks.shuffle import init
+
+
+def max_n(state):
+    """Plain max-n without pruning or transpositions."""
+    if state.finished:
+        return tuple(rewards(state.scores))
+    player = state.current_player
+    return max((max_n(state.apply(move)) for move in state.legal_moves()), key=lambda value: value[player])
+
+
+def endgame_runner(seed, turns):
+    random.seed(seed)
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING)
+    for _ in range(turns):
+        runner.play_turn()
+    return runner
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_solver_matches_plain_max_n(seed):
+    runner = endgame_runner(seed, 31)
+    game_state = runner.game_state
+    for state in Endgame(max_worlds=3, seed=seed).worlds(game_state, game_state.current_player):
+        player = state.current_player
+        values = EndgameSolver().evaluate(state)
+        assert set(values) == set(state.legal_moves())
+        for move, value in values.items():
+            assert value[player] == max_n(state.apply(move))[player]
+        assert max(value[player] for value in values.values()) == max_n(state)[player]
+
+
+def test_worlds_are_consistent():
+    runner = endgame_runner(4, 28)
+    game_state = runner.game_state
+    player = game_state.current_player
+    worlds = Endgame(max_worlds=10 ** 6).worlds(game_state, player)
+    # Three cards in hand out of five unseen for each opponent.
+    assert len(worlds) == 10 ** 3
+    assert len(set(worlds)) == len(worlds)
+    own = tuple(sorted(pack_card(card) for card in game_state.table[player]['hand']))
+    assert all(world.hands[player] == own for world in worlds)
+    assert len(Endgame(max_worlds=5).worlds(game_state, player)) == 5
+
+
+def test_node_budget():
+    runner = endgame_runner(5, 30)
+    world = Endgame(max_worlds=1).worlds(runner.game_state, runner.game_state.current_player)[0]
+    with pytest.raises(NodeBudgetExceeded):
+        EndgameSolver().evaluate(world, node_budget=10)
+
+
+def test_endgame_plays_a_game():
+    random.seed(6)
+    table = init(strategies={i: Max for i in range(4)})
+    strategy = table[2]['strategy'] = Endgame(max_cards=8, seed=0)
+    runner = GameRunner(table, log_level=logging.WARNING)
+    runner.run()
+    assert runner.game_state.finished
+    assert strategy.stats.solved == 2
+    assert strategy.stats.nodes > 0 and 0 <= strategy.stats.tt_hit_rate <= 1
+    assert 'nodes/s' in str(strategy.stats)
+
+
+def test_falls_back_when_over_budget():
+    random.seed(6)
+    table = init(strategies={i: Max for i in range(4)})
+    strategy = table[2]['strategy'] = Endgame(node_budget=5, seed=0)
+    GameRunner(table, log_level=logging.WARNING).run()
+    assert strategy.stats.fallbacks > 0
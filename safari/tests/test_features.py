@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from logic import GameRunner
+from safari import features
+from safari.batch import BatchGame, BatchMax
+from safari.players.strategies import Max
+from safari.stacks.shuffle import game_rng, init
+
+
+def test_layout():
+    assert features.N_FEATURES == 5 * 16 + 4 * 12 + 3 * 12 + 4 + 4 + 1
+    assert features.LAYOUT['turn'].stop == features.N_FEATURES
+
+
+def test_states_encode_like_the_batch_game():
+    tables = [init({seat: Max for seat in range(4)}, rng=game_rng(3, game)) for game in range(20)]
+    game = BatchGame.from_tables(tables, {seat: BatchMax() for seat in range(4)})
+    runners = [GameRunner(table, log_level=logging.WARNING) for table in tables]
+    hand = features.HAND
+    while not game.finished:
+        batch = features.encode_game(game)
+        states = features.encode_states([runner.game_state for runner in runners])
+        # Hands are the same cards, in another order once drawn.
+        rest = np.ones(features.N_FEATURES, dtype=bool)
+        rest[hand] = False
+        assert (batch[:, rest] == states[:, rest]).all()
+        assert (batch[:, hand].reshape(20, 4, 12).sum(axis=1) == states[:, hand].reshape(20, 4, 12).sum(axis=1)).all()
+        game.play_turn()
+        for runner in runners:
+            runner.play_turn()
+
+
+def test_features_of_a_position():
+    game = BatchGame(1, {seat: BatchMax() for seat in range(4)}, seed=0).deal()
+    for _ in range(6):
+        game.play_turn()
+    row = features.encode_game(game)[0]
+    queue = row[features.QUEUE].reshape(5, 16)
+    assert queue[:, :12].sum() == queue[:, 12:].sum() == game.queue_length[0]
+    # Owners are counted from seat 2, the player to move.
+    assert game.current_player == 2
+    first = game.queue[0, 0]
+    assert queue[0, (first >> 2) - 1] == 1 and queue[0, 12 + ((first & 3) - 2) % 4] == 1
+    assert row[features.HAND].sum() == 4
+    unseen = row[features.UNSEEN].reshape(3, 12)
+    # Seats 3, 0 and 1 played one, two and two cards.
+    assert unseen.sum(axis=1).tolist() == [11, 10, 10]
+    assert row[features.TURN] == 6
+    assert (features.legal_moves(game.hands[:, 2]) == [[True] * 4]).all()
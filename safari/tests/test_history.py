@@ -0,0 +1,72 @@
+import logging
+import pickle
+
+import pytest
+
+from logic import GameRunner
+from safari.cards.first_game_deck import Lion, Monkey
+from safari.history import GameHistory
+from safari.players.strategies import Max
+from safari.stacks.shuffle import init
+
+
+@pytest.fixture
+def game_runner():
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING)
+    runner.run()
+    return runner
+
+
+def test_snapshots_keep_their_turn(game_runner):
+    history = game_runner.game_log
+    assert len(history) == 40
+    assert [snapshot.turn_number for snapshot in history] == list(range(1, 41))
+    assert [len(snapshot.cards_in_bar) for snapshot in history] == sorted(len(s.cards_in_bar) for s in history)
+    assert len(history[0].cards_in_bar) == 0
+    assert history[-1].cards_in_bar == game_runner.game_state.cards_in_bar
+    assert list(history[-1].queue) == list(game_runner.game_state.queue)
+    assert sum(len(zone.hand) for zone in history[0].table.values()) == 16
+    assert history[-1].finished and not history[0].finished
+
+
+def test_unchanged_zones_are_shared(game_runner):
+    history = game_runner.game_log
+    for previous, snapshot in zip(history, history[1:]):
+        changed = [p for p in snapshot.table if snapshot.table[p] is not previous.table[p]]
+        assert changed == [previous.current_player]
+        assert snapshot.old_queue is previous.queue
+        assert snapshot.cards_in_bar._cards is previous.cards_in_bar._cards
+
+
+def test_to_dict_has_game_state_keys(game_runner):
+    assert set(game_runner.game_log[3].to_dict()) == set(game_runner.game_state.to_dict())
+
+
+def test_to_dicts(game_runner):
+    dicts = game_runner.game_log.to_dicts()
+    assert len(dicts) == len(game_runner.game_log)
+    assert dicts[3]['queue'] == game_runner.game_log[3].queue
+    assert dicts[-1]['cards_in_bar'] == list(game_runner.game_state.cards_in_bar)
+    assert pickle.loads(pickle.dumps(dicts))[3]['turn_number'] == dicts[3]['turn_number']
+
+
+def test_ring_buffer():
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING, history_length=5)
+    runner.run()
+    history = runner.game_log
+    assert len(history) == 5
+    assert history.first_turn == 35
+    assert [snapshot.turn_number for snapshot in history] == [36, 37, 38, 39, 40]
+    with pytest.raises(IndexError):
+        history[5]
+
+
+def test_rewound_pile_does_not_change_old_snapshots(game_runner):
+    state = game_runner.game_state
+    history = GameHistory()
+    state.cards_in_bar = [Lion(0), Monkey(1)]
+    first = history.record(state)
+    state.cards_in_bar = [Monkey(2)]
+    second = history.record(state)
+    assert list(first.cards_in_bar) == [Lion(0), Monkey(1)]
+    assert list(second.cards_in_bar) == [Monkey(2)]
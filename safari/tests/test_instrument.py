@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+from logic import GameRunner
+from safari.cards.first_game_deck import Croc
+from safari.instrument import instrumented, profile_run
+from safari.players.strategies import Max
+from safari.stacks.queue import Queue
+from tournament import run_tournament
+
+STRATEGIES = {seat: Max for seat in range(4)}
+
+
+def test_counters():
+    plain = run_tournament(STRATEGIES, 5, workers=1, seed=3)
+    with instrumented() as counters:
+        result = run_tournament(STRATEGIES, 5, workers=1, seed=3)
+    assert result.seat_points == plain.seat_points
+    # Every card but the two thrown ones of each player is played.
+    assert sum(timing.calls for timing in counters.actions.values()) >= 5 * 4 * 10
+    assert counters.actions['Croc'].seconds > 0 and counters.repeating.calls > 0
+    assert counters.phases['strategy'] > 0 and counters.phases['engine'] > 0
+    assert 'Croc' in counters.report()
+
+
+def test_patches_are_removed():
+    originals = Croc.action, Queue.repeat_actions, GameRunner.play_turn
+    log = logging.Logger._log
+    with pytest.raises(KeyError):
+        with instrumented():
+            assert Croc.action is not originals[0]
+            # Loggers outside the engine are left alone.
+            assert logging.Logger._log is log
+            raise KeyError
+    assert (Croc.action, Queue.repeat_actions, GameRunner.play_turn) == originals
+    with instrumented():
+        with pytest.raises(RuntimeError):
+            with instrumented():
+                pass
+
+
+def test_profile_run_writes_collapsed_stacks(tmp_path):
+    path = tmp_path / "stacks.folded"
+    result, report = profile_run(lambda: run_tournament(STRATEGIES, 3, workers=1, seed=1), path)
+    assert result.n_games == 3
+    assert report.peak_memory > 0 and report.top_allocations
+    lines = path.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("resolve_split (queue.py" in line for line in lines)
+    assert "peak traced memory" in str(report)
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from league import SPRT, EloRatings, run_league
+from safari.players.ismcts import ISMCTS
+from safari.players.strategies import Max, Player
+
+
+class QuickISMCTS(ISMCTS):
+    def __init__(self):
+        super().__init__(iterations=15, seed=0)
+
+
+def test_league_stops_when_decided():
+    random.seed(0)
+    result = run_league({'Max': Max, 'ISMCTS': QuickISMCTS}, max_games=200, elo=150, workers=1)
+    [pairing] = result.pairings
+    assert pairing.winner == 'ISMCTS'
+    assert pairing.games < 200
+    assert result.ratings['ISMCTS'] > result.ratings['Max']
+    assert result.table().splitlines()[1].split()[1] == 'ISMCTS'
+
+
+def test_league_undecided_after_max_games():
+    result = run_league({'Max': Max, 'Copy': Max}, max_games=6, workers=1)
+    [pairing] = result.pairings
+    assert pairing.games == 6 and pairing.winner is None
+    assert 'undecided' in result.table()
+
+
+def test_league_pool():
+    result = run_league({'Max': Max, 'Copy': Max}, max_games=4, workers=2)
+    assert result.n_games == 4
+
+
+def test_league_rejects_human_player():
+    with pytest.raises(ValueError, match="human player"):
+        run_league({'Max': Max, 'Player': Player})
+
+
+def test_sprt_and_elo():
+    test = SPRT(elo=30, alpha=0.05, beta=0.05)
+    for _ in range(1000):
+        test.add(0.5)
+        assert test.decision == 0
+    test.add(1)
+    ratings = EloRatings(k=10)
+    ratings.update('a', 'b', 1)
+    assert ratings['a'] == 1505 and ratings['b'] == 1495
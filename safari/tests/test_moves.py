@@ -0,0 +1,159 @@
+import copy
+import logging
+import pickle
+import random
+
+import pytest
+
+from logic import GameRunner
+from safari import codec
+from safari.cards.first_game_deck import Chameleon, Lion, Parrot, Zebra
+from safari.game_state import GameState, Move
+from safari.players.strategies import Max
+from safari.replay import ReplayRecorder
+from safari.search import Move as PackedMove, SearchState
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import init
+
+
+def new_runner(seed):
+    return GameRunner(init({player: Max for player in range(4)}, rng=random.Random(seed)), log_level=logging.WARNING)
+
+
+def snapshot(state):
+    return (codec.to_json(state), list(state.table.cursors), dict(state.cards_in_bar.scores),
+            state.table.n_finished, [list(hand) for hand in state.table.hands])
+
+
+def packed_view(search_state):
+    return search_state.queue, search_state.hands, search_state.decks, search_state.scores
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_apply_matches_copies_and_undo_restores(seed):
+    runner = new_runner(seed)
+    state = runner.game_state
+    while not state.finished:
+        before = snapshot(state)
+        queue = state.queue
+        moves = state.legal_moves()
+        assert len(set(moves)) == len(moves)
+        assert {move.card for move in moves} == set(state.table[state.current_player]['hand'])
+        for move in moves:
+            expected = SearchState.from_game_state(state).apply(
+                PackedMove(move.card.id, move.chameleon_target, move.parrot_target or 0))
+            undo = state.apply(move)
+            assert packed_view(SearchState.from_game_state(state)) == packed_view(expected)
+            state.undo(undo)
+            assert snapshot(state) == before
+            assert state.queue is queue
+
+        # The default choices against a copy played through the game loop.
+        card = state.table[state.current_player]['strategy'].choose(state, state.current_player)
+        reference = copy.deepcopy(runner)
+        reference.update_game_state(card)
+        state.apply(Move(card))
+        assert codec.to_json(state) == codec.to_json(reference.game_state)
+        assert state.table.all_finished == reference.game_state.table.all_finished
+        runner.game_state = state
+
+
+def test_undo_a_whole_game():
+    runner = new_runner(7)
+    state = runner.game_state
+    start = snapshot(state)
+    undos = []
+    while not state.finished:
+        moves = state.legal_moves()
+        undos.append(state.apply(moves[-1]))
+    assert state.results and state.turn_number == 40
+    for undo in reversed(undos):
+        state.undo(undo)
+    assert snapshot(state) == start
+
+
+def test_legal_moves_cover_choices():
+    state = GameState(
+        queue=Queue([Lion(1), Parrot(2), Chameleon(3)]),
+        players=[0, 1], n_players=2,
+        table={
+            0: {'hand': [Parrot(0), Chameleon(0), Zebra(0)], 'deck': [], 'thrown': [], 'strategy': Max(),
+                'finished': False},
+            1: {'hand': [Zebra(1)], 'deck': [], 'thrown': [], 'strategy': Max(), 'finished': False},
+        },
+    )
+    assert state.legal_moves() == [
+        Move(Parrot(0), None, 0), Move(Parrot(0), None, 1), Move(Parrot(0), None, 2),
+        Move(Chameleon(0), 0), Move(Chameleon(0), 1, 0), Move(Chameleon(0), 1, 1), Move(Chameleon(0), 1, 2),
+        Move(Zebra(0)),
+    ]
+    assert state.legal_moves(1) == [Move(Zebra(1))]
+    undo = state.apply(Move(Chameleon(0), 1, 0))
+    assert state.queue == [Parrot(2), Chameleon(3), Chameleon(0)] and state.cards_in_thrash == [Lion(1)]
+    state.undo(undo)
+    assert state.queue == [Lion(1), Parrot(2), Chameleon(3)] and state.cards_in_thrash == []
+
+
+class LastMove(Max):
+    """Plays the last legal move, chameleon and parrot targets included."""
+
+    def choose(self, game_state, player):
+        self.move = game_state.legal_moves(player)[-1]
+        return self.move.card
+
+    def targets(self, game_state, player, card):
+        return self.move.chameleon_target, self.move.parrot_target
+
+
+@pytest.mark.parametrize('seed', [3, 4])
+def test_runner_plays_the_targets_of_the_strategy(seed):
+    recorder = ReplayRecorder(seed=seed)
+    runner = GameRunner(init({player: LastMove for player in range(4)}, rng=random.Random(seed)),
+                        log_level=logging.WARNING, observers=[recorder])
+    state = copy.deepcopy(runner.game_state)
+    while not runner.game_state.finished:
+        move = state.choose_move()
+        runner.play_turn()
+        state.apply(move)
+        assert codec.to_json(state) == codec.to_json(runner.game_state)
+    decisions = recorder.replays[0].decisions
+    assert any(decision.parrot_target for decision in decisions)
+    assert any(decision.chameleon_target is not None for decision in decisions)
+
+
+def halfway(seed):
+    runner = new_runner(seed)
+    for _ in range(17):
+        runner.play_turn()
+    return runner.game_state
+
+
+def play_out(state):
+    while not state.finished:
+        state.apply(state.legal_moves()[0])
+    return state
+
+
+def test_clone_is_independent():
+    state = halfway(0)
+    before = snapshot(state)
+    clone = state.clone()
+    assert snapshot(clone) == before
+    assert clone.table[0]['strategy'] is state.table[0]['strategy']
+    assert clone.table.decks[0] is state.table.decks[0]
+    play_out(clone)
+    assert snapshot(state) == before
+    assert play_out(state).results == clone.results
+    assert codec.to_json(state) == codec.to_json(clone)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_pickle_round_trip(seed):
+    state = halfway(seed)
+    data = pickle.dumps(state)
+    assert len(data) < 400
+    restored = pickle.loads(data)
+    assert snapshot(restored) == snapshot(state)
+    assert restored.last_queue_evaluation == state.last_queue_evaluation
+    assert codec.to_json(play_out(restored)) == codec.to_json(play_out(state))
+    assert snapshot(copy.deepcopy(state)) == snapshot(state)
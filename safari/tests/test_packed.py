@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from safari.cards.base import ANIMALS
+from safari.cards.first_game_deck import Chameleon, Hippo, Lion, Monkey
+from safari.search import moves_for
+from safari.stacks import packed
+from safari.stacks.queue import Queue
+from safari.stacks.shuffle import ANIMAL_MAPPING
+
+ALL_CARDS = [packed.encode(value, player) for value in ANIMALS for player in range(4)]
+
+
+def random_case(rng):
+    cards = rng.sample(ALL_CARDS, rng.randint(1, 5))
+    return tuple(cards[:-1]), cards[-1]
+
+
+def test_card_round_trip():
+    for card in ALL_CARDS:
+        assert packed.pack_card(packed.unpack_card(card)) == card
+    assert packed.value_of(packed.pack_card(Lion(3))) == ANIMALS.LION
+    assert packed.player_of(packed.pack_card(Lion(3))) == 3
+
+
+def test_queue_round_trip():
+    queue = Queue([Monkey(1), Hippo(0), Chameleon(3)])
+    assert packed.to_queue(packed.to_packed(queue)) == queue
+    assert isinstance(packed.to_queue(()), Queue)
+
+
+@pytest.mark.parametrize('animal', list(ANIMALS))
+def test_resolve_matches_object_model(animal):
+    rng = random.Random(int(animal))
+    for _ in range(500):
+        queue, _ = random_case(rng)
+        card = packed.encode(animal, rng.randrange(4))
+        if card in queue:
+            continue
+        objects = packed.to_queue(queue)
+        expected_queue, expected_dropped = objects.resolve(packed.unpack_card(card))
+        # Actions build new queues, the one played on is left as it was.
+        assert objects == packed.to_queue(queue)
+        new_queue, dropped = packed.resolve(queue, card)
+        assert new_queue == packed.to_packed(expected_queue), (queue, card)
+        assert dropped == packed.to_packed(expected_dropped), (queue, card)
+
+
+@pytest.mark.parametrize('animal', [ANIMALS.CHAMELEON, ANIMALS.PARROT])
+def test_targets_match_object_model(animal):
+    rng = random.Random(int(animal))
+    for _ in range(300):
+        queue, _ = random_case(rng)
+        card = packed.encode(animal, rng.randrange(4))
+        if card in queue:
+            continue
+        for move in moves_for(queue, card):
+            objects = packed.to_queue(queue)
+            expected_queue, expected_dropped = objects.resolve(packed.unpack_card(card), *move[1:])
+            assert objects == packed.to_queue(queue)
+            new_queue, dropped = packed.resolve(queue, *move)
+            assert new_queue == packed.to_packed(expected_queue), (queue, move)
+            assert dropped == packed.to_packed(expected_dropped), (queue, move)
+
+
+def test_actions_cover_all_animals():
+    for animal, card_class in ANIMAL_MAPPING.items():
+        assert packed.ACTIONS[animal].__name__ == card_class.__name__.lower()
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from safari.cards.base import ANIMALS
+from safari.cards.first_game_deck import Croc, Gazelle, Hippo, Lion, Monkey, Seal, Zebra
+from safari.stacks.queue import REPEATING, Queue, animal_mask
+from safari.stacks.shuffle import ANIMAL_MAPPING
+
+
+def assert_indexed(queue):
+    assert queue.ids == [card.id for card in queue]
+    assert queue.animals == animal_mask(*(card.value for card in queue))
+
+
+@pytest.mark.parametrize('change', [
+    lambda q: q.append(Zebra(2)),
+    lambda q: q.insert(1, Lion(3)),
+    lambda q: q.pop(0),
+    lambda q: q.pop(),
+    lambda q: q.reverse(),
+    lambda q: q.sort(key=lambda card: card.value),
+    lambda q: q.extend([Seal(0)]),
+    lambda q: q.remove(Monkey(1)),
+    lambda q: q.clear(),
+    lambda q: q.__setitem__(0, Croc(2)),
+    lambda q: q.__delitem__(slice(0, 2)),
+    lambda q: q.__iadd__([Hippo(0)]),
+    lambda q: q.drop_card_values(ANIMALS.MONKEY),
+])
+def test_index_follows_changes(change):
+    queue = Queue([Monkey(0), Monkey(1), Hippo(2), Gazelle(3)])
+    assert_indexed(queue)
+    change(queue)
+    assert_indexed(queue)
+
+
+def test_queries():
+    queue = Queue([Monkey(0), Lion(1), Monkey(1), Seal(2)])
+    assert queue.find_indices_of(ANIMALS.MONKEY) == [0, 2]
+    assert queue.find_indices_of(ANIMALS.ZEBRA) == []
+    assert queue.values == [4, 12, 4, 6]
+    assert Lion(1) in queue and Lion(0) not in queue and Zebra(1) not in queue
+    assert queue.index(Monkey(1)) == 2
+    assert queue.after_last_of(animal_mask(ANIMALS.LION, ANIMALS.MONKEY)) == 3
+    assert queue.after_last_of(animal_mask(ANIMALS.ZEBRA)) == 0
+    assert queue[1:].find_indices_of(ANIMALS.MONKEY) == [1]
+    assert pickle.loads(pickle.dumps(queue)).ids == queue.ids
+
+
+def test_repeating_mask():
+    assert REPEATING == animal_mask(*(value for value, card in ANIMAL_MAPPING.items() if card.repeating_action))
@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+
+from logic import GameRunner
+from safari.players.strategies import Max
+from safari.records import BLOCK_HEADER, MAGIC_V1, RAW, GameRecord, GameRecorder, GameRecordWriter, TurnDelta, \
+    decode_record, encode_record, read_records
+from safari.stacks.packed import pack_card
+from safari.stacks.shuffle import init
+
+
+def play(writer, seed=None):
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING,
+                        observers=[GameRecorder(writer, seed=seed)])
+    runner.run()
+    return runner.game_state
+
+
+def test_record_round_trip():
+    record = GameRecord(
+        seed=42,
+        strategies={0: 'Max', 1: 'Player'},
+        deal={0: ((4, 8), (12,), ()), 1: ((5,), (), (9, 13))},
+        turns=[TurnDelta(player=0, card=4, queue=(4,)), TurnDelta(1, 5, 0, None, (4, 5), (4,), (5,), 1)],
+    )
+    decoded, offset = decode_record(encode_record(record))
+    assert decoded == record
+    assert offset == len(encode_record(record))
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_write_and_stream_games(tmp_path, compress):
+    path = tmp_path / 'games.sbgr'
+    with GameRecordWriter(path, compress=compress, block_size=256) as writer:
+        states = [play(writer, seed=i) for i in range(5)]
+
+    records = list(read_records(path))
+    assert [record.seed for record in records] == list(range(5))
+    for record, state in zip(records, states):
+        assert record.strategies == {i: 'Max' for i in range(4)}
+        assert len(record.turns) == state.turn_number
+        assert record.results() == state.results
+        assert record.turns[-1].queue == tuple(pack_card(card) for card in state.queue)
+        thrash = [card for turn in record.turns for card in turn.to_thrash]
+        assert thrash == [pack_card(card) for card in state.cards_in_thrash]
+        assert all(turn.dropped <= len(turn.to_thrash) for turn in record.turns)
+        for hand, deck, thrown in record.deal.values():
+            assert (len(hand), len(deck), len(thrown)) == (4, 6, 2)
+
+
+def test_append_to_existing_file(tmp_path):
+    path = tmp_path / 'games.sbgr'
+    for seed in range(2):
+        with GameRecordWriter(path) as writer:
+            play(writer, seed=seed)
+    assert [record.seed for record in read_records(path)] == [0, 1]
+
+
+def test_not_a_record_file(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'hello')
+    with pytest.raises(ValueError, match="not a game record file"):
+        list(read_records(path))
+
+
+def test_reads_first_version(tmp_path):
+    record = GameRecord(seed=3, strategies={0: 'Max'}, deal={0: ((4,), (), ())},
+                        turns=[TurnDelta(0, 4, None, None, (4,), (), ())])
+    # The first version had no dropped count in the turn header.
+    raw = encode_record(record)
+    raw = raw[:-5] + raw[-4:]
+    path = tmp_path / 'games.sbgr'
+    path.write_bytes(MAGIC_V1 + BLOCK_HEADER.pack(len(raw), len(raw), RAW) + raw)
+    assert list(read_records(path)) == [record]
+    with pytest.raises(ValueError, match="cannot be appended"):
+        GameRecordWriter(path)
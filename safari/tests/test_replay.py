@@ -0,0 +1,66 @@
+import logging
+import random
+
+from logic import GameRunner
+from safari.players.ismcts import ISMCTS
+from safari.players.strategies import Max
+from safari.replay import Decision, Replay, ReplayRecorder, decode_replay, encode_replay, read_replays, rebuild, \
+    write_replays
+from safari.stacks.shuffle import game_rng, game_seed, init
+from tournament import run_tournament
+
+
+class QuickISMCTS(ISMCTS):
+    def __init__(self):
+        super().__init__(iterations=5)
+
+
+def test_game_seeds():
+    assert game_seed(1, 0) == game_seed(1, 0)
+    assert len({game_seed(1, i) for i in range(1000)}) == 1000
+    assert game_seed(1, 0) != game_seed(2, 0)
+    deal = init({i: Max for i in range(4)}, rng=game_rng(3, 7))
+    again = init({i: Max for i in range(4)}, rng=game_rng(3, 7))
+    assert all(deal[p]['hand'] == again[p]['hand'] and deal[p]['deck'] == again[p]['deck'] for p in range(4))
+
+
+def test_encoding():
+    replay = Replay(seed=2 ** 62 + 5, decisions=[Decision(3), Decision(0, 2, 1), Decision(1, None, 3)])
+    data = encode_replay(replay)
+    assert len(data) == 10 + 3
+    assert decode_replay(data) == (replay, len(data))
+
+
+def test_record_and_rebuild(tmp_path):
+    recorder = ReplayRecorder()
+    states = []
+    for game in range(3):
+        recorder.seed = game_seed(5, game)
+        table = init({0: QuickISMCTS, 1: Max, 2: QuickISMCTS, 3: Max}, rng=random.Random(recorder.seed))
+        runner = GameRunner(table, log_level=logging.WARNING, observers=[recorder])
+        runner.run()
+        states.append((runner.game_state, list(runner.game_log)))
+
+    # The searches pick chameleon and parrot targets, the runner plays and the replays keep them.
+    assert any(decision.chameleon_target is not None or decision.parrot_target is not None
+               for replay in recorder.replays for decision in replay.decisions)
+
+    path = tmp_path / "games.replays"
+    write_replays(path, recorder.replays)
+    assert path.stat().st_size == 5 + 3 * 50
+    for replay, (state, history) in zip(read_replays(path), states):
+        assert rebuild(replay).game_state.results == state.results
+        middle = rebuild(replay, turn=17).game_state
+        assert middle.turn_number == 17
+        assert list(middle.queue) == list(history[16].queue)
+        assert middle.cards_in_bar == list(history[16].cards_in_bar)
+
+
+def test_tournament_replays():
+    result = run_tournament({i: Max for i in range(4)}, n_games=4, workers=2, seed=9, replays=True)
+    assert [replay.seed for replay in result.replays] == [game_seed(9, i) for i in range(4)]
+    points = {}
+    for replay in result.replays:
+        for player, value in rebuild(replay).game_state.results.items():
+            points[player] = points.get(player, 0) + value
+    assert points == result.seat_points
@@ -0,0 +1,104 @@
+import logging
+import random
+
+from logic import GameRunner
+from safari.cards.first_game_deck import Chameleon, Lion, Parrot, Zebra
+from safari.players.ismcts import ISMCTS
+from safari.players.strategies import Max
+from safari.search import Move, SearchState, determinize, moves_for, rewards, rollout, visible_cards
+from safari.stacks.packed import pack_card, to_packed
+from safari.stacks.shuffle import init
+
+
+def test_apply_matches_game_runner():
+    random.seed(3)
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING)
+    state = SearchState.from_game_state(runner.game_state)
+    while not runner.game_state.finished:
+        card = runner.get_played_card()
+        state = state.apply(Move(pack_card(card)))
+        runner.update_game_state(card)
+        assert state == SearchState.from_game_state(runner.game_state)
+    assert state.finished
+    assert list(state.scores) == [runner.game_state.results.get(player, 0) for player in range(4)]
+
+
+def test_moves_for_choices():
+    queue = to_packed([Lion(1), Parrot(2), Chameleon(3)])
+    assert moves_for(queue, pack_card(Zebra(0))) == [Move(pack_card(Zebra(0)))]
+    assert len(moves_for(queue, pack_card(Parrot(0)))) == 3
+    # Lion, or the parrot throwing out any of the three, never the other chameleon.
+    assert len(moves_for(queue, pack_card(Chameleon(0)))) == 1 + 3
+    assert moves_for((), pack_card(Chameleon(0))) == [Move(pack_card(Chameleon(0)))]
+
+
+def test_determinize_keeps_what_is_known():
+    random.seed(5)
+    runner = GameRunner(init(strategies={i: Max for i in range(4)}), log_level=logging.WARNING)
+    for _ in range(9):
+        runner.play_turn()
+    game_state = runner.game_state
+    visible = visible_cards(game_state)
+    rng = random.Random(0)
+    for _ in range(20):
+        state = determinize(game_state, 1, rng)
+        assert state.hands[1] == tuple(pack_card(card) for card in game_state.table[1]['hand'])
+        assert state.queue == to_packed(game_state.queue)
+        thrown = {pack_card(card) for card in game_state.table[1]['thrown']}
+        for player in range(4):
+            cards = state.hands[player] + state.decks[player]
+            assert len(state.hands[player]) == len(game_state.table[player]['hand'])
+            assert len(state.decks[player]) == len(game_state.table[player]['deck'])
+            assert len(set(cards)) == len(cards)
+            assert all(card & 3 == player and card not in visible and card not in thrown for card in cards)
+
+
+def test_rollout_and_rewards():
+    state = SearchState.from_game_state(GameRunner(init(strategies={i: Max for i in range(4)})).game_state)
+    scores = rollout(state, random.Random(0))
+    assert len(scores) == 4
+    assert sum(rewards(scores)) == 1
+    assert rewards([3, 5, 5, 0]) == [0.0, 0.5, 0.5, 0.0]
+
+
+def test_ismcts_plays_a_game():
+    random.seed(7)
+    table = init(strategies={0: ISMCTS, 1: Max, 2: Max, 3: Max})
+    table[0]['strategy'] = ISMCTS(iterations=30, seed=0)
+    runner = GameRunner(table, log_level=logging.WARNING)
+    runner.run()
+    strategy = table[0]['strategy']
+    assert runner.game_state.finished
+    assert strategy.last_iterations == 30
+    assert strategy.last_move is not None and strategy.last_move.card & 3 == 0
+
+
+def test_ismcts_time_limit():
+    random.seed(8)
+    table = init(strategies={i: Max for i in range(4)})
+    strategy = table[0]['strategy'] = ISMCTS(time_limit=0.02, seed=1)
+    GameRunner(table, log_level=logging.WARNING).play_turn()
+    assert strategy.last_iterations > 0
+
+
+def test_ismcts_without_iterations():
+    random.seed(8)
+    table = init(strategies={i: Max for i in range(4)})
+    strategy = table[0]['strategy'] = ISMCTS(iterations=0, seed=1)
+    runner = GameRunner(table, log_level=logging.WARNING)
+    runner.run()
+    assert runner.game_state.finished
+    assert strategy.last_iterations == 1 and strategy.last_move is not None
+
+
+def test_ismcts_reuses_tree():
+    random.seed(8)
+    table = init(strategies={i: Max for i in range(4)})
+    strategy = table[0]['strategy'] = ISMCTS(iterations=3000, seed=1)
+    runner = GameRunner(table, log_level=logging.WARNING)
+    runner.play_turn()
+    visits = strategy._root.visits
+    for _ in range(3):
+        runner.play_turn()
+    root = strategy._reuse(runner.game_state, 0)
+    assert root.visits > 0 and root.visits <= visits
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from safari import features
+from safari.selfplay import MANIFEST, generate, open_shards
+
+
+def test_dataset(tmp_path):
+    manifest = generate(tmp_path / "a", 25, seats=["Max", "Random", "Max", "Random"], games_per_shard=10,
+                        workers=1, seed=5)
+    assert [shard['games'] for shard in manifest['shards']] == [10, 10, 5]
+    assert manifest['positions'] == 25 * 40
+    assert json.loads((tmp_path / "a" / MANIFEST).read_text()) == manifest
+
+    shards = open_shards(tmp_path / "a")
+    for shard, info in zip(shards, manifest['shards']):
+        assert isinstance(shard['features'], np.memmap)
+        assert shard['features'].shape == (info['positions'], features.N_FEATURES)
+        assert shard['legal'][np.arange(info['positions']), shard['moves']].all()
+        # Every row of a game holds its final score, rotated to the player to move.
+        games = info['games']
+        outcomes = shard['outcomes'].reshape(40, games, 4)
+        assert (outcomes[1] == np.roll(outcomes[0], -1, axis=1)).all()
+        assert (outcomes[4] == outcomes[0]).all()
+        turns = shard['features'][:, features.TURN].reshape(40, games)
+        assert (turns == np.arange(40)[:, None]).all()
+
+
+def test_dataset_does_not_depend_on_workers(tmp_path):
+    generate(tmp_path / "a", 12, seats=["Random"] * 4, games_per_shard=5, workers=1, seed=1)
+    generate(tmp_path / "b", 12, seats=["Random"] * 4, games_per_shard=5, workers=2, seed=1)
+    for a, b in zip(open_shards(tmp_path / "a"), open_shards(tmp_path / "b")):
+        for key in a:
+            assert (a[key] == b[key]).all()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+
+from server import GameServer, percentiles, run_load, serve
+
+
+def run(coroutine_function, **server_options):
+    async def main():
+        server = GameServer(**server_options)
+        listener = await serve(server, port=0)
+        try:
+            return await coroutine_function(server, listener.sockets[0].getsockname()[1])
+        finally:
+            listener.close()
+            server.close()
+    return asyncio.run(main())
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.unread = []
+
+    @classmethod
+    async def open(cls, port):
+        return cls(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def send(self, **message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+    async def receive(self, **match):
+        """The first message with the `match` items, the others are kept for later."""
+        for message in self.unread:
+            if all(message.get(key) == value for key, value in match.items()):
+                self.unread.remove(message)
+                return message
+        while True:
+            message = json.loads(await asyncio.wait_for(self.reader.readline(), 10))
+            if all(message.get(key) == value for key, value in match.items()):
+                return message
+            self.unread.append(message)
+
+
+def test_percentiles():
+    assert percentiles(range(1, 101)) == {"p50": 50, "p90": 90, "p99": 99}
+    assert percentiles([]) == {"p50": None, "p90": None, "p99": None}
+
+
+def test_human_plays_a_whole_game():
+    async def play(server, port):
+        client = await Client.open(port)
+        await client.send(op="create", seats=["Player", "Max"], seed=5, id=1)
+        table = (await client.receive(id=1))["table"]
+        moves = 0
+        while True:
+            message = await client.receive()
+            if message.get("event") == "end":
+                return message, moves, server
+            if message.get("event") == "your_turn":
+                assert message["seat"] == 0 and len(message["hand"]) >= 1
+                index, chameleon_target, parrot_target = message["moves"][-1]
+                await client.send(op="move", table=table, index=index, chameleon_target=chameleon_target,
+                                  parrot_target=parrot_target)
+                moves += 1
+
+    end, moves, server = run(play, workers=0)
+    assert moves == 10
+    assert sum(end["results"].values()) > 0
+    assert server.moves == 20 and not server.tables
+    assert server.stats()["latency_ms"]["p50"] > 0
+
+
+def test_errors_and_free_seats():
+    async def play(server, port):
+        owner, guest = await Client.open(port), await Client.open(port)
+        await owner.send(op="create", seats=["Player", "Player"], free=[1], seed=1, id=1)
+        table = (await owner.receive(id=1))["table"]
+        await owner.receive(event="your_turn")
+        errors = []
+        for message in [dict(op="move", table=table, index=7), dict(op="move", table=99, index=0),
+                        dict(op="create", seats=["Nobody", "Max"]), dict(op="fly")]:
+            await owner.send(id=2, **message)
+            errors.append((await owner.receive(id=2))["error"])
+        await guest.send(op="move", table=table, index=0, id=3)
+        errors.append((await guest.receive(id=3))["error"])
+        await guest.send(op="join", table=table, seat=0, id=4)
+        errors.append((await guest.receive(id=4))["error"])
+        await guest.send(op="join", table=table, seat=1, id=5)
+        assert (await guest.receive(id=5))["ok"]
+
+        await owner.send(op="move", table=table, index=0)
+        turn = await guest.receive(event="your_turn")
+        await guest.send(op="state", table=table, id=6)
+        state = (await guest.receive(id=6))["state"]
+        assert state["seat"] == 1 and state["hand"] == turn["hand"] and state["turn"] == 1
+        owner.writer.close()
+        while server.tables:
+            await asyncio.sleep(0.01)
+        return errors
+
+    errors = run(play, workers=0)
+    assert errors == ["No card 7 in the hand", "No table 99", "Unknown strategies: ['Nobody']",
+                      "Unknown op 'fly'", "Not your turn", "Seat 0 is taken"]
+
+
+def test_load_with_process_pool():
+    async def load(server, port):
+        result = await run_load(port=port, tables=12, connections=3)
+        idle = await run_load(port=port, tables=300, connections=2, idle=True)
+        return result, idle
+
+    result, idle = run(load, workers=1)
+    assert result["server"]["moves"] == 12 * 40 and result["server"]["tables"] == 0
+    assert result["latency_ms"]["p99"] >= result["latency_ms"]["p50"] > 0
+    assert idle["server"]["tables"] == 300
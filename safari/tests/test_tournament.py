@@ -0,0 +1,40 @@
+import pytest
+
+from safari.players.strategies import Max, Player
+from tournament import TournamentResult, run_tournament
+
+
+def test_run_tournament_single_worker():
+    strategies = {i: Max for i in range(4)}
+    result = run_tournament(strategies, n_games=5, workers=1)
+    assert result.n_games == 5
+    assert sum(result.seat_wins.values()) + result.ties == 5
+    assert result.strategy_points['Max'] == sum(result.seat_points.values())
+    assert result.games_per_second > 0
+
+
+def test_run_tournament_pool():
+    strategies = {i: Max for i in range(4)}
+    result = run_tournament(strategies, n_games=6, workers=2)
+    assert result.n_games == 6
+    assert sum(result.seat_wins.values()) + result.ties == 6
+
+
+def test_run_tournament_rejects_human_player():
+    with pytest.raises(ValueError, match="human player"):
+        run_tournament({0: Max, 1: Player}, n_games=1, workers=1)
+
+
+def test_tie_is_not_a_win():
+    result = TournamentResult()
+    result.add_game({0: Max, 1: Max}, {0: 5, 1: 5})
+    assert result.ties == 1
+    assert result.seat_wins == {}
+    assert result.seat_points == {0: 5, 1: 5}
+
+
+def test_seeded_tournament_is_reproducible():
+    first = run_tournament({i: Max for i in range(4)}, n_games=6, workers=1, seed=11)
+    second = run_tournament({i: Max for i in range(4)}, n_games=6, workers=2, seed=11)
+    assert first.seat_points == second.seat_points
+    assert first.seed == 11
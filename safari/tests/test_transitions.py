@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from safari.cards.base import ANIMALS
+from safari.stacks import packed
+from safari.stacks.transitions import TransitionTable, build
+
+ALL_CARDS = [packed.encode(value, player) for value in ANIMALS for player in range(4)]
+
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('transitions')
+    path = build(directory / 'transitions.bin')
+    assert [child.name for child in directory.iterdir()] == ['transitions.bin']
+    return TransitionTable.load(path)
+
+
+def test_lookup_matches_packed_resolve(table):
+    rng = random.Random(0)
+    for _ in range(20000):
+        cards = rng.sample(ALL_CARDS, rng.randint(1, 5))
+        queue, card = tuple(cards[:-1]), cards[-1]
+        assert table.resolve(queue, card) == packed.resolve(queue, card), (queue, card)
+
+
+def test_lookup_with_choices(table):
+    rng = random.Random(1)
+    chameleon = packed.encode(ANIMALS.CHAMELEON, 0)
+    parrot = packed.encode(ANIMALS.PARROT, 0)
+    others = [card for card in ALL_CARDS if packed.player_of(card) != 0]
+    for _ in range(2000):
+        queue = tuple(rng.sample(others, rng.randint(1, 4)))
+        target = rng.randrange(len(queue))
+        assert table.resolve(queue, parrot, parrot_target=target) == \
+            packed.resolve(queue, parrot, parrot_target=target)
+        if packed.value_of(queue[target]) != ANIMALS.CHAMELEON:
+            assert table.resolve(queue, chameleon, target, 0) == packed.resolve(queue, chameleon, target, 0)
+
+
+def test_invalid_choice(table):
+    queue = (packed.encode(ANIMALS.CHAMELEON, 1), packed.encode(ANIMALS.LION, 1))
+    chameleon = packed.encode(ANIMALS.CHAMELEON, 0)
+    with pytest.raises(ValueError):
+        table.resolve(queue, chameleon, chameleon_target=0)
+    with pytest.raises(ValueError):
+        packed.resolve(queue, chameleon, chameleon_target=0)
+    with pytest.raises(ValueError):
+        table.resolve(queue, packed.encode(ANIMALS.PARROT, 0), parrot_target=2)
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError, match="rebuild"):
+        TransitionTable.load(path)
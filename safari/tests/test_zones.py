@@ -0,0 +1,84 @@
+import pickle
+
+import pytest
+
+from safari.cards.first_game_deck import Hippo, Lion, Monkey, Zebra
+from safari.game_state import GameState
+from safari.players.strategies import Max
+from safari.zones import PlayerZone, ScorePile, Table
+
+
+@pytest.fixture
+def table():
+    return Table({
+        0: {'hand': [Lion(0), Monkey(0)], 'deck': [Hippo(0), Zebra(0)], 'thrown': [], 'strategy': Max(), 'finished': False},
+        1: {'hand': [Monkey(1)], 'deck': [], 'thrown': [], 'strategy': Max(), 'finished': True},
+    })
+
+
+def test_zone_access(table):
+    zone = table[0]
+    assert isinstance(zone, PlayerZone)
+    assert zone['hand'] == [Lion(0), Monkey(0)]
+    assert zone['deck'] == [Hippo(0), Zebra(0)]
+    assert set(zone) == {'hand', 'deck', 'thrown', 'strategy', 'finished'}
+    assert dict(zone)['finished'] is False
+    with pytest.raises(KeyError):
+        zone['score']
+
+
+def test_draw_moves_the_cursor(table):
+    assert table.draw(0) == Hippo(0)
+    assert table[0]['hand'] == [Lion(0), Monkey(0), Hippo(0)]
+    assert table[0]['deck'] == [Zebra(0)]
+    assert table.deck_size(0) == 1
+    table.draw(0)
+    assert table.draw(0) is None
+    table[0]['deck'] = [Lion(0)]
+    assert table.deck_size(0) == 1
+
+
+def test_finished_counter(table):
+    assert table.n_finished == 1 and not table.all_finished
+    table[0]['finished'] = True
+    table[0]['finished'] = True
+    assert table.n_finished == 2 and table.all_finished
+    table[1] = {'hand': [], 'deck': [], 'thrown': [], 'strategy': Max(), 'finished': False}
+    assert table.n_finished == 1
+
+
+def test_score_pile():
+    bar = ScorePile([Lion(0), Monkey(1)])
+    assert bar.scores == {0: Lion.point_value, 1: Monkey.point_value}
+    bar.append(Hippo(0))
+    bar.extend([Zebra(2)])
+    bar += [Monkey(2)]
+    assert bar.scores == {0: Lion.point_value + Hippo.point_value, 1: Monkey.point_value,
+                          2: Zebra.point_value + Monkey.point_value}
+    bar.remove(Lion(0))
+    del bar[0]
+    assert bar.scores == {0: Hippo.point_value, 2: Zebra.point_value + Monkey.point_value}
+
+
+def test_game_state_keeps_plain_containers_working(table):
+    state = GameState(table={player: dict(zone) for player, zone in table.items()},
+                      cards_in_bar=[Lion(0)], players=[0, 1], n_players=2)
+    assert isinstance(state.table, Table) and isinstance(state.cards_in_bar, ScorePile)
+    card = state.table[0]['hand'][1]
+    state.remove_card_from_hand(0, card)
+    state.draw_card(0)
+    assert state.table[0]['hand'] == [Lion(0), Hippo(0)]
+    state.cards_in_bar = [Monkey(1), Monkey(1)]
+    state.update_results()
+    assert state.results == {1: 2 * Monkey.point_value}
+    state.table = {0: dict(state.table[0], finished=True), 1: dict(state.table[1])}
+    assert state.is_game_finished()
+
+
+def test_pickle(table):
+    table.draw(0)
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy[0]['hand'] == table[0]['hand']
+    assert copy[0]['deck'] == [Zebra(0)] and copy.n_finished == 1
+    bar = pickle.loads(pickle.dumps(ScorePile([Lion(3)])))
+    assert bar.scores == {3: Lion.point_value}
@@ -0,0 +1,219 @@
+"""
+Column-wise storage of the players' zones and running scores.
+
+`Table` keeps the hands, decks, thrown cards, strategies and finished flags of
+all players in one list per field, with a cursor per deck instead of popping
+its first card, and a count of finished players. `table[player]` is a
+`PlayerZone`, a view which keeps the `table[player]['hand']` style of access
+working. `ScorePile` is the bar: a list which keeps the points of every player
+as cards are added to it.
+"""
+from collections.abc import MutableMapping
+
+KEYS = ('hand', 'deck', 'thrown', 'strategy', 'finished')
+
+
+class PlayerZone(MutableMapping):
+    """
+    The zone of one player as a mapping with the keys of `KEYS`.
+    `zone['deck']` is a copy of the cards left in the deck, draw through `Table.draw`.
+    """
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key):
+        table, i = self.table, self.index
+        if key == 'hand':
+            return table.hands[i]
+        if key == 'deck':
+            return table.decks[i][table.cursors[i]:]
+        if key == 'thrown':
+            return table.thrown[i]
+        if key == 'strategy':
+            return table.strategies[i]
+        if key == 'finished':
+            return table.finished[i]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        table, i = self.table, self.index
+        if key == 'hand':
+            table.hands[i] = value
+        elif key == 'deck':
+            table.decks[i] = list(value)
+            table.cursors[i] = 0
+        elif key == 'thrown':
+            table.thrown[i] = value
+        elif key == 'strategy':
+            table.strategies[i] = value
+        elif key == 'finished':
+            table.set_finished(i, value)
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("Player zones have a fixed set of keys")
+
+    def __iter__(self):
+        return iter(KEYS)
+
+    def __len__(self):
+        return len(KEYS)
+
+    def __repr__(self):
+        return f"PlayerZone({dict(self)})"
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class Table(dict):
+    """player -> PlayerZone, built from any mapping of player -> zone mapping."""
+
+    def __init__(self, zones=()):
+        super().__init__()
+        self.hands = []
+        self.decks = []
+        self.cursors = []
+        self.thrown = []
+        self.strategies = []
+        self.finished = []
+        self.n_finished = 0
+        for player, zone in dict(zones).items():
+            self[player] = zone
+
+    def __setitem__(self, player, zone):
+        if isinstance(zone, PlayerZone) and zone.table is self:
+            return super().__setitem__(player, zone)
+        if player in self:
+            view = dict.__getitem__(self, player)
+            for key in KEYS:
+                view[key] = zone[key]
+            return
+        super().__setitem__(player, PlayerZone(self, len(self.hands)))
+        # The lists are shared with `zone`, like the dict of lists they replace.
+        self.hands.append(zone['hand'])
+        self.decks.append(zone['deck'])
+        self.cursors.append(0)
+        self.thrown.append(zone['thrown'])
+        self.strategies.append(zone['strategy'])
+        self.finished.append(bool(zone['finished']))
+        self.n_finished += self.finished[-1]
+
+    def __delitem__(self, player):
+        raise TypeError("Players cannot leave a table")
+
+    def __reduce__(self):
+        return Table, ({player: dict(zone) for player, zone in self.items()},)
+
+    def set_finished(self, index, finished):
+        finished = bool(finished)
+        if self.finished[index] != finished:
+            self.n_finished += 1 if finished else -1
+            self.finished[index] = finished
+
+    @property
+    def all_finished(self):
+        return self.n_finished == len(self.hands)
+
+    def draw(self, player):
+        """Move the top card of the deck of `player` to their hand, returns it or None."""
+        i = dict.__getitem__(self, player).index
+        deck, cursor = self.decks[i], self.cursors[i]
+        if cursor == len(deck):
+            return None
+        card = deck[cursor]
+        self.cursors[i] = cursor + 1
+        self.hands[i].append(card)
+        return card
+
+    def undraw(self, player):
+        """Put the last card of the hand of `player` back on top of their deck."""
+        i = dict.__getitem__(self, player).index
+        self.hands[i].pop()
+        self.cursors[i] -= 1
+
+    def deck_size(self, player):
+        i = dict.__getitem__(self, player).index
+        return len(self.decks[i]) - self.cursors[i]
+
+    def clone(self):
+        """
+        A table whose moves do not touch this one. Only the hands are copied: decks
+        are read through the cursors and thrown cards never change, so both tables
+        share them, and the strategies.
+        """
+        table = Table.__new__(Table)
+        table.hands = [list(hand) for hand in self.hands]
+        table.decks = list(self.decks)
+        table.cursors = list(self.cursors)
+        table.thrown = list(self.thrown)
+        table.strategies = list(self.strategies)
+        table.finished = list(self.finished)
+        table.n_finished = self.n_finished
+        for player, zone in dict.items(self):
+            dict.__setitem__(table, player, PlayerZone(table, zone.index))
+        return table
+
+
+class ScorePile(list):
+    """A list of cards which keeps the points per player, in order of their first card."""
+
+    def __init__(self, cards=()):
+        super().__init__(cards)
+        self._recount()
+
+    def _recount(self):
+        self.scores = {}
+        for card in self:
+            self.scores[card.player] = self.scores.get(card.player, 0) + card.point_value
+
+    def append(self, card):
+        super().append(card)
+        self.scores[card.player] = self.scores.get(card.player, 0) + card.point_value
+
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+
+    def truncate(self, length):
+        """Take back the cards after the first `length`, keeping the scores running."""
+        for card in self[length:]:
+            self.scores[card.player] -= card.point_value
+            if not self.scores[card.player]:
+                # Players only appear in the scores once they scored.
+                del self.scores[card.player]
+        list.__delitem__(self, slice(length, None))
+
+    def copy(self):
+        pile = ScorePile.__new__(ScorePile)
+        list.extend(pile, self)
+        pile.scores = dict(self.scores)
+        return pile
+
+    def __reduce__(self):
+        return ScorePile, (list(self),)
+
+
+def _recounting(name):
+    method = getattr(list, name)
+
+    def recount(self, *args):
+        result = method(self, *args)
+        self._recount()
+        return result
+
+    recount.__name__ = name
+    return recount
+
+
+# Anything but adding cards is rare, the scores are simply counted again.
+for _name in ('insert', 'remove', 'pop', 'clear', '__setitem__', '__delitem__', 'sort', 'reverse', '__imul__'):
+    setattr(ScorePile, _name, _recounting(_name))
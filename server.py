@@ -0,0 +1,442 @@
+"""
+Many concurrent tables behind a local socket.
+
+Clients speak JSON lines over TCP or a Unix socket. Requests are objects with an
+"op", an optional "id" is echoed in the reply:
+
+    {"op": "create", "seats": ["Player", "Max", "Max", "Max"], "seed": 1}
+        -> {"ok": true, "table": 3}, the "Player" seats belong to this connection,
+        but for the seats listed in "free"
+    {"op": "join", "table": 3, "seat": 0}       take a free "Player" seat
+    {"op": "move", "table": 3, "index": 1, "chameleon_target": null, "parrot_target": null}
+    {"op": "state", "table": 3}                 what the connection's seat sees
+    {"op": "close", "table": 3}
+    {"op": "stats"}                             tables, move latency percentiles, memory
+
+Seat owners receive events: {"event": "turn", ...} after every move,
+{"event": "your_turn", ...} with the hand and the legal moves, and
+{"event": "end", "results": ...}. Cards are packed ints (`value << 2 | player`).
+
+AI seats are decided in a process pool from the binary state, so a slow
+strategy only delays its own table. An idle table is just its `GameState`.
+
+    python server.py serve --port 8765 --workers 4
+    python server.py load --port 8765 --tables 1000 --connections 10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import resource
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from safari import codec
+from safari.game_state import STRATEGY_MAP, GameState, Move
+from safari.players.strategies import Player
+from safari.stacks.shuffle import init
+from safari.utils.helpers import create_logger
+
+logger = create_logger("Server")
+
+HUMAN = 'Player'
+OPS = ('create', 'join', 'move', 'state', 'close', 'stats')
+LATENCY_SAMPLES = 256
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """Nearest-rank percentiles of `samples`, in the unit of the samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f"p{point}": None for point in points}
+    return {f"p{point}": ordered[min(len(ordered) - 1, (len(ordered) * point - 1) // 100)] for point in points}
+
+
+def decide(data: bytes, player: int):
+    """Hand index of the card the strategy of `player` plays and its chameleon and parrot targets, run in the pool."""
+    state = codec.from_bytes(data)[0]
+    move = state.choose_move(player)
+    hand = state.table[player]['hand']
+    return next(i for i, held in enumerate(hand) if held is move.card), move.chameleon_target, move.parrot_target
+
+
+class ServerTable:
+    __slots__ = ('id', 'state', 'owners', 'latencies', 'busy')
+
+    def __init__(self, table_id, state):
+        self.id = table_id
+        self.state = state
+        # seat -> connection, for the human seats.
+        self.owners: Dict[int, Optional['Connection']] = {}
+        # Milliseconds from the start of a move to its broadcast.
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.busy = False
+
+    @property
+    def connections(self):
+        return {connection for connection in self.owners.values() if connection is not None}
+
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.tables = set()
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+
+class GameServer:
+    """
+    The tables and the requests on them. `workers=0` decides AI moves in the
+    default thread pool of the loop instead of processes.
+    """
+
+    def __init__(self, workers: int = None, seed: int = None):
+        self.tables: Dict[int, ServerTable] = {}
+        self.pool = ProcessPoolExecutor(workers) if workers != 0 else None
+        self.rng = random.Random(seed)
+        self.moves = 0
+        # Of all tables, finished ones included.
+        self.latencies = deque(maxlen=100 * LATENCY_SAMPLES)
+        self._ids = itertools.count(1)
+        self._tasks = set()
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    # Connections
+
+    async def handle(self, reader, writer):
+        connection = Connection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = self.request(connection, request)
+                except (ProtocolError, ValueError, KeyError, TypeError) as error:
+                    reply = {"ok": False, "error": str(error)}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                connection.send(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Closed by the client, or by the loop shutting down: the handler ends quietly.
+            pass
+        finally:
+            for table_id in list(connection.tables):
+                self.drop_table(table_id)
+            writer.close()
+
+    def request(self, connection, request):
+        if not isinstance(request, dict):
+            raise ProtocolError("Requests are JSON objects")
+        op = request.get("op")
+        if op not in OPS:
+            raise ProtocolError(f"Unknown op {op!r}")
+        if op == "create":
+            return self.create_table(connection, request["seats"], request.get("seed"), request.get("free", ()))
+        if op == "stats":
+            return self.stats(request.get("table"))
+        table = self.tables.get(request.get("table"))
+        if table is None:
+            raise ProtocolError(f"No table {request.get('table')}")
+        if op == "join":
+            return self.join(connection, table, request["seat"])
+        if op == "move":
+            return self.human_move(connection, table, request)
+        if op == "state":
+            return {"ok": True, "state": self.view(table, self.seat_of(connection, table))}
+        self.check_owner(connection, table)
+        self.drop_table(table.id)
+        return {"ok": True}
+
+    # Tables
+
+    def create_table(self, connection, seats: List[str], seed=None, free=()):
+        if not 2 <= len(seats) <= 4:
+            raise ProtocolError("A table has 2 to 4 seats")
+        unknown = [name for name in seats if name not in STRATEGY_MAP]
+        if unknown:
+            raise ProtocolError(f"Unknown strategies: {unknown}")
+        strategies = {seat: STRATEGY_MAP[name] for seat, name in enumerate(seats)}
+        rng = random.Random(seed if seed is not None else self.rng.getrandbits(63))
+        state = GameState(players=list(strategies), n_players=len(strategies), table=init(strategies, rng=rng))
+        table = ServerTable(next(self._ids), state)
+        table.owners = {seat: None if seat in free else connection for seat, name in enumerate(seats) if name == HUMAN}
+        self.tables[table.id] = table
+        connection.tables.add(table.id)
+        # After the reply, which tells the table id.
+        asyncio.get_running_loop().call_soon(self.advance, table)
+        return {"ok": True, "table": table.id}
+
+    def join(self, connection, table, seat):
+        if seat not in table.owners:
+            raise ProtocolError(f"Seat {seat} is not a human seat")
+        if table.owners[seat] not in (None, connection):
+            raise ProtocolError(f"Seat {seat} is taken")
+        table.owners[seat] = connection
+        connection.tables.add(table.id)
+        if table.state.current_player == seat and not table.busy:
+            asyncio.get_running_loop().call_soon(self.prompt, table)
+        return {"ok": True}
+
+    def drop_table(self, table_id):
+        table = self.tables.pop(table_id, None)
+        if table is None:
+            return
+        for connection in table.connections:
+            connection.tables.discard(table_id)
+
+    def seat_of(self, connection, table):
+        for seat, owner in table.owners.items():
+            if owner is connection:
+                return seat
+        return None
+
+    def check_owner(self, connection, table):
+        if connection not in table.connections:
+            raise ProtocolError(f"Table {table.id} has no seat of this connection")
+
+    def view(self, table, seat):
+        state = table.state
+        view = {
+            "table": table.id,
+            "turn": state.turn_number,
+            "current_player": state.current_player,
+            "queue": [card.id for card in state.queue],
+            "scores": {str(player): points for player, points in state.cards_in_bar.scores.items()},
+            "deck_sizes": [state.table.deck_size(player) for player in state.players],
+            "finished": state.finished,
+        }
+        if seat is not None:
+            view["seat"] = seat
+            view["hand"] = [card.id for card in state.table[seat]['hand']]
+        return view
+
+    # Moves
+
+    def human_move(self, connection, table, request):
+        start = time.perf_counter()
+        state = table.state
+        seat = state.current_player
+        if table.owners.get(seat) is not connection or table.busy or state.finished:
+            raise ProtocolError("Not your turn")
+        hand = state.table[seat]['hand']
+        index = request["index"]
+        if not 0 <= index < len(hand):
+            raise ProtocolError(f"No card {index} in the hand")
+        move = Move(hand[index], request.get("chameleon_target"), request.get("parrot_target"))
+        if (move.chameleon_target, move.parrot_target) != (None, None) and move not in state.legal_moves():
+            raise ProtocolError(f"Illegal choices {request}")
+        self.play(table, move, start)
+        self.advance(table)
+        return {"ok": True}
+
+    def play(self, table, move, start):
+        state = table.state
+        player = state.current_player
+        state.apply(move)
+        self.moves += 1
+        event = {"event": "turn", "table": table.id, "player": player, "card": move.card.id,
+                 "chameleon_target": move.chameleon_target, "parrot_target": move.parrot_target,
+                 "queue": [card.id for card in state.queue], "turn": state.turn_number}
+        for connection in table.connections:
+            connection.send(event)
+        latency = 1000 * (time.perf_counter() - start)
+        table.latencies.append(latency)
+        self.latencies.append(latency)
+        if state.finished:
+            results = {str(player): points for player, points in state.results.items()}
+            for connection in table.connections:
+                connection.send({"event": "end", "table": table.id, "results": results})
+            self.drop_table(table.id)
+
+    def advance(self, table):
+        """Prompt the human on turn, or start deciding the AI moves up to the next human."""
+        if table.state.finished or table.busy or table.id not in self.tables:
+            return
+        if isinstance(table.state.table[table.state.current_player]['strategy'], Player):
+            self.prompt(table)
+            return
+        table.busy = True
+        task = asyncio.get_running_loop().create_task(self.ai_turns(table))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def ai_turns(self, table):
+        loop = asyncio.get_running_loop()
+        try:
+            state = table.state
+            while not state.finished and not isinstance(state.table[state.current_player]['strategy'], Player):
+                start = time.perf_counter()
+                player = state.current_player
+                index, *choices = await loop.run_in_executor(self.pool, decide, codec.to_bytes(state), player)
+                if table.id not in self.tables:
+                    return
+                self.play(table, Move(state.table[player]['hand'][index], *choices), start)
+        except Exception:
+            logger.exception(f"Table {table.id} failed, dropping it")
+            self.drop_table(table.id)
+            return
+        finally:
+            table.busy = False
+        self.advance(table)
+
+    def prompt(self, table):
+        state = table.state
+        connection = table.owners.get(state.current_player)
+        if connection is None or state.finished or table.id not in self.tables:
+            return
+        message = self.view(table, state.current_player)
+        message["event"] = "your_turn"
+        message["moves"] = [[state.table[state.current_player]['hand'].index(move.card),
+                             move.chameleon_target, move.parrot_target] for move in state.legal_moves()]
+        connection.send(message)
+
+    # Statistics
+
+    def stats(self, table_id=None):
+        if table_id is not None:
+            if table_id not in self.tables:
+                raise ProtocolError(f"No table {table_id}")
+            samples = self.tables[table_id].latencies
+        else:
+            samples = self.latencies
+        return {
+            "ok": True,
+            "tables": len(self.tables),
+            "busy": sum(table.busy for table in self.tables.values()),
+            "moves": self.moves,
+            "latency_ms": percentiles(samples),
+            # Linux reports kilobytes.
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+
+async def serve(server: GameServer, host="127.0.0.1", port=8765, unix_path=None):
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, path=unix_path, limit=2 ** 20)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port, limit=2 ** 20)
+    logger.info(f"Serving on {unix_path or f'{host}:{port}'}")
+    return listener
+
+
+# Load generating client
+
+async def _open(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path, limit=2 ** 20)
+    return await asyncio.open_connection(host, port, limit=2 ** 20)
+
+
+async def _client(host, port, unix_path, n_tables, seats, idle, latencies, rng):
+    reader, writer = await _open(host, port, unix_path)
+    pending = {}
+    requests = itertools.count()
+
+    def send(message):
+        writer.write(json.dumps(message).encode() + b"\n")
+
+    for _ in range(n_tables):
+        send({"op": "create", "seats": seats, "seed": rng.getrandbits(32), "id": next(requests)})
+    created = 0
+    open_tables = n_tables
+    while open_tables:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        message = json.loads(line)
+        if "table" in message and message.get("ok") and "event" not in message:
+            created += 1
+            if idle and created == n_tables:
+                break
+        event = message.get("event")
+        if event == "your_turn" and not idle:
+            table = message["table"]
+            if table in pending:
+                latencies.append(1000 * (time.perf_counter() - pending.pop(table)))
+            index, chameleon_target, parrot_target = rng.choice(message["moves"])
+            pending[table] = time.perf_counter()
+            send({"op": "move", "table": table, "index": index,
+                  "chameleon_target": chameleon_target, "parrot_target": parrot_target})
+        elif event == "end":
+            if message["table"] in pending:
+                latencies.append(1000 * (time.perf_counter() - pending.pop(message["table"])))
+            open_tables -= 1
+        elif message.get("ok") is False:
+            raise ProtocolError(message["error"])
+    return reader, writer
+
+
+async def run_load(host="127.0.0.1", port=8765, unix_path=None, tables=100, connections=4,
+                   seats=(HUMAN, "Max", "Max", "Max"), idle=False, seed=0):
+    """
+    Open `connections` clients sharing `tables` tables. Human seats play random
+    legal moves, the latencies are from a move to the next prompt. With `idle`
+    the tables are only created and kept open; returns the server stats then.
+    """
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    sizes = [tables // connections + (i < tables % connections) for i in range(connections)]
+    clients = await asyncio.gather(*(
+        _client(host, port, unix_path, n, list(seats), idle, latencies, random.Random(rng.getrandbits(32)))
+        for n in sizes if n
+    ))
+    elapsed = time.perf_counter() - start
+    reader, writer = await _open(host, port, unix_path)
+    writer.write(b'{"op": "stats"}\n')
+    stats = json.loads(await reader.readline())
+    for _, client_writer in clients + [(reader, writer)]:
+        client_writer.close()
+    return {"elapsed": elapsed, "tables": tables, "latency_ms": percentiles(latencies), "server": stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve many game tables, or load a server with test clients.")
+    parser.add_argument("mode", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Unix socket path instead of TCP")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="AI processes, 0 for threads")
+    parser.add_argument("-t", "--tables", type=int, default=100, help="load: tables to open")
+    parser.add_argument("-c", "--connections", type=int, default=4, help="load: client connections")
+    parser.add_argument("--idle", action="store_true", help="load: only open the tables")
+    parser.add_argument("-s", "--seats", nargs="+", default=[HUMAN, "Max", "Max", "Max"], choices=sorted(STRATEGY_MAP))
+    args = parser.parse_args(argv)
+
+    if args.mode == "load":
+        result = asyncio.run(run_load(args.host, args.port, args.unix, args.tables, args.connections,
+                                      args.seats, args.idle))
+        logger.info(f"Load results: {json.dumps(result, indent=2)}")
+        return result
+
+    async def forever():
+        server = GameServer(args.workers)
+        listener = await serve(server, args.host, args.port, args.unix)
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    asyncio.run(forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import logging
+import multiprocessing
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Type
+
+from logic import GameRunner
+from safari.analytics import CardAnalytics
+from safari.game_state import STRATEGY_MAP
+from safari.instrument import profile_run
+from safari.players.strategies import Player, Strategy
+from safari.replay import Replay, ReplayRecorder, write_replays
+from safari.stacks.shuffle import game_rng, game_seed, init
+from safari.utils.helpers import create_logger
+
+logger = create_logger("Tournament")
+
+
+@dataclass
+class TournamentResult:
+    """
+    Combined tables of a tournament.
+    Seats are the keys of the `strategies` dict, strategies are keyed by their class name.
+    A game with several players sharing the best score counts as a tie, not as a win.
+    """
+    n_games: int = 0
+    elapsed: float = 0.0
+    ties: int = 0
+    seat_wins: Dict[int, int] = field(default_factory=dict)
+    seat_points: Dict[int, int] = field(default_factory=dict)
+    strategy_wins: Dict[str, int] = field(default_factory=dict)
+    strategy_points: Dict[str, int] = field(default_factory=dict)
+    analytics: Optional[CardAnalytics] = None
+    # Master seed of the deals, game i is dealt with `game_rng(seed, i)`.
+    seed: Optional[int] = None
+    replays: Optional[List[Replay]] = None
+
+    @property
+    def games_per_second(self):
+        return self.n_games / self.elapsed if self.elapsed else 0.0
+
+    def add_game(self, strategies, results):
+        self.n_games += 1
+        for seat, strategy in strategies.items():
+            points = results.get(seat, 0)
+            name = strategy.__name__
+            self.seat_points[seat] = self.seat_points.get(seat, 0) + points
+            self.strategy_points[name] = self.strategy_points.get(name, 0) + points
+
+        best = max(results.values(), default=0)
+        winners = [seat for seat, points in results.items() if points == best]
+        if len(winners) != 1:
+            self.ties += 1
+            return
+        seat = winners[0]
+        name = strategies[seat].__name__
+        self.seat_wins[seat] = self.seat_wins.get(seat, 0) + 1
+        self.strategy_wins[name] = self.strategy_wins.get(name, 0) + 1
+
+    def merge(self, other):
+        self.n_games += other.n_games
+        self.ties += other.ties
+        for mine, theirs in [
+            (self.seat_wins, other.seat_wins),
+            (self.seat_points, other.seat_points),
+            (self.strategy_wins, other.strategy_wins),
+            (self.strategy_points, other.strategy_points),
+        ]:
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        if other.analytics is not None:
+            self.analytics = other.analytics if self.analytics is None else self.analytics.merge(other.analytics)
+        if other.replays is not None:
+            self.replays = (self.replays or []) + other.replays
+
+    def table(self):
+        lines = [f"{'seat':>6} {'wins':>8} {'win %':>7} {'avg pts':>8}"]
+        for seat in sorted(self.seat_points):
+            wins = self.seat_wins.get(seat, 0)
+            lines.append(
+                f"{seat:>6} {wins:>8} {100 * wins / self.n_games:>6.1f}% "
+                f"{self.seat_points[seat] / self.n_games:>8.2f}"
+            )
+        lines.append(f"{'strategy':>12} {'wins':>8} {'points':>8}")
+        for name in sorted(self.strategy_points):
+            lines.append(f"{name:>12} {self.strategy_wins.get(name, 0):>8} {self.strategy_points[name]:>8}")
+        lines.append(f"ties: {self.ties}")
+        lines.append(f"{self.n_games} games in {self.elapsed:.2f}s ({self.games_per_second:.1f} games/s)")
+        return "\n".join(lines)
+
+
+def play_game(strategies: Dict[int, Type[Strategy]], observers=(), rng: random.Random = None):
+    table = init(strategies=strategies, rng=rng)
+    game_runner = GameRunner(table, log_level=logging.WARNING, observers=observers)
+    game_runner.run()
+    return game_runner.game_state.results
+
+
+def _init_worker():
+    # Forked workers inherit the parent's `random` state. Deals have their own
+    # streams, but strategies drawing from `random` would repeat each other.
+    random.seed()
+
+
+def _play_chunk(args):
+    strategies, seed, first_game, n_games, analytics, replays = args
+    result = TournamentResult(analytics=CardAnalytics() if analytics else None)
+    recorder = ReplayRecorder() if replays else None
+    observers = [observer for observer in (result.analytics, recorder) if observer]
+    for game in range(first_game, first_game + n_games):
+        if recorder:
+            recorder.seed = game_seed(seed, game)
+        result.add_game(strategies, play_game(strategies, observers, game_rng(seed, game)))
+    if recorder:
+        result.replays = recorder.replays
+    return result
+
+
+def _split(n_games, n_chunks):
+    size, rest = divmod(n_games, n_chunks)
+    return [size + (i < rest) for i in range(n_chunks) if size + (i < rest)]
+
+
+def run_tournament(strategies: Dict[int, Type[Strategy]], n_games: int, workers: int = None,
+                   chunks_per_worker: int = 4, analytics: bool = False, seed: int = None,
+                   replays: bool = False) -> TournamentResult:
+    """
+    Play `n_games` headless games with the given seat -> strategy class mapping
+    and return combined win/points tables.
+    Games are sent to a pool of `workers` processes in chunks, so that every worker
+    only sends back one small table per chunk.
+    With `analytics` the result also holds the per-turn card statistics of all games.
+    Deals are derived from `seed` and the game index, so a run is reproducible with
+    any number of workers; a random seed is drawn when none is given. With
+    `replays` the result keeps the replay of every game.
+    """
+    for seat, strategy in strategies.items():
+        if issubclass(strategy, Player):
+            raise ValueError(f"Seat {seat} is a human player, tournaments can only run AI strategies")
+    workers = workers or multiprocessing.cpu_count()
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+
+    start = time.perf_counter()
+    result = TournamentResult(seed=seed)
+    if workers == 1:
+        result.merge(_play_chunk((strategies, seed, 0, n_games, analytics, replays)))
+    else:
+        sizes = _split(n_games, workers * chunks_per_worker)
+        firsts = [sum(sizes[:i]) for i in range(len(sizes))]
+        chunks = [(strategies, seed, first, n, analytics, replays) for first, n in zip(firsts, sizes)]
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            # Replays are kept in game order.
+            for partial in (pool.imap if replays else pool.imap_unordered)(_play_chunk, chunks):
+                result.merge(partial)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Play many headless games and report win/points tables.")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("-s", "--strategies", nargs="+", default=["Max"] * 4, choices=sorted(STRATEGY_MAP),
+                        help="one strategy per seat")
+    parser.add_argument("-a", "--analytics", default=None, help="CSV file for the per-turn card statistics")
+    parser.add_argument("--seed", type=int, default=None, help="master seed of the deals")
+    parser.add_argument("-r", "--replays", default=None, help="file for the replays of all games")
+    parser.add_argument("-p", "--profile", default=None,
+                        help="play in this process under the profilers and write collapsed stacks to this file")
+    args = parser.parse_args(argv)
+
+    strategies = {seat: STRATEGY_MAP[name] for seat, name in enumerate(args.strategies)}
+
+    def run(workers):
+        return run_tournament(strategies, args.games, workers, analytics=bool(args.analytics),
+                              seed=args.seed, replays=bool(args.replays))
+
+    if args.profile:
+        result, report = profile_run(lambda: run(1), args.profile)
+        logger.info(f"Profile:\n{report}")
+    else:
+        result = run(args.workers)
+    logger.info(f"Tournament results (seed {result.seed}):\n{result.table()}")
+    if args.analytics:
+        result.analytics.to_csv(args.analytics)
+    if args.replays:
+        write_replays(args.replays, result.replays)
+    return result
+
+
+if __name__ == "__main__":
+    main()